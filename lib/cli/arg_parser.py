@@ -34,6 +34,24 @@ class ArgumentParser:
             action="store_true",
             help="Checks if a new version of SBDots is available",
         )
+        parser.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            default=None,
+            metavar="N",
+            help="Number of AUR packages to build concurrently during install",
+        )
+        parser.add_argument(
+            "--from-scratch",
+            action="store_true",
+            help="Ignore the install journal and redo every install step",
+        )
+        parser.add_argument(
+            "--profile",
+            action="store_true",
+            help="Record a timing profile of the install and print the slowest steps",
+        )
         parser.add_argument(
             "-v",
             "--version",
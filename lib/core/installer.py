@@ -1,6 +1,13 @@
 from includes.logger import logger, log_heading
-from includes.paths import LOG_FILE
-from includes.tui import print_sbdots_title, print_subtext, print_success, print_error, Spinner
+from includes.paths import (
+    LOG_FILE, HOME, USER_DOTFILES_DIR, USER_WALLPAPERS_DIR, SBDOTS_DOTFILES_DIR,
+    SBDOTS_WALLPAPERS_DIR, SBDOTS_UDEV_RULES_DIR, CORE_PKGS, HYPRLAND_PKGS,
+    FONTS, APPLICATIONS, THEMING_PKGS
+)
+from includes.library import SudoKeepAlive, installed_packages
+from includes.journal import InstallJournal, hash_files, hash_listing, hash_tree, hash_values
+from includes.profiler import profiler, ux_delay, STEP
+from includes.tui import print_sbdots_title, print_subtext, print_success, print_error, print_info, print_table, Spinner
 
 from modules import DotfilesInstaller, WallpapersInstaller, PackagesInstaller, AutoPowerSaverInstaller
 
@@ -8,14 +15,30 @@ from misc.apply_gtk_theme import apply_gtk_theme
 from misc.apply_wallpaper import apply_wallpaper
 from misc.reload_hyprctl import reload_hyprland
 
-from time import sleep
-from typing import Dict, Callable
+from core.scheduler import TaskScheduler, SUCCESS, SKIPPED
+
+from typing import Callable, Dict, List, Optional
 import sys
 
+# Components the installation can't complete without
+CRITICAL_COMPONENTS = ["Packages", "Dotfiles", "Wallpapers"]
+
+# GTK theme applied at the end of the install
+GTK_THEME = "catppuccin-mocha-blue-standard+default"
+
 
 class SBDotsInstaller:
-    def __init__(self, dry_run: bool = False):
+    def __init__(self, dry_run: bool = False, jobs: Optional[int] = None, from_scratch: bool = False):
         self.dry_run = dry_run
+        self.jobs = jobs
+        self.from_scratch = from_scratch
+        self.journal: Optional[InstallJournal] = None
+        self.packages_installer: Optional[PackagesInstaller] = None
+
+        # User choices, collected before any component runs
+        self.install_wallpaper_collection: bool = False
+        self.optional_applications: List[str] = []
+        self.retry_optional_applications: bool = False
 
         # ensure log file is empty at start
         open(LOG_FILE, "w").close()
@@ -32,7 +55,27 @@ class SBDotsInstaller:
     def _clear(self) -> None:
         print("\033c", end="")
 
+    def _report_profile(self) -> None:
+        """Write the timeline and print the slowest steps when profiling."""
+        if not profiler.enabled:
+            return
+
+        path = profiler.write_timeline()
+        rows = [
+            [span.name[:60], span.kind, f"{span.wall:.2f}s", f"{span.cpu:.2f}s",
+             "" if span.exit_code is None else str(span.exit_code)]
+            for span in profiler.slowest()
+        ]
+        print()
+        print_table("Slowest steps", ["Step", "Kind", "Wall", "CPU", "Exit"], rows)
+        print_info(
+            f"Total: {profiler.root.wall:.2f}s, "
+            f"artificial UX delays: {profiler.delay_total():.2f}s")
+        if path is not None:
+            print_info(f"Timeline written to {path}")
+
     def _exit(self) -> None:
+        self._report_profile()
         print()
         print()
         print_error(
@@ -40,24 +83,151 @@ class SBDotsInstaller:
         )
         sys.exit(1)
 
-    def install_components(self) -> bool:
-        logger.info("Starting installation of components...")
+    def _collect_choices(self) -> None:
+        """Ask every question up front so components can run unattended."""
+        self.install_wallpaper_collection = WallpapersInstaller.ask_install_collection(
+            self.dry_run)
+        self.optional_applications = self.packages_installer.select_optional_applications()
+        if self.optional_applications:
+            self.retry_optional_applications = self.packages_installer.ask_retry_failed()
+        print()
 
-        components: Dict[str, Callable[[], bool]] = {
-            "Packages": lambda: PackagesInstaller(dry_run=self.dry_run).install(),
-            "Dotfiles": lambda: DotfilesInstaller(dry_run=self.dry_run).install(),
-            "Wallpapers": lambda: WallpapersInstaller(dry_run=self.dry_run).install(),
-        }
+    def _reload_hyprland(self) -> bool:
+        with Spinner("Reloading hyprland...") as spinner:
+            if not reload_hyprland():
+                spinner.error("Hyprland reload failed.")
+                return False
+            spinner.success("Hyprland reloaded.")
+            return True
 
-        for component_name, install_func in components.items():
-            if not install_func():
-                logger.error(
-                    f"{component_name} installation failed. Please check the logs for details.")
+    def _apply_gtk_theme(self) -> bool:
+        with Spinner("Installing GTK Catppuccin theme...") as spinner:
+            if not apply_gtk_theme(spinner):
+                spinner.error(
+                    "Unable to install GTK theme, install manually later!")
                 return False
-            logger.info(f"{component_name} installed successfully.")
+            return True
+
+    def _apply_wallpaper(self) -> bool:
+        with Spinner("Applying wallpaper...") as spinner:
+            if not apply_wallpaper():
+                spinner.error("Unable to apply wallpaper, apply manually.")
+                return False
+            spinner.success("Wallpaper applied.")
+            return True
+
+    def _journaled(self, step: str, fingerprint: Callable[[], str], func: Callable[[], bool]) -> Callable[[], bool]:
+        """
+        Wrap a step so it is skipped when the journal holds a completed run
+        with the same input fingerprint, and recorded when it succeeds.
+        """
+        if self.journal is None:
+            return func
+
+        def run() -> bool:
+            current = fingerprint()
+            if self.journal.is_done(step, current):
+                logger.info(f"{step} unchanged since last run, skipping.")
+                print_success(f"{step} already installed, skipping...")
+                return True
+            if not func():
+                return False
+            # The fingerprint covers installed state too, record the new one
+            self.journal.record(step, fingerprint())
+            return True
+        return run
+
+    def _packages_fingerprint(self) -> str:
+        missing = sorted(
+            pkg for group in self.packages_installer.groups.values()
+            for pkg in group if pkg not in installed_packages)
+        return hash_values(
+            hash_files([CORE_PKGS, HYPRLAND_PKGS, THEMING_PKGS, FONTS, APPLICATIONS]),
+            missing,
+        )
+
+    def _dotfiles_fingerprint(self) -> str:
+        dotfiles = DotfilesInstaller(dry_run=self.dry_run)
+        links = {
+            component: dotfiles._is_linked(component) and (USER_DOTFILES_DIR / component).exists()
+            for component in dotfiles.dotfiles_components
+        }
+        return hash_values(hash_tree(SBDOTS_DOTFILES_DIR), links)
+
+    def _wallpapers_fingerprint(self) -> str:
+        # The listing of the installed wallpapers, so deleted ones are restored
+        return hash_values(
+            hash_tree(SBDOTS_WALLPAPERS_DIR),
+            self.install_wallpaper_collection,
+            hash_listing(USER_WALLPAPERS_DIR),
+        )
+
+    def _power_saver_fingerprint(self) -> str:
+        return hash_values(
+            hash_files([SBDOTS_UDEV_RULES_DIR / "99-power-state.rules"]),
+            AutoPowerSaverInstaller.is_installed(),
+        )
+
+    def _optional_fingerprint(self) -> str:
+        return hash_values(sorted(self.optional_applications))
+
+    def _gtk_theme_fingerprint(self) -> str:
+        return hash_values(GTK_THEME, (HOME / ".local/share/themes" / GTK_THEME).exists())
+
+    def build_task_graph(self) -> TaskScheduler:
+        """Declare every install step and the steps it depends on."""
+        scheduler = TaskScheduler()
+
+        # Dotfiles and wallpapers need no packages, the power saver only
+        # needs the udev rules dir, so all of them run alongside Packages.
+        # Only the wallpaper catalog waits for Packages, which installs Pillow
+        scheduler.add(
+            "Packages", self._journaled(
+                "Packages", self._packages_fingerprint,
+                lambda: self.packages_installer.install()))
+        scheduler.add(
+            "Dotfiles", self._journaled(
+                "Dotfiles", self._dotfiles_fingerprint,
+                lambda: DotfilesInstaller(dry_run=self.dry_run).install()))
+        scheduler.add(
+            "Wallpapers", self._journaled(
+                "Wallpapers", self._wallpapers_fingerprint,
+                lambda: WallpapersInstaller(
+                    dry_run=self.dry_run,
+                    install_collection=self.install_wallpaper_collection,
+                    update_catalog=False,
+                ).install()))
+        scheduler.add(
+            "Wallpaper catalog",
+            lambda: WallpapersInstaller(dry_run=self.dry_run).index(),
+            requires=["Packages", "Wallpapers"])
+        scheduler.add(
+            "Auto power saver", self._journaled(
+                "Auto power saver", self._power_saver_fingerprint,
+                lambda: AutoPowerSaverInstaller().install()))
+
+        # Optional apps share the pacman lock with Packages
+        scheduler.add(
+            "Optional applications", self._journaled(
+                "Optional applications", self._optional_fingerprint,
+                lambda: self.packages_installer.install_optional_applications(
+                    self.optional_applications, self.retry_optional_applications)),
+            requires=["Packages"])
 
-        sleep(1)  # delay for better UX
-        return True
+        # Finalization needs the installed programs and their configs
+        if not self.dry_run:
+            scheduler.add(
+                "Reload hyprland", self._reload_hyprland,
+                requires=["Packages", "Dotfiles"])
+            scheduler.add(
+                "GTK theme", self._journaled(
+                    "GTK theme", self._gtk_theme_fingerprint, self._apply_gtk_theme),
+                requires=["Packages", "Dotfiles"])
+            scheduler.add(
+                "Apply wallpaper", self._apply_wallpaper,
+                requires=["Packages", "Dotfiles", "Wallpapers"])
+
+        return scheduler
 
     def install(self) -> None:
         self._clear()
@@ -69,43 +239,49 @@ class SBDotsInstaller:
 
         logger.info("Starting SBDots installation...")
 
-        logger.info("Installing main components...")
-        if not self.install_components():
-            self._exit()
+        self.packages_installer = PackagesInstaller(
+            dry_run=self.dry_run, jobs=self.jobs)
 
-        if not PackagesInstaller(dry_run=self.dry_run).install_optional_applications():
-            print_error(
-                "Couldn't install optional applications, continuing...")
+        if not self.dry_run:
+            self.journal = InstallJournal()
+            if self.from_scratch:
+                logger.info("Starting from scratch, ignoring the install journal.")
+                self.journal.forget()
 
-        if not AutoPowerSaverInstaller().install():
-            print_error(
-                "Couldn't install auto power saver, continuing...")
+        sudo = SudoKeepAlive()
+        if not self.dry_run:
+            # Ask for sudo once up front so downloads can start right away
+            try:
+                sudo.start()
+            except RuntimeError as e:
+                logger.error(str(e))
+                self._exit()
+            # Nothing to download when the journal is about to skip Packages
+            if not self.journal.is_done("Packages", self._packages_fingerprint()):
+                self.packages_installer.start_prefetch()
 
-        # Finalizing
-        log_heading("Finalization")
-        with Spinner("Finalizing SBDots installation...") as spinner:
-            sleep(1)
+        with profiler.span("User prompts", STEP):
+            self._collect_choices()
 
-            spinner.update_text("Reloading hyprland...")
-            if not reload_hyprland():
-                spinner.error("Hyprland reload failed.")
+        logger.info("Installing components...")
+        results: Dict[str, str] = self.build_task_graph().run()
+        sudo.stop()
 
-            sleep(1)
-            spinner.update_text("Installing GTK Catppuccin theme...")
-            if not apply_gtk_theme(spinner):
-                spinner.error(
-                    "Unable to install GTK theme, install manually later!")
+        for name, state in results.items():
+            if state == SUCCESS:
+                logger.info(f"{name} installed successfully.")
+                continue
+            reason = "skipped, a prerequisite failed" if state == SKIPPED else "failed"
+            logger.error(f"{name} {reason}. Please check the logs for details.")
+            if name not in CRITICAL_COMPONENTS:
+                print_error(f"{name} {reason}, continuing...")
 
-            sleep(1)
-            spinner.update_text("Applying wallpaper...")
-            if not apply_wallpaper():
-                spinner.error("Unable to apply wallpaper, apply manually.")
-
-            sleep(1)
-            spinner.success("Changes applied successfully.")
+        if any(results[name] != SUCCESS for name in CRITICAL_COMPONENTS):
+            self._exit()
 
+        self._report_profile()
         print()
         print()
         print_success("SBDots installation completed successfully!")
-        sleep(2)
+        ux_delay(2)
         sys.exit(0)
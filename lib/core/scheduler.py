@@ -0,0 +1,117 @@
+from includes.logger import logger
+from includes.profiler import profiler, COMPONENT
+
+from concurrent.futures import ThreadPoolExecutor, Future, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+# Task states
+PENDING = "pending"
+SUCCESS = "success"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+class TaskGraphError(Exception):
+    """Raised when the task graph is invalid (unknown prerequisite or cycle)."""
+    pass
+
+
+@dataclass
+class Task:
+    name: str
+    func: Callable[[], bool]
+    requires: List[str] = field(default_factory=list)
+    state: str = PENDING
+
+
+class TaskScheduler:
+    """
+    Runs tasks on a thread pool as soon as their prerequisites succeeded.
+
+    A task that fails (returns False or raises) only affects the tasks that
+    depend on it, directly or transitively; they are marked as skipped while
+    independent tasks keep running.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self.tasks: Dict[str, Task] = {}
+
+    def add(self, name: str, func: Callable[[], bool], requires: Optional[List[str]] = None) -> None:
+        """Register a task and the names of the tasks it depends on."""
+        if name in self.tasks:
+            raise TaskGraphError(f"Task already registered: {name}")
+        self.tasks[name] = Task(name=name, func=func, requires=list(requires or []))
+
+    def _validate(self) -> None:
+        for task in self.tasks.values():
+            for dep in task.requires:
+                if dep not in self.tasks:
+                    raise TaskGraphError(
+                        f"Task '{task.name}' requires unknown task '{dep}'")
+
+        # Detect cycles with a depth-first walk
+        visiting, visited = set(), set()
+
+        def visit(name: str) -> None:
+            if name in visited:
+                return
+            if name in visiting:
+                raise TaskGraphError(f"Dependency cycle detected at task '{name}'")
+            visiting.add(name)
+            for dep in self.tasks[name].requires:
+                visit(dep)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self.tasks:
+            visit(name)
+
+    def _run_task(self, task: Task) -> bool:
+        logger.info(f"Task started: {task.name}")
+        try:
+            with profiler.span(task.name, COMPONENT) as span:
+                ok = bool(task.func())
+                if span is not None:
+                    span.exit_code = 0 if ok else 1
+                return ok
+        except Exception as e:
+            logger.error(f"Task {task.name} raised an error: {e}")
+            return False
+
+    def run(self) -> Dict[str, str]:
+        """Run every task, returns a mapping of task name to its final state."""
+        self._validate()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running: Dict[Future, Task] = {}
+
+            while True:
+                # Rescan until stable, a skipped task may skip its dependents
+                changed = True
+                while changed:
+                    changed = False
+                    for task in self.tasks.values():
+                        if task.state != PENDING or task in running.values():
+                            continue
+
+                        states = [self.tasks[dep].state for dep in task.requires]
+                        if any(state in (FAILED, SKIPPED) for state in states):
+                            task.state = SKIPPED
+                            changed = True
+                            logger.warning(
+                                f"Task skipped, a prerequisite failed: {task.name}")
+                        elif all(state == SUCCESS for state in states):
+                            running[pool.submit(profiler.wrap(self._run_task), task)] = task
+
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    task = running.pop(future)
+                    task.state = SUCCESS if future.result() else FAILED
+                    logger.info(f"Task {task.state}: {task.name}")
+
+        return {name: task.state for name, task in self.tasks.items()}
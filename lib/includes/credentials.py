@@ -0,0 +1,241 @@
+#   ____              _            _   _       _
+#  / ___|_ __ ___  __| | ___ _ __ | |_(_) __ _| |___
+# | |   | '__/ _ \/ _` |/ _ \ '_ \| __| |/ _` | / __|
+# | |___| | |  __/ (_| |  __/ | | | |_| | (_| | \__ \
+#  \____|_|  \___|\__,_|\___|_| |_|\__|_|\__,_|_|___/
+#
+# # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
+# Process wide sudo credential service
+# # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
+
+from typing import Callable, Dict, List, Optional
+import atexit
+import itertools
+import subprocess
+import threading
+import time
+
+from .logger import logger
+
+# Credential states
+UNKNOWN = "unknown"
+VALID = "valid"
+EXPIRING = "expiring"
+EXPIRED = "expired"
+# Invalidated on purpose by the last release(), nothing to re-authenticate
+RELEASED = "released"
+
+
+class Subscription:
+    """Handle returned by SudoCredentials.subscribe()."""
+
+    def __init__(self, version: int):
+        self.version = version
+        self.closed = False
+
+
+class SudoCredentials:
+    """
+    Keeps the sudo timestamp alive for every holder in the process with a
+    single refresher thread.
+
+    Holders take a lease with acquire() and give it back with release(), the
+    refresher runs `sudo -n -v` once per interval while a lease is active
+    (or only probes with `sudo -n true` when there are just subscribers).
+    State changes (valid, expiring, expired, released) are published through
+    a condition variable, subscribers block in wait() instead of polling.
+    """
+
+    def __init__(self, interval: float = 60, timestamp_timeout: float = 300,
+                 sudo: str = "sudo", clock: Callable[[], float] = time.monotonic):
+        self.interval = interval
+        # sudo's default timestamp_timeout, a failed refresh within it only
+        # means the credentials are about to expire
+        self.timestamp_timeout = timestamp_timeout
+        self.sudo = sudo
+        # Time source for the cadence, lease deadlines and credential age. The
+        # refresher sleeps on the condition, so a clock moved by hand has to
+        # notify it
+        self.clock = clock
+
+        self._cond = threading.Condition()
+        self._auth_lock = threading.Lock()
+        self._state = UNKNOWN
+        self._version = 0
+        self._last_valid: Optional[float] = None
+        self._leases: Dict[int, Optional[float]] = {}
+        self._lease_ids = itertools.count(1)
+        self._subscribers = 0
+        self._thread: Optional[threading.Thread] = None
+        self._next_run: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        with self._cond:
+            return self._state
+
+    def _publish(self, state: str) -> None:
+        """Set the state and wake subscribers, caller holds the condition."""
+        if state == VALID:
+            self._last_valid = self.clock()
+        if state != self._state:
+            logger.debug(f"Sudo credentials: {self._state} -> {state}")
+            self._state = state
+            self._version += 1
+            self._cond.notify_all()
+
+    def _run(self, *args: str, timeout: Optional[float] = 10, interactive: bool = False) -> int:
+        output = None if interactive else subprocess.DEVNULL
+        return subprocess.run([self.sudo, *args], stdout=output, stderr=output,
+                              timeout=timeout).returncode
+
+    def _ensure_refresher(self) -> None:
+        """Start the refresher thread, caller holds the condition."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._refresher, name="sudo-credentials", daemon=True)
+            self._thread.start()
+
+    def _refresher(self) -> None:
+        with self._cond:
+            while self._leases or self._subscribers:
+                # State changes notify the condition too, keep the cadence
+                self._next_run = self.clock() + self.interval
+                while (self._leases or self._subscribers) and self.clock() < self._next_run:
+                    self._cond.wait(timeout=self._next_run - self.clock())
+
+                # Drop leases that outlived their max duration
+                now = self.clock()
+                for lease, deadline in list(self._leases.items()):
+                    if deadline is not None and now > deadline:
+                        logger.info("Sudo keep-alive lease reached its max duration.")
+                        del self._leases[lease]
+
+                if not (self._leases or self._subscribers):
+                    break
+                if not self._leases and self._state == RELEASED:
+                    continue  # Revoked on purpose, nothing to watch until acquired again
+                args = ["-n", "-v"] if self._leases else ["-n", "true"]
+
+                # Don't hold the condition while sudo runs
+                self._cond.release()
+                try:
+                    try:
+                        state = VALID if self._run(*args) == 0 else EXPIRED
+                    except (subprocess.TimeoutExpired, OSError) as e:
+                        logger.warning(f"Unable to refresh sudo credentials: {e}")
+                        state = EXPIRED
+                finally:
+                    self._cond.acquire()
+
+                # Released while sudo ran, the result is stale
+                if not self._leases and self._state == RELEASED:
+                    continue
+                if state == EXPIRED and self._last_valid is not None and \
+                        self.clock() - self._last_valid < self.timestamp_timeout:
+                    state = EXPIRING
+                self._publish(state)
+
+            # Cleared under the condition, so a new holder either keeps this
+            # thread looping or starts a fresh one
+            self._thread = None
+            self._next_run = None
+
+    def authenticate(self) -> bool:
+        """
+        Validate credentials interactively if needed. Concurrent callers
+        share one password prompt.
+        """
+        with self._auth_lock:
+            with self._cond:
+                if self._state == VALID and self._last_valid is not None and \
+                        self.clock() - self._last_valid < self.interval:
+                    return True
+            try:
+                ok = self._run("-v", timeout=None, interactive=True) == 0
+            except OSError as e:
+                logger.error(f"Failed to run sudo: {e}")
+                ok = False
+            with self._cond:
+                self._publish(VALID if ok else EXPIRED)
+            return ok
+
+    def acquire(self, max_duration: Optional[float] = None) -> int:
+        """
+        Take a keep-alive lease, asking for the password if needed.
+        Returns the lease id, raises RuntimeError when sudo is refused.
+        """
+        if not self.authenticate():
+            raise RuntimeError("Failed to obtain sudo privileges")
+
+        with self._cond:
+            lease = next(self._lease_ids)
+            self._leases[lease] = None if max_duration is None \
+                else self.clock() + max_duration
+            self._ensure_refresher()
+        return lease
+
+    def release(self, lease: int) -> None:
+        """
+        Give back a lease, the last holder invalidates the sudo timestamp.
+        Subscribers see RELEASED rather than EXPIRED, so they don't prompt.
+        """
+        with self._cond:
+            if lease not in self._leases:
+                return
+            del self._leases[lease]
+            if self._leases:
+                return
+            # Published before sudo -k, so no probe reports it as expired
+            self._last_valid = None
+            self._publish(RELEASED)
+
+        try:
+            self._run("-k")
+        except (subprocess.TimeoutExpired, OSError) as e:
+            logger.warning(f"Failed to invalidate sudo timestamp: {e}")
+
+    def is_held(self, lease: int) -> bool:
+        with self._cond:
+            return lease in self._leases
+
+    def subscribe(self) -> Subscription:
+        with self._cond:
+            self._subscribers += 1
+            self._ensure_refresher()
+            return Subscription(self._version)
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._cond:
+            if subscription.closed:
+                return
+            subscription.closed = True
+            self._subscribers -= 1
+            self._cond.notify_all()
+
+    def wait(self, subscription: Subscription, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Block until the state changes since the subscription last saw it.
+        Returns the new state, or None once unsubscribed or on timeout.
+        """
+        with self._cond:
+            changed = self._cond.wait_for(
+                lambda: subscription.closed or self._version != subscription.version,
+                timeout=timeout)
+            if not changed or subscription.closed:
+                return None
+            subscription.version = self._version
+            return self._state
+
+
+sudo_credentials = SudoCredentials()
+
+
+def _release_all() -> None:
+    with sudo_credentials._cond:
+        leases: List[int] = list(sudo_credentials._leases)
+    for lease in leases:
+        sudo_credentials.release(lease)
+
+
+atexit.register(_release_all)
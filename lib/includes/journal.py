@@ -0,0 +1,139 @@
+#      _                              _
+#     | | ___  _   _ _ __ _ __   __ _| |
+#  _  | |/ _ \| | | | '__| '_ \ / _` | |
+# | |_| | (_) | |_| | |  | | | | (_| | |
+#  \___/ \___/ \__,_|_|  |_| |_|\__,_|_|
+#
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+# Persistent record of completed install steps
+# # # # # # # # # # # # # # # # # # # # # # # # # #
+
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+import hashlib
+import json
+import os
+import threading
+import time
+
+from .logger import logger
+from .paths import SBDOTS_CACHE_DIR
+
+JOURNAL_FILE = SBDOTS_CACHE_DIR / "journal.json"
+
+
+def hash_files(paths: Iterable[Path]) -> str:
+    """Hash the names and contents of the given files, missing files included."""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(str(path).encode())
+        try:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+        except OSError:
+            digest.update(b"<missing>")
+    return digest.hexdigest()
+
+
+def hash_tree(root: Path) -> str:
+    """Hash every file (and symlink target) below root, in a stable order."""
+    digest = hashlib.sha256()
+    if not root.exists():
+        return digest.hexdigest()
+
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames + [d for d in dirnames if os.path.islink(os.path.join(dirpath, d))]):
+            path = Path(dirpath) / name
+            digest.update(str(path.relative_to(root)).encode())
+            if path.is_symlink():
+                digest.update(os.readlink(path).encode())
+                continue
+            try:
+                with open(path, "rb") as f:
+                    for chunk in iter(lambda: f.read(1 << 20), b""):
+                        digest.update(chunk)
+            except OSError:
+                digest.update(b"<unreadable>")
+    return digest.hexdigest()
+
+
+def hash_listing(root: Path) -> str:
+    """Hash the names, sizes and mtimes of every file below root, without reading them."""
+    digest = hashlib.sha256()
+    if not root.exists():
+        return digest.hexdigest()
+
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            path = Path(dirpath) / name
+            digest.update(str(path.relative_to(root)).encode())
+            try:
+                st = os.stat(path)
+                digest.update(f"{st.st_size}:{st.st_mtime_ns}".encode())
+            except OSError:
+                digest.update(b"<missing>")
+    return digest.hexdigest()
+
+
+def hash_values(*values: object) -> str:
+    """Hash plain values (strings, bools, lists...) into a fingerprint."""
+    return hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class InstallJournal:
+    """
+    Records completed install steps together with a fingerprint of their
+    inputs. A step whose fingerprint is unchanged since it last completed
+    can be skipped on the next run.
+    """
+
+    def __init__(self, path: Path = JOURNAL_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._steps: Dict[str, Dict[str, object]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, object]]:
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+                if isinstance(data, dict):
+                    return data
+                logger.warning(f"Ignoring malformed install journal: {self.path}")
+        except FileNotFoundError:
+            pass
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Unable to read install journal {self.path}: {e}")
+        return {}
+
+    def _save(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self.path.with_suffix(".tmp")
+            with open(temp_file, "w") as f:
+                json.dump(self._steps, f, indent=4)
+            os.replace(temp_file, self.path)
+        except OSError as e:
+            logger.error(f"Failed to write install journal {self.path}: {e}")
+
+    def is_done(self, step: str, fingerprint: str) -> bool:
+        with self._lock:
+            entry = self._steps.get(step)
+            return entry is not None and entry.get("fingerprint") == fingerprint
+
+    def record(self, step: str, fingerprint: str) -> None:
+        with self._lock:
+            self._steps[step] = {"fingerprint": fingerprint, "completed_at": time.time()}
+            self._save()
+        logger.info(f"Journal: recorded completed step: {step}")
+
+    def forget(self, step: Optional[str] = None) -> None:
+        """Forget one step, or every step when none is given."""
+        with self._lock:
+            if step is None:
+                self._steps.clear()
+            else:
+                self._steps.pop(step, None)
+            self._save()
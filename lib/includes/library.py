@@ -9,16 +9,29 @@
 # # # # # # # # # # # # # # # # # # # # # # # #
 
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
+import errno
+import fcntl
 import json
+import os
 import shutil
+import stat
 import subprocess
 import threading
 import time
 import atexit
 
 from .logger import logger
-from .paths import SBDOTS_METADATA_FILE
+from .profiler import profiler
+from .credentials import sudo_credentials
+from .privileged import PrivilegedHelper
+from .paths import (
+    HOME,
+    SBDOTS_METADATA_FILE,
+    SBDOTS_SHARE_DIR,
+    CUSTOM_UDEV_RULES_DIR,
+    PACMAN_LOCAL_DB_DIR,
+)
 
 
 def get_version() -> str:
@@ -40,7 +53,9 @@ def get_version() -> str:
 #        |___/
 # # # # # # # # # # # # # # # # # # #
 
-def run_command(command: List[Union[str, Path]]) -> subprocess.CompletedProcess:
+def run_command(
+    command: List[Union[str, Path]], cwd: Optional[Path] = None
+) -> subprocess.CompletedProcess:
     """Run a command safely and return its result."""
     if not command:
         raise ValueError("Command must be a non-empty list of strings.")
@@ -50,7 +65,12 @@ def run_command(command: List[Union[str, Path]]) -> subprocess.CompletedProcess:
                    else arg for arg in command]
 
     try:
-        return subprocess.run(str_command, text=True, capture_output=True)
+        with profiler.subprocess(str_command) as span:
+            result = subprocess.run(
+                str_command, cwd=cwd, text=True, capture_output=True)
+            if span is not None:
+                span.exit_code = result.returncode
+        return result
     except FileNotFoundError as e:
         raise FileNotFoundError(f"Executable not found: {command[0]}") from e
     except subprocess.SubprocessError as e:
@@ -136,87 +156,42 @@ def is_laptop() -> bool:
 
 
 class SudoKeepAlive:
+    """
+    Keep-alive lease on the process wide sudo credential service. Every
+    instance shares the single refresher thread, only the last one to stop
+    invalidates the sudo timestamp.
+    """
+
     def __init__(self, max_duration: Optional[int] = None):
         """
         Initialize sudo keep-alive.
 
         Args:
-            interval: Seconds between sudo validations (default: 60)
             max_duration: Maximum duration in seconds before auto-stop (optional)
         """
-        self.interval = 60
         self.max_duration = max_duration
-        self._stop = threading.Event()
-        self._thread: Optional[threading.Thread] = None
         self._lock = threading.Lock()
-        self._is_running = False
+        self._lease: Optional[int] = None
         self._start_time: Optional[float] = None
 
     def start(self) -> None:
         """Ask for sudo once, then keep it alive in background."""
         with self._lock:
-            if self._is_running:
+            if self._lease is not None and sudo_credentials.is_held(self._lease):
                 return  # Already running
 
-            try:
-                subprocess.run(
-                    ["sudo", "-v"],
-                    check=True,
-                    capture_output=True,
-                    text=True
-                )
-            except subprocess.CalledProcessError as e:
-                raise RuntimeError(
-                    f"Failed to obtain sudo privileges: {e.stderr}")
-
-            self._is_running = True
+            self._lease = sudo_credentials.acquire(self.max_duration)
             self._start_time = time.time()
-            self._stop.clear()
-            self._thread = threading.Thread(
-                target=self._keepalive, daemon=True)
-            self._thread.start()
             atexit.register(self.stop)
 
-    def _keepalive(self) -> None:
-        """Background thread to maintain sudo privileges."""
-        while not self._stop.is_set():
-            time.sleep(self.interval)
-
-            # Check if max duration has been exceeded
-            if (self.max_duration is not None and
-                self._start_time is not None and
-                    time.time() - self._start_time > self.max_duration):
-                self.stop()
-                break
-
-            try:
-                subprocess.run(
-                    ["sudo", "-v"],
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL,
-                    check=True
-                )
-            except subprocess.CalledProcessError:
-                # Sudo authentication failed, stop the thread
-                self._stop.set()
-                break
-
     def stop(self) -> None:
-        """Stop keepalive and invalidate sudo timestamp."""
+        """Stop keepalive and invalidate sudo timestamp if no one else holds it."""
         with self._lock:
-            if not self._is_running:
+            if self._lease is None:
                 return
 
-            self._stop.set()
-            if self._thread and self._thread.is_alive():
-                self._thread.join(timeout=1.0)
-
-            subprocess.run(
-                ["sudo", "-k"],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
-            self._is_running = False
+            sudo_credentials.release(self._lease)
+            self._lease = None
             self._start_time = None
             atexit.unregister(self.stop)
 
@@ -224,13 +199,13 @@ class SudoKeepAlive:
     def is_running(self) -> bool:
         """Return whether the keepalive is active."""
         with self._lock:
-            return self._is_running
+            return self._lease is not None and sudo_credentials.is_held(self._lease)
 
     @property
     def elapsed_time(self) -> Optional[float]:
         """Return elapsed time since start in seconds, or None if not running."""
         with self._lock:
-            if self._is_running and self._start_time:
+            if self._lease is not None and self._start_time:
                 return time.time() - self._start_time
             return None
 
@@ -246,7 +221,6 @@ class SudoKeepAlive:
     def restart(self) -> None:
         """Restart the keepalive mechanism."""
         self.stop()
-        time.sleep(0.1)  # Brief pause
         self.start()
 
 
@@ -258,15 +232,131 @@ class SudoKeepAlive:
 #                      |_|
 # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
 
+# Root helper for the sudo fallbacks below, started on first use and then
+# reused so a run forks sudo once instead of once per failed operation
+privileged = PrivilegedHelper(
+    [HOME, SBDOTS_SHARE_DIR, CUSTOM_UDEV_RULES_DIR], readable_dirs=[SBDOTS_SHARE_DIR])
+
+
 def path_lexists(path: Path) -> bool:
     """Check for existing paths or broken symlinks."""
     return path.exists() or path.is_symlink()
 
 
-def copy(src: Path, dest: Path) -> bool:
+# ioctl to share the extents of a file (reflink) on btrfs, XFS, bcachefs...
+FICLONE = 0x40049409
+
+# Errors meaning a copy method isn't supported for a pair of filesystems
+_UNSUPPORTED_ERRNOS = {
+    errno.EOPNOTSUPP, errno.ENOTSUP, errno.EXDEV, errno.EINVAL,
+    errno.ENOSYS, errno.ENOTTY, errno.EBADF, errno.EPERM, errno.EMLINK,
+}
+
+# (src device, dest device) -> copy methods known not to work between them
+_unsupported_copy_methods: Dict[Tuple[int, int], Set[str]] = {}
+_copy_methods_lock = threading.Lock()
+
+
+def _reflink_file(src: Path, dest: Path) -> None:
+    with open(src, "rb") as fsrc, open(dest, "wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+
+
+def _hardlink_file(src: Path, dest: Path) -> None:
+    # A failed reflink attempt may have left an empty dest behind
+    try:
+        os.unlink(dest)
+    except FileNotFoundError:
+        pass
+    os.link(src, dest)
+
+
+def _copy_range_file(src: Path, dest: Path) -> None:
+    with open(src, "rb") as fsrc, open(dest, "wb") as fdst:
+        size = os.fstat(fsrc.fileno()).st_size
+        # Copy until EOF like shutil does, st_size may be stale or 0 (procfs)
+        blocksize = max(size, 1 << 23)
+        total = 0
+        while True:
+            copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), blocksize)
+            if copied == 0:
+                break
+            total += copied
+
+    # A short copy (some FUSE and overlay filesystems) means the method
+    # doesn't work there, nothing copied may just be an empty file or one
+    # whose size isn't known up front (procfs). Either way, stream it.
+    if total < size:
+        raise OSError(errno.ENOTSUP, f"copy_file_range copied {total} of {size} bytes", str(src))
+    if total == 0:
+        raise OSError(errno.ENODATA, "copy_file_range copied nothing", str(src))
+
+
+def _stream_file(src: Path, dest: Path) -> None:
+    with open(src, "rb") as fsrc, open(dest, "wb") as fdst:
+        shutil.copyfileobj(fsrc, fdst, 1 << 20)
+
+
+def copy_file(src: Path, dest: Path, hardlink: bool = False) -> str:
+    """
+    Copy a single file using the cheapest method the filesystems support:
+    reflink, then a hardlink (only when `hardlink` is set, meant for read-only
+    assets), then copy_file_range, then a plain streamed copy.
+
+    Methods that fail as unsupported are remembered per (src, dest) device
+    pair so they are only probed once. Returns the name of the method used.
+    """
+    # Never write through an existing dest, it may be a hardlink to src
+    try:
+        os.unlink(dest)
+    except (FileNotFoundError, IsADirectoryError):
+        pass
+
+    # One lstat per side, this runs once per file of every copied tree
+    src_st = os.lstat(src)
+    if stat.S_ISLNK(src_st.st_mode):
+        shutil.copy2(src, dest, follow_symlinks=False)
+        return "symlink"
+
+    key = (src_st.st_dev, os.stat(os.path.dirname(os.path.abspath(dest))).st_dev)
+    methods: List[Tuple[str, Callable[[Path, Path], None]]] = [("reflink", _reflink_file)]
+    if hardlink:
+        methods.append(("hardlink", _hardlink_file))
+    if hasattr(os, "copy_file_range"):
+        methods.append(("copy_file_range", _copy_range_file))
+
+    with _copy_methods_lock:
+        unsupported = set(_unsupported_copy_methods.get(key, ()))
+
+    for name, method in methods:
+        if name in unsupported:
+            continue
+        try:
+            method(src, dest)
+        except OSError as e:
+            if e.errno == errno.ENODATA:
+                logger.debug(f"Copy method {name} copied nothing from {src}, streaming it")
+                break
+            if e.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+            logger.debug(f"Copy method {name} unsupported for devices {key}: {e}")
+            with _copy_methods_lock:
+                _unsupported_copy_methods.setdefault(key, set()).add(name)
+            continue
+        if name != "hardlink":
+            shutil.copystat(src, dest)
+        return name
+
+    _stream_file(src, dest)
+    shutil.copystat(src, dest)
+    return "stream"
+
+
+def copy(src: Path, dest: Path, hardlink: bool = False) -> bool:
     """
     Safely copy files or directories from src to dest.
     Automatically overwrites if dest exists. Falls back to sudo when needed.
+    Pass `hardlink=True` for read-only assets that may share src's inode.
     """
     try:
         # Validate source exists
@@ -286,7 +376,7 @@ def copy(src: Path, dest: Path) -> bool:
                 logger.error(f"Failed to remove destination: {dest}")
                 return False
 
-        if _copy_without_sudo(src, dest):
+        if _copy_without_sudo(src, dest, hardlink):
             return True
         if _copy_with_sudo(src, dest):
             return True
@@ -304,22 +394,30 @@ def _create_parent_dir(path: Path) -> bool:
     if parent_dir.exists():
         return True
 
-    result = run_command(["sudo", "mkdir", "-p", parent_dir])
-    if result.returncode == 0:
-        logger.info(f"Created parent directory: {parent_dir}")
-        return True
-    else:
-        logger.error(
-            f"Failed to create parent directory: {parent_dir}: {result.stderr}")
+    try:
+        parent_dir.mkdir(parents=True, exist_ok=True)
+    except PermissionError:
+        if not privileged.mkdir(parent_dir):
+            logger.error(f"Failed to create parent directory: {parent_dir}")
+            return False
+    except OSError as e:
+        logger.error(f"Failed to create parent directory: {parent_dir}: {e}")
         return False
 
+    logger.info(f"Created parent directory: {parent_dir}")
+    return True
+
+
+def _copy_without_sudo(src: Path, dest: Path, hardlink: bool = False) -> bool:
+    def copy_function(s: str, d: str) -> None:
+        copy_file(s, d, hardlink)
 
-def _copy_without_sudo(src: Path, dest: Path) -> bool:
     try:
         if src.is_dir():
-            shutil.copytree(src, dest, symlinks=True, dirs_exist_ok=True)
+            shutil.copytree(src, dest, symlinks=True, dirs_exist_ok=True,
+                            copy_function=copy_function)
         else:
-            shutil.copy2(src, dest)
+            copy_file(src, dest, hardlink)
 
         logger.info(f"Copied successfully without sudo: {src} -> {dest}")
         return True
@@ -334,28 +432,12 @@ def _copy_without_sudo(src: Path, dest: Path) -> bool:
 
 
 def _copy_with_sudo(src: Path, dest: Path) -> bool:
-    try:
-        if src.is_dir():
-            cp_cmd = ["sudo", "cp", "-r", src, dest]
-        else:
-            cp_cmd = ["sudo", "cp", "--preserve=all", src, dest]
-
-        result = run_command(cp_cmd)
-        if result.returncode == 0:
-            logger.info(f"Copied successfully with sudo: {src} -> {dest}")
-            return True
-        else:
-            logger.error(
-                f"Failed to copy with sudo: {src} -> {dest}: {result.stderr}")
-            return False
+    if privileged.copy(src, dest):
+        logger.info(f"Copied successfully with sudo: {src} -> {dest}")
+        return True
 
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Command failed during sudo copy: {src} -> {dest}: {e}")
-        return False
-    except Exception as e:
-        logger.error(
-            f"Unexpected error during sudo copy: {src} -> {dest}: {e}")
-        return False
+    logger.error(f"Failed to copy with sudo: {src} -> {dest}")
+    return False
 
 
 def remove(filepath: Path) -> bool:
@@ -382,24 +464,12 @@ def remove(filepath: Path) -> bool:
         logger.warning(
             f"Error removing path: {filepath}: {e}. Retrying with sudo...")
 
-        try:
-            result = run_command(["sudo", "rm", "-rf", filepath])
-            if result.returncode == 0:
-                logger.info(f"Removed successfully with sudo: {filepath}")
-                return True
-            else:
-                logger.error(
-                    f"Failed to remove with sudo: {filepath}: {result.stderr}")
-                return False
+        if privileged.remove(filepath):
+            logger.info(f"Removed successfully with sudo: {filepath}")
+            return True
 
-        except subprocess.CalledProcessError as e:
-            logger.error(
-                f"Command failed during sudo removal: {filepath}: {e}")
-            return False
-        except Exception as e:
-            logger.error(
-                f"Unexpected error during sudo removal: {filepath}: {e}")
-            return False
+        logger.error(f"Failed to remove with sudo: {filepath}")
+        return False
 
 
 def create_symlink(source: Path, target: Path) -> bool:
@@ -427,10 +497,76 @@ def create_symlink(source: Path, target: Path) -> bool:
 #                            |___/
 # # # # # # # # # # # # # # # # # # # # # # #
 
+class InstalledPackageIndex:
+    """
+    In-memory snapshot of the local package database.
+
+    The database is loaded once (straight from the pacman local db dir, or
+    with a single `pacman -Qq` when it can't be read) and then kept up to
+    date in place by install_package()/remove_package(), so membership
+    checks never fork.
+    """
+
+    def __init__(self, db_path: Path = PACMAN_LOCAL_DB_DIR):
+        self.db_path = db_path
+        self._packages: Optional[Set[str]] = None
+        self._lock = threading.Lock()
+
+    def _read_local_db(self) -> Optional[Set[str]]:
+        """Read package names from the local db, entries are `<name>-<ver>-<rel>`."""
+        try:
+            return {
+                entry.name.rsplit("-", 2)[0]
+                for entry in self.db_path.iterdir()
+                if entry.is_dir() and entry.name.count("-") >= 2
+            }
+        except OSError as e:
+            logger.debug(f"Unable to read local package db {self.db_path}: {e}")
+            return None
+
+    def _query_pacman(self) -> Set[str]:
+        result = run_command(["pacman", "-Qq"])
+        if result.returncode != 0:
+            logger.error(f"Failed to query installed packages: {result.stderr}")
+            return set()
+        return set(result.stdout.split())
+
+    def _snapshot(self) -> Set[str]:
+        if self._packages is None:
+            packages = self._read_local_db()
+            if packages is None:
+                packages = self._query_pacman()
+            logger.info(f"Loaded installed package index: {len(packages)} packages")
+            self._packages = packages
+        return self._packages
+
+    def refresh(self) -> None:
+        """Drop the snapshot, it is reloaded on the next lookup."""
+        with self._lock:
+            self._packages = None
+
+    def contains(self, package: str) -> bool:
+        with self._lock:
+            return package in self._snapshot()
+
+    def add(self, *packages: str) -> None:
+        with self._lock:
+            self._snapshot().update(packages)
+
+    def discard(self, *packages: str) -> None:
+        with self._lock:
+            self._snapshot().difference_update(packages)
+
+    def __contains__(self, package: str) -> bool:
+        return self.contains(package)
+
+
+installed_packages = InstalledPackageIndex()
+
+
 def is_installed(package: str) -> bool:
-    """Check if a package is installed using pacman."""
-    result = run_command(["pacman", "-Qq", package])
-    return result.returncode == 0
+    """Check if a package is installed using the installed package index."""
+    return package in installed_packages
 
 
 def install_package(package: str) -> bool:
@@ -444,9 +580,12 @@ def install_package(package: str) -> bool:
 
     try:
         result = run_command(
-            ["yay", "-S", package, "--noconfirm", "--quiet"]
+            ["yay", "-S", package, "--needed", "--noconfirm", "--quiet"]
         )
-        return result.returncode == 0
+        if result.returncode == 0:
+            installed_packages.add(package)
+            return True
+        return False
     except subprocess.CalledProcessError as e:
         logger.error(
             f"Failed to install package: {package}. Exit code: {e.returncode}")
@@ -456,15 +595,119 @@ def install_package(package: str) -> bool:
         return False
 
 
+def get_repo_packages(packages: List[str]) -> Set[str]:
+    """
+    Return the subset of packages available in the official (sync) repos,
+    resolved with a single bulk `pacman -Si` query.
+    """
+    if not packages:
+        return set()
+
+    # pacman exits non-zero when any name is missing (e.g. AUR packages),
+    # but still prints the info blocks for the ones it found.
+    result = run_command(["pacman", "-Si", *packages])
+    found: Set[str] = set()
+    for line in result.stdout.splitlines():
+        key, _, value = line.partition(":")
+        if key.strip() == "Name":
+            found.add(value.strip())
+    return found & set(packages)
+
+
+def get_unsatisfied(dependencies: List[str]) -> Set[str]:
+    """
+    Return the dependencies no installed package satisfies, by name or by
+    provides (`sh`, `libfoo.so`), resolved with a single `pacman -T` query.
+    """
+    if not dependencies:
+        return set()
+
+    # pacman -T exits 127 and prints the unsatisfied ones, 0 if there are none
+    result = run_command(["pacman", "-T", *dependencies])
+    if result.returncode not in (0, 127):
+        logger.warning(f"pacman -T failed, checking names only: {result.stderr.strip()}")
+        return {dep for dep in dependencies if dep not in installed_packages}
+    return set(result.stdout.split()) & set(dependencies)
+
+
+def get_repo_providers(dependencies: List[str]) -> Set[str]:
+    """
+    Return the subset of dependencies a sync repo package satisfies, by name
+    or by provides. `pacman -Sp` fails as a whole when any target can't be
+    resolved, so the list is bisected down to the unresolvable names.
+    """
+    if not dependencies:
+        return set()
+
+    def resolvable(names: List[str]) -> bool:
+        result = run_command(
+            ["pacman", "-Sp", "--nodeps", "--nodeps", "--print-format", "%n", *names])
+        return result.returncode == 0
+
+    # Names of repo packages are found with one query, only the rest is probed
+    by_name = get_repo_packages(dependencies)
+    rest = [dep for dep in dependencies if dep not in by_name]
+    unresolved = set(bisect_failures(rest, resolvable)) if rest else set()
+    return by_name | (set(rest) - unresolved)
+
+
+def _install_transaction(packages: List[str], as_deps: bool = False) -> bool:
+    """Install all given packages in a single yay transaction."""
+    cmd = ["yay", "-S", *packages, "--needed", "--noconfirm", "--quiet"]
+    if as_deps:
+        cmd.append("--asdeps")
+
+    try:
+        result = run_command(cmd)
+    except Exception as e:
+        logger.error(
+            f"Unexpected error installing packages: {', '.join(packages)}: {e}")
+        return False
+
+    if result.returncode != 0:
+        logger.warning(
+            f"Transaction failed for: {', '.join(packages)}: {result.stderr.strip()}")
+        return False
+
+    installed_packages.add(*packages)
+    return True
+
+
+def bisect_failures(items: List[str], attempt: Callable[[List[str]], bool]) -> List[str]:
+    """
+    Run `attempt` on all items at once. If it fails, split the items in halves
+    and retry each half until the broken items are isolated. Returns them.
+    """
+    if attempt(items):
+        return []
+    if len(items) == 1:
+        return list(items)
+
+    middle = len(items) // 2
+    return bisect_failures(items[:middle], attempt) + bisect_failures(items[middle:], attempt)
+
+
+def install_packages(packages: List[str], as_deps: bool = False) -> List[str]:
+    """
+    Install packages in one transaction. If it fails, bisect the list to find
+    the exact packages that broke it. Returns the list of failed packages.
+    """
+    pending = [pkg for pkg in dict.fromkeys(packages) if not is_installed(pkg)]
+    if not pending:
+        return []
+
+    logger.info(f"Installing packages: {', '.join(pending)}")
+    failed = bisect_failures(
+        pending, lambda pkgs: _install_transaction(pkgs, as_deps=as_deps))
+    if failed:
+        logger.info(f"Bisected failed transaction down to: {', '.join(failed)}")
+    return failed
+
+
 def install_package_group(group: List[str], group_name: str) -> bool:
-    """Install a list of packages. Continues through failures, returns False if any fail."""
+    """Install a list of packages in one transaction, returns False if any fail."""
     logger.info(f"Installing package group: {group_name}")
-    failed = []
-
-    for package in group:
-        if not install_package(package):
-            logger.error(f"Failed to install package: {package}")
-            failed.append(package)
+    failed = install_packages(group)
 
     if failed:
         logger.error(
@@ -488,7 +731,10 @@ def remove_package(package: str) -> bool:
         result = run_command(
             ["yay", "-R", package, "--noconfirm", "--quiet"]
         )
-        return result.returncode == 0
+        if result.returncode == 0:
+            installed_packages.discard(package)
+            return True
+        return False
     except subprocess.CalledProcessError as e:
         logger.error(
             f"Failed to uninstall package: {package}. Exit code: {e.returncode}")
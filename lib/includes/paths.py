@@ -6,6 +6,32 @@ HOME = Path.home()
 USER_CONFIGS_DIR = HOME / ".config"
 USER_DOTFILES_DIR = HOME / "Dotfiles"
 USER_WALLPAPERS_DIR = HOME / "Wallpapers"
+WAYPAPER_CONFIG = USER_CONFIGS_DIR / "waypaper/config.ini"
+HYPR_MONITOR_CONF = USER_CONFIGS_DIR / "hypr/configs/monitor.conf"
+USER_THEMES_DIR = HOME / ".local/share/themes"
+
+# SBDots cache dirs
+SBDOTS_CACHE_DIR = HOME / ".cache/sbdots"
+AUR_BUILD_DIR = SBDOTS_CACHE_DIR / "aur"
+DOTFILES_MANIFEST = SBDOTS_CACHE_DIR / "dotfiles_manifest.json"
+WALLPAPERS_MIRROR_DIR = SBDOTS_CACHE_DIR / "wallpapers.git"
+WALLPAPERS_INDEX = SBDOTS_CACHE_DIR / "wallpapers_index.json"
+WALLPAPER_CATALOG = SBDOTS_CACHE_DIR / "wallpaper_catalog.json"
+WALLPAPER_THUMBNAILS_DIR = SBDOTS_CACHE_DIR / "thumbnails"
+WALLPAPER_VARIANTS_DIR = SBDOTS_CACHE_DIR / "wallpaper_variants"
+WALLPAPER_COLORS_DIR = SBDOTS_CACHE_DIR / "wallpaper_colors"
+THEMES_CACHE_DIR = SBDOTS_CACHE_DIR / "themes"
+PALETTE_CACHE = SBDOTS_CACHE_DIR / "palette.json"
+
+# Generated theme files read by the dotfiles
+PYWAL_CACHE_DIR = HOME / ".cache/wal"
+BLURRED_WALLPAPER = HOME / ".cache/wallpaper/blurred_wallpaper.jpg"
+HYPR_COLORS_CONF = USER_CONFIGS_DIR / "hypr/configs/colors.conf"
+ROFI_COLORS = USER_CONFIGS_DIR / "rofi/colors.rasi"
+KITTY_COLORS_CONF = USER_CONFIGS_DIR / "kitty/colors.conf"
+WAYBAR_COLORS = USER_CONFIGS_DIR / "waybar/colors.css"
+SWAYNC_COLORS = USER_CONFIGS_DIR / "swaync/colors.css"
+GTK4_CSS = USER_CONFIGS_DIR / "gtk-4.0/gtk.css"
 
 # SBDots data dirs/files
 SBDOTS_SHARE_DIR = Path("/usr/share/sbdots")
@@ -16,6 +42,7 @@ SBDOTS_METADATA_FILE = SBDOTS_SHARE_DIR / "metadata.json"
 
 # System dirs
 CUSTOM_UDEV_RULES_DIR = Path("/etc/udev/rules.d")
+PACMAN_LOCAL_DB_DIR = Path("/var/lib/pacman/local")
 
 # SBDots packages(dependencies) list files
 HYPRLAND_PKGS = SBDOTS_SHARE_DIR / "packages/hyprland.json"
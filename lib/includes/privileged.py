@@ -0,0 +1,273 @@
+#  ____       _       _ _                     _
+# |  _ \ _ __(_)_   _(_) | ___  __ _  ___  __| |
+# | |_) | '__| \ \ / / | |/ _ \/ _` |/ _ \/ _` |
+# |  __/| |  | |\ V /| | |  __/ (_| |  __/ (_| |
+# |_|   |_|  |_| \_/ |_|_|\___|\__, |\___|\__,_|
+#                              |___/
+# # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
+# Long-lived root helper for batched file operations
+# # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
+#
+# The client side starts this file once per run with
+#   sudo python3 privileged.py --allow <dir> [--allow <dir> ...] [--read <dir> ...]
+# and sends batches of operations as JSON lines over stdin. Every batch is
+# answered with one JSON line holding a result per operation.
+#
+# This module only uses the standard library and no package-relative
+# imports, so it can run as a script and be imported by setup/setup.py
+# before SBDots is installed.
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+import argparse
+import atexit
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+
+logger = logging.getLogger()
+
+Operation = Dict[str, Any]
+Result = Dict[str, Any]
+
+
+#  ____
+# / ___|  ___ _ ____   _____ _ __
+# \___ \ / _ \ '__\ \ / / _ \ '__|
+#  ___) |  __/ |   \ V /  __/ |
+# |____/ \___|_|    \_/ \___|_|
+#
+# # # # # # # # # # # # # # # # # #
+
+def _is_allowed(path: str, allowed: Sequence[str], destructive: bool = False) -> bool:
+    """
+    Check the resolved path is inside an allowed dir. Destructive operations
+    may never target an allowed dir itself.
+    """
+    real = os.path.realpath(path)
+    return any(
+        os.path.commonpath([real, root]) == root and not (destructive and real == root)
+        for root in allowed
+    )
+
+
+def _atomic_write(path: str, content: str, mode: Optional[int]) -> None:
+    dirname = os.path.dirname(path)
+    os.makedirs(dirname, exist_ok=True)
+    fd, temp_file = tempfile.mkstemp(dir=dirname, prefix=".sbdots-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temp_file, mode if mode is not None else 0o644)
+        os.replace(temp_file, path)
+    except BaseException:
+        if os.path.exists(temp_file):
+            os.unlink(temp_file)
+        raise
+
+
+def _remove(path: str) -> None:
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.unlink(path)
+
+
+def execute(op: Operation, allowed: Sequence[str], readable: Sequence[str] = ()) -> Result:
+    """
+    Execute one operation, never raises. Operations may modify paths in the
+    allowed dirs, copies may only read from the readable dirs.
+    """
+    name = op.get("op")
+    try:
+        if name == "copy":
+            src, dest = op["src"], op["dest"]
+            if not _is_allowed(src, readable):
+                return {"ok": False, "error": f"Source not allowed: {src}"}
+            if not _is_allowed(dest, allowed, destructive=bool(op.get("replace"))):
+                return {"ok": False, "error": f"Destination not allowed: {dest}"}
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            if op.get("replace"):
+                _remove(dest)
+            if os.path.isdir(src) and not os.path.islink(src):
+                shutil.copytree(src, dest, symlinks=True, dirs_exist_ok=True)
+            elif os.path.isdir(dest):
+                shutil.copy2(src, os.path.join(dest, os.path.basename(src)))
+            else:
+                shutil.copy2(src, dest, follow_symlinks=False)
+            return {"ok": True}
+
+        path = op["path"]
+        if not _is_allowed(path, allowed, destructive=name in ("remove", "write")):
+            return {"ok": False, "error": f"Path not allowed: {path}"}
+
+        if name == "mkdir":
+            os.makedirs(path, exist_ok=True)
+            if "mode" in op:
+                os.chmod(path, op["mode"])
+        elif name == "remove":
+            _remove(path)
+        elif name == "chmod":
+            os.chmod(path, op["mode"])
+        elif name == "write":
+            _atomic_write(path, op["content"], op.get("mode"))
+        else:
+            return {"ok": False, "error": f"Unknown operation: {name}"}
+        return {"ok": True}
+
+    except KeyError as e:
+        return {"ok": False, "error": f"Missing field {e} for operation {name}"}
+    except Exception as e:
+        return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+
+def serve(allowed: Sequence[str], readable: Sequence[str] = ()) -> None:
+    """Answer batches of operations read from stdin until EOF."""
+    allowed = [os.path.realpath(a) for a in allowed]
+    readable = [os.path.realpath(r) for r in readable]
+    for line in sys.stdin:
+        try:
+            ops: List[Operation] = json.loads(line)["ops"]
+            results = [execute(op, allowed, readable) for op in ops]
+        except (ValueError, KeyError, TypeError) as e:
+            results = [{"ok": False, "error": f"Malformed request: {e}"}]
+        sys.stdout.write(json.dumps({"results": results}) + "\n")
+        sys.stdout.flush()
+
+
+#   ____ _ _            _
+#  / ___| (_) ___ _ __ | |_
+# | |   | | |/ _ \ '_ \| __|
+# | |___| | |  __/ | | | |_
+#  \____|_|_|\___|_| |_|\__|
+#
+# # # # # # # # # # # # # # # #
+
+class PrivilegedHelper:
+    """
+    Client for the root helper. The helper process is started with sudo on
+    first use and reused for every following operation until close().
+
+    The helper may modify paths in allowed_dirs and copy from readable_dirs.
+    """
+
+    def __init__(self, allowed_dirs: Sequence[Union[str, Path]],
+                 readable_dirs: Sequence[Union[str, Path]] = ()):
+        self.allowed_dirs = [str(d) for d in allowed_dirs]
+        self.readable_dirs = [str(d) for d in readable_dirs]
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def _start(self) -> subprocess.Popen:
+        if self._process is not None and self._process.poll() is None:
+            return self._process
+
+        cmd = ["sudo", sys.executable, os.path.abspath(__file__)]
+        for d in self.allowed_dirs:
+            cmd += ["--allow", d]
+        for d in self.readable_dirs:
+            cmd += ["--read", d]
+
+        logger.info("Starting privileged helper...")
+        self._process = subprocess.Popen(
+            cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1)
+        atexit.register(self.close)
+        return self._process
+
+    def run(self, ops: List[Operation]) -> List[Result]:
+        """Execute a batch of operations as root, returns one result per operation."""
+        if not ops:
+            return []
+
+        with self._lock:
+            try:
+                process = self._start()
+                process.stdin.write(json.dumps({"ops": ops}) + "\n")
+                process.stdin.flush()
+                line = process.stdout.readline()
+                if not line:
+                    raise RuntimeError("privileged helper exited unexpectedly")
+                results: List[Result] = json.loads(line)["results"]
+            except (OSError, ValueError, KeyError, RuntimeError) as e:
+                logger.error(f"Privileged helper failed: {e}")
+                # Its state is unknown, don't leave a root process behind
+                self._stop(graceful=False)
+                return [{"ok": False, "error": str(e)} for _ in ops]
+
+        for op, result in zip(ops, results):
+            if not result.get("ok"):
+                logger.error(f"Privileged {op.get('op')} failed: {result.get('error')}")
+        return results
+
+    def _run_one(self, op: Operation) -> bool:
+        return bool(self.run([op])[0].get("ok"))
+
+    def mkdir(self, path: Union[str, Path], mode: Optional[int] = None) -> bool:
+        op: Operation = {"op": "mkdir", "path": str(path)}
+        if mode is not None:
+            op["mode"] = mode
+        return self._run_one(op)
+
+    def copy(self, src: Union[str, Path], dest: Union[str, Path], replace: bool = False) -> bool:
+        return self._run_one({"op": "copy", "src": str(src), "dest": str(dest), "replace": replace})
+
+    def remove(self, path: Union[str, Path]) -> bool:
+        return self._run_one({"op": "remove", "path": str(path)})
+
+    def chmod(self, path: Union[str, Path], mode: int) -> bool:
+        return self._run_one({"op": "chmod", "path": str(path), "mode": mode})
+
+    def write(self, path: Union[str, Path], content: str, mode: Optional[int] = None) -> bool:
+        op: Operation = {"op": "write", "path": str(path), "content": content}
+        if mode is not None:
+            op["mode"] = mode
+        return self._run_one(op)
+
+    def _stop(self, graceful: bool) -> None:
+        """Stop the helper process and reap it, caller holds the lock."""
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()  # The helper exits on EOF
+        except OSError:
+            pass
+        if not graceful:
+            process.terminate()  # sudo relays it to the helper
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    def close(self) -> None:
+        """Stop the helper process."""
+        with self._lock:
+            self._stop(graceful=True)
+        atexit.unregister(self.close)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SBDots privileged file helper")
+    parser.add_argument("--allow", action="append", default=[],
+                        help="Directory the helper may modify (repeatable)")
+    parser.add_argument("--read", action="append", default=[],
+                        help="Directory the helper may copy from (repeatable)")
+    args = parser.parse_args()
+
+    if os.geteuid() != 0:
+        sys.exit("privileged helper must run as root")
+    if not args.allow:
+        sys.exit("privileged helper needs at least one --allow directory")
+    serve(args.allow, args.read)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#  ____             __ _ _
+# |  _ \ _ __ ___  / _(_) | ___ _ __
+# | |_) | '__/ _ \| |_| | |/ _ \ '__|
+# |  __/| | | (_) |  _| | |  __/ |
+# |_|   |_|  \___/|_| |_|_|\___|_|
+#
+# # # # # # # # # # # # # # # # # # # # # # # # #
+# Span based timing profile for `sbdots --profile`
+# # # # # # # # # # # # # # # # # # # # # # # # #
+
+from dataclasses import dataclass, field
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import json
+import resource
+import threading
+import time
+
+from .logger import logger
+from .paths import SBDOTS_CACHE_DIR
+
+# Span kinds
+COMPONENT = "component"
+STEP = "step"
+SUBPROCESS = "subprocess"
+DELAY = "delay"
+
+
+@dataclass
+class Span:
+    name: str
+    kind: str
+    start: float = 0.0
+    end: Optional[float] = None
+    cpu: float = 0.0
+    exit_code: Optional[int] = None
+    thread: str = ""
+    children: List["Span"] = field(default_factory=list)
+
+    @property
+    def wall(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def walk(self) -> Iterator["Span"]:
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "start": round(self.start - origin, 6),
+            "wall": round(self.wall, 6),
+            "cpu": round(self.cpu, 6),
+            "exit_code": self.exit_code,
+            "thread": self.thread,
+            "children": [child.to_dict(origin) for child in self.children],
+        }
+
+
+class Profiler:
+    """
+    Records a tree of spans: component -> step -> subprocess.
+
+    Disabled by default, every method is then a cheap no-op. Each thread has
+    its own span stack; work handed to another thread should go through
+    wrap() so its spans are attached to the span that submitted it.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.root = Span("sbdots", COMPONENT)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        self.enabled = True
+        self.root = Span("sbdots", COMPONENT, start=time.perf_counter(),
+                         thread=threading.current_thread().name)
+
+    def _stack(self) -> List[Span]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def current(self) -> Span:
+        stack = self._stack()
+        return stack[-1] if stack else self.root
+
+    def _open(self, name: str, kind: str) -> Span:
+        span = Span(name, kind, start=time.perf_counter(),
+                    thread=threading.current_thread().name)
+        parent = self.current()
+        with self._lock:
+            parent.children.append(span)
+        return span
+
+    @contextmanager
+    def span(self, name: str, kind: str = STEP) -> Iterator[Optional[Span]]:
+        """Time the enclosed block as a child of the current span."""
+        if not self.enabled:
+            yield None
+            return
+
+        span = self._open(name, kind)
+        cpu_start = time.thread_time()
+        self._stack().append(span)
+        try:
+            yield span
+        finally:
+            self._stack().pop()
+            span.end = time.perf_counter()
+            span.cpu = time.thread_time() - cpu_start + sum(
+                child.cpu for child in span.children if child.kind == SUBPROCESS)
+
+    @contextmanager
+    def subprocess(self, command: List[str]) -> Iterator[Optional[Span]]:
+        """
+        Time a child process. CPU time is the RUSAGE_CHILDREN delta, which also
+        counts other children reaped meanwhile when running concurrently.
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        span = self._open(" ".join(command), SUBPROCESS)
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        try:
+            yield span
+        finally:
+            span.end = time.perf_counter()
+            after = resource.getrusage(resource.RUSAGE_CHILDREN)
+            span.cpu = (after.ru_utime - usage.ru_utime) + (after.ru_stime - usage.ru_stime)
+
+    def wrap(self, func: Callable) -> Callable:
+        """Bind func to the current span so it can run on another thread."""
+        if not self.enabled:
+            return func
+        parent = self.current()
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            stack = self._stack()
+            stack.append(parent)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stack.pop()
+        return wrapper
+
+    def ux_delay(self, seconds: float) -> None:
+        """Sleep for better UX, recorded separately from real work."""
+        with self.span(f"sleep({seconds:g})", DELAY):
+            time.sleep(seconds)
+
+    def delay_total(self) -> float:
+        return sum(s.wall for s in self.root.walk() if s.kind == DELAY)
+
+    def slowest(self, limit: int = 15) -> List[Span]:
+        spans = [s for s in self.root.walk() if s is not self.root and s.kind != DELAY]
+        return sorted(spans, key=lambda s: s.wall, reverse=True)[:limit]
+
+    def write_timeline(self, path: Optional[Path] = None) -> Optional[Path]:
+        """Write the span tree as JSON, returns the file path."""
+        if not self.enabled:
+            return None
+
+        self.root.end = time.perf_counter()
+        if path is None:
+            path = SBDOTS_CACHE_DIR / f"profile-{time.strftime('%Y%m%d-%H%M%S')}.json"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "w") as f:
+                json.dump({
+                    "total_wall": round(self.root.wall, 6),
+                    "ux_delay": round(self.delay_total(), 6),
+                    "timeline": self.root.to_dict(self.root.start),
+                }, f, indent=2)
+            logger.info(f"Profile timeline written to {path}")
+            return path
+        except OSError as e:
+            logger.error(f"Failed to write profile timeline {path}: {e}")
+            return None
+
+
+profiler = Profiler()
+
+
+def profiled(name: str, kind: str = STEP) -> Callable:
+    """Decorator recording each call of the function as a span."""
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with profiler.span(name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def ux_delay(seconds: float) -> None:
+    """Sleep for better UX, shows up as artificial delay in the profile."""
+    profiler.ux_delay(seconds)
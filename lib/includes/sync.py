@@ -0,0 +1,254 @@
+#  ____
+# / ___| _   _ _ __   ___
+# \___ \| | | | '_ \ / __|
+#  ___) | |_| | | | | (__
+# |____/ \__, |_| |_|\___|
+#        |___/
+# # # # # # # # # # # # # # # # # # # # # # # # # # # # #
+# Incremental, manifest based directory tree sync
+# # # # # # # # # # # # # # # # # # # # # # # # # # # # #
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import os
+import shutil
+
+from .logger import logger
+from .library import copy_file
+
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class SyncResult:
+    copied: int = 0
+    updated: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    linked: int = 0
+    failed: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.failed == 0
+
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _lstat(path: Path) -> Optional[os.stat_result]:
+    try:
+        return os.lstat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+class TreeSync:
+    """
+    Mirrors a source tree into a destination tree, touching only what changed.
+
+    A manifest stores, per relative path, the source size, mtime and content
+    hash plus the size and mtime of the copy made in dest. Files whose source
+    and dest stats still match the manifest are skipped without reading them,
+    files whose content hash is unchanged only get their metadata refreshed,
+    and only new or modified files are copied. Paths that disappeared from
+    the source are deleted from dest; files in dest that were never synced
+    are left alone.
+    """
+
+    def __init__(self, src: Path, dest: Path, manifest_path: Path):
+        self.src = src
+        self.dest = dest
+        self.manifest_path = manifest_path
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.manifest_path, "r") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION and data.get("src") == str(self.src) \
+                    and data.get("dest") == str(self.dest):
+                return data
+            logger.info(f"Sync manifest {self.manifest_path} is stale, ignoring it.")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Unable to read sync manifest {self.manifest_path}: {e}")
+        return {}
+
+    def _save_manifest(self, files: Dict[str, Any], links: Dict[str, str], dirs: list) -> None:
+        data = {
+            "version": MANIFEST_VERSION,
+            "src": str(self.src),
+            "dest": str(self.dest),
+            "files": files,
+            "links": links,
+            "dirs": dirs,
+        }
+        try:
+            self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self.manifest_path.with_suffix(".tmp")
+            with open(temp_file, "w") as f:
+                json.dump(data, f)
+            os.replace(temp_file, self.manifest_path)
+        except OSError as e:
+            logger.error(f"Failed to write sync manifest {self.manifest_path}: {e}")
+
+    def _is_synced_path(self, rel: str) -> bool:
+        """
+        False when a parent of rel in dest is no longer a real directory, e.g.
+        it became a file or a symlink, whatever is below it isn't ours.
+        """
+        parent = os.path.dirname(rel)
+        expected = os.path.normpath(os.path.join(os.path.realpath(self.dest), parent))
+        return os.path.realpath(self.dest / parent) == expected
+
+    def _clear(self, path: Path) -> None:
+        """Remove whatever is at path so something of another type can take its place."""
+        if path.is_dir() and not path.is_symlink():
+            shutil.rmtree(path)
+        else:
+            path.unlink()
+
+    def _copy_file(self, src: Path, dest: Path) -> None:
+        if _lstat(dest) is not None and (os.path.islink(dest) or not os.path.isfile(dest)):
+            self._clear(dest)
+        copy_file(src, dest)
+
+    def _sync_file(self, rel: str, old: Optional[Dict[str, Any]], result: SyncResult) -> Dict[str, Any]:
+        src_path = self.src / rel
+        dest_path = self.dest / rel
+        src_st = os.lstat(src_path)
+        dest_st = _lstat(dest_path)
+
+        src_same = old is not None and old["size"] == src_st.st_size \
+            and old["mtime_ns"] == src_st.st_mtime_ns
+        dest_same = old is not None and dest_st is not None \
+            and old["dest_size"] == dest_st.st_size and old["dest_mtime_ns"] == dest_st.st_mtime_ns
+
+        # Fast path: nothing changed on either side, no need to read anything
+        if src_same and dest_same:
+            result.unchanged += 1
+            return old
+
+        digest = old["hash"] if src_same else file_hash(src_path)
+
+        content_same = False
+        if dest_st is not None and not os.path.islink(dest_path) and os.path.isfile(dest_path) \
+                and dest_st.st_size == src_st.st_size:
+            if dest_same and old["hash"] == digest:
+                content_same = True
+            else:
+                content_same = file_hash(dest_path) == digest
+
+        # Content is the same, only the metadata moved
+        if content_same:
+            shutil.copystat(src_path, dest_path)
+            result.updated += 1
+        else:
+            self._copy_file(src_path, dest_path)
+            result.copied += 1
+
+        dest_st = os.lstat(dest_path)
+        return {
+            "size": src_st.st_size,
+            "mtime_ns": src_st.st_mtime_ns,
+            "hash": digest,
+            "dest_size": dest_st.st_size,
+            "dest_mtime_ns": dest_st.st_mtime_ns,
+        }
+
+    def _sync_link(self, rel: str, result: SyncResult) -> str:
+        target = os.readlink(self.src / rel)
+        dest_path = self.dest / rel
+        if os.path.islink(dest_path) and os.readlink(dest_path) == target:
+            result.unchanged += 1
+            return target
+
+        if _lstat(dest_path) is not None:
+            self._clear(dest_path)
+        os.symlink(target, dest_path)
+        result.linked += 1
+        return target
+
+    def run(self) -> SyncResult:
+        result = SyncResult()
+        manifest = self._load_manifest()
+        old_files: Dict[str, Any] = manifest.get("files", {})
+        old_links: Dict[str, str] = manifest.get("links", {})
+        old_dirs: list = manifest.get("dirs", [])
+
+        files: Dict[str, Any] = {}
+        links: Dict[str, str] = {}
+        dirs: list = []
+
+        self.dest.mkdir(parents=True, exist_ok=True)
+
+        for dirpath, dirnames, filenames in os.walk(self.src):
+            rel_dir = os.path.relpath(dirpath, self.src)
+            dirnames.sort()
+
+            # Symlinked dirs are not descended into, they are synced as links
+            entries = sorted(filenames) + [d for d in dirnames if os.path.islink(os.path.join(dirpath, d))]
+            dirnames[:] = [d for d in dirnames if not os.path.islink(os.path.join(dirpath, d))]
+
+            for name in dirnames:
+                rel = os.path.normpath(os.path.join(rel_dir, name))
+                dest_dir = self.dest / rel
+                if os.path.islink(dest_dir) or (dest_dir.exists() and not dest_dir.is_dir()):
+                    self._clear(dest_dir)
+                dest_dir.mkdir(exist_ok=True)
+                dirs.append(rel)
+
+            for name in entries:
+                rel = os.path.normpath(os.path.join(rel_dir, name))
+                try:
+                    if os.path.islink(self.src / rel):
+                        links[rel] = self._sync_link(rel, result)
+                    else:
+                        files[rel] = self._sync_file(rel, old_files.get(rel), result)
+                except OSError as e:
+                    logger.error(f"Failed to sync {self.src / rel} -> {self.dest / rel}: {e}")
+                    result.failed += 1
+
+        # Delete what was synced before but no longer exists in the source
+        for rel in set(old_files) | set(old_links):
+            if rel in files or rel in links:
+                continue
+            path = self.dest / rel
+            if not self._is_synced_path(rel):
+                continue  # Went away with its parent
+            try:
+                if _lstat(path) is not None and not (path.is_dir() and not path.is_symlink()):
+                    path.unlink()
+                    result.deleted += 1
+            except OSError as e:
+                logger.error(f"Failed to delete {path}: {e}")
+                result.failed += 1
+
+        for rel in sorted(set(old_dirs) - set(dirs), reverse=True):
+            if not self._is_synced_path(rel):
+                continue
+            try:
+                (self.dest / rel).rmdir()
+            except OSError:
+                pass  # Not empty (user files) or already gone
+
+        self._save_manifest(files, links, dirs)
+        logger.info(
+            f"Synced {self.src} -> {self.dest}: {result.copied} copied, "
+            f"{result.updated} metadata updated, {result.linked} linked, "
+            f"{result.deleted} deleted, {result.unchanged} unchanged, {result.failed} failed")
+        return result
+
+
+def sync_tree(src: Path, dest: Path, manifest_path: Path) -> SyncResult:
+    """Incrementally sync src into dest using the manifest at manifest_path."""
+    return TreeSync(src, dest, manifest_path).run()
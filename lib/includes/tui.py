@@ -1,6 +1,4 @@
-import subprocess
 import threading
-import time
 from typing import Optional, Callable
 from rich.text import Text as RichText
 from rich.live import Live as RichLive
@@ -8,12 +6,14 @@ from rich.spinner import Spinner as RichSpinner
 from rich.style import Style as RichStyle
 from rich.console import Console
 from rich.prompt import Prompt
+from rich.table import Table as RichTable
 
 from functools import partial
 from pyfiglet import figlet_format
 from typing import List
 
 from .logger import logger
+from .credentials import sudo_credentials, Subscription, EXPIRING, EXPIRED
 
 # Colors
 HEADER_COLOR: str = "#89b4fa"
@@ -28,6 +28,10 @@ WARNING_ICON: str = "⚠"
 ERROR_ICON: str = "✖"
 INFO_ICON: str = ">"
 
+# Only one rich live display can be active at a time, spinners started
+# while another one is live fall back to printing their final message
+_LIVE_LOCK = threading.Lock()
+
 # Styles
 HEADING_STYLE = RichStyle(color=HEADER_COLOR, bold=True)
 _STYLE: partial = partial(RichStyle, bold=True, italic=True)
@@ -41,13 +45,13 @@ WARNING_STYLE = _STYLE(color=WARNING_COLOR)
 class Spinner:
     """Context manager for showing a live console spinner using `rich`.
 
-    Enhanced with optional sudo timeout handling and integration with SudoKeepAlive.
+    Enhanced with optional sudo timeout handling, sudo state comes from the
+    shared credential service instead of polling sudo.
 
     Args:
         message: Initial spinner message
-        sudo_keepalive: Optional SudoKeepAlive instance to monitor
+        sudo_keepalive: Optional SudoKeepAlive instance, enables sudo monitoring
         monitor_sudo: Whether to monitor sudo status (default: False)
-        check_sudo_fallback: Whether to fallback to sudo checking if keepalive fails
         on_sudo_expired: Callback function when sudo expires (optional)
     """
 
@@ -56,13 +60,11 @@ class Spinner:
         message: str,
         sudo_keepalive=None,
         monitor_sudo: bool = False,
-        check_sudo_fallback: bool = True,
         on_sudo_expired: Optional[Callable] = None
     ):
         self.message = message
         self.sudo_keepalive = sudo_keepalive
         self.monitor_sudo = monitor_sudo or (sudo_keepalive is not None)
-        self.check_sudo_fallback = check_sudo_fallback
         self.on_sudo_expired = on_sudo_expired
 
         self.spinner_style = "arc"
@@ -71,43 +73,24 @@ class Spinner:
         )
         self.live = RichLive(self.spinner, refresh_per_second=10)
 
-        self._stop_event = threading.Event()
+        self._subscription: Optional[Subscription] = None
         self._sudo_checker_thread = None
-        self._sudo_expired = False
+        self._owns_live = False
 
     def _styled_text(self, text: str) -> RichText:
         return RichText(text, style=TEXT_STYLE)
 
-    def _check_sudo_status(self):
-        """Background thread to monitor sudo status as fallback"""
-        check_interval = 60  # Check every minute
-
-        while not self._stop_event.is_set():
-            time.sleep(check_interval)
-
-            # If we have a keepalive, check if it's still running
-            if self.sudo_keepalive and self.sudo_keepalive.is_running:
-                continue
-
-            # Fallback: check sudo status directly
-            try:
-                result = subprocess.run(
-                    ['sudo', '-n', 'true'],
-                    capture_output=True,
-                    text=True,
-                    timeout=5
-                )
-
-                if result.returncode != 0 and not self._sudo_expired:
-                    self._sudo_expired = True
-                    self._handle_sudo_expired()
-
-            except (subprocess.TimeoutExpired, subprocess.CalledProcessError):
-                if not self._sudo_expired:
-                    self._sudo_expired = True
-                    self._handle_sudo_expired()
-            except:
-                pass
+    def _watch_sudo_status(self, subscription: Subscription):
+        """Background thread reacting to sudo credential state changes"""
+        while True:
+            state = sudo_credentials.wait(subscription)
+            if state is None:
+                return  # Unsubscribed
+
+            if state == EXPIRING:
+                logger.warning("Sudo credentials could not be refreshed, they may expire soon.")
+            elif state == EXPIRED:
+                self._handle_sudo_expired()
 
     def _handle_sudo_expired(self):
         """Handle sudo expiration"""
@@ -116,7 +99,8 @@ class Spinner:
             return
 
         # Default handler
-        self.live.stop()
+        if self._owns_live:
+            self.live.stop()
         console = Console()
         console.print(
             RichText("\nSudo authorization expired!", style=WARNING_STYLE))
@@ -124,28 +108,31 @@ class Spinner:
             RichText("Please enter your password when prompted:", style=TEXT_STYLE))
 
         try:
-            subprocess.run(['sudo', '-v'], check=True, timeout=30)
-            self._sudo_expired = False
-            console.print(
-                RichText("Sudo re-authenticated successfully!", style=SUCCES_STYLE))
-        except (subprocess.TimeoutExpired, subprocess.CalledProcessError):
-            console.print(
-                RichText("Failed to re-authenticate sudo", style=ERROR_STYLE))
+            # Shared with other spinners, only one of them prompts
+            if sudo_credentials.authenticate():
+                console.print(
+                    RichText("Sudo re-authenticated successfully!", style=SUCCES_STYLE))
+            else:
+                console.print(
+                    RichText("Failed to re-authenticate sudo", style=ERROR_STYLE))
         finally:
-            self.live.start()
+            if self._owns_live:
+                self.live.start()
 
     def _start_sudo_monitor(self):
         """Start sudo monitoring if enabled"""
         if self.monitor_sudo and not self._sudo_checker_thread:
-            self._stop_event.clear()
+            self._subscription = sudo_credentials.subscribe()
             self._sudo_checker_thread = threading.Thread(
-                target=self._check_sudo_status, daemon=True
+                target=self._watch_sudo_status, args=(self._subscription,), daemon=True
             )
             self._sudo_checker_thread.start()
 
     def _stop_sudo_monitor(self):
         """Stop sudo monitoring"""
-        self._stop_event.set()
+        if self._subscription:
+            sudo_credentials.unsubscribe(self._subscription)
+            self._subscription = None
         if self._sudo_checker_thread:
             self._sudo_checker_thread.join(timeout=1)
             self._sudo_checker_thread = None
@@ -156,29 +143,34 @@ class Spinner:
             logger.info(new_message)
         self.spinner.update(text=self._styled_text(new_message))
 
+    def _show(self, text: RichText) -> None:
+        if self._owns_live:
+            self.live.update(text)
+        else:
+            Console().print(text)
+
     def success(self, message: str, log: bool = False) -> None:
         """Show success message and stop spinner"""
         if log:
             logger.info(message)
-        self.live.update(RichText(DONE_ICON + " " +
-                         message, style=SUCCES_STYLE))
+        self._show(RichText(DONE_ICON + " " + message, style=SUCCES_STYLE))
 
     def error(self, message: str, log: bool = False) -> None:
         """Show error message and stop spinner"""
         if log:
             logger.error(message)
-        self.live.update(RichText(ERROR_ICON + " " +
-                         message, style=ERROR_STYLE))
+        self._show(RichText(ERROR_ICON + " " + message, style=ERROR_STYLE))
 
     def warning(self, message: str, log: bool = False) -> None:
         """Show warning message and stop spinner"""
         if log:
             logger.warning(message)
-        self.live.update(RichText(WARNING_ICON + " " +
-                         message, style=WARNING_STYLE))
+        self._show(RichText(WARNING_ICON + " " + message, style=WARNING_STYLE))
 
     def __enter__(self):
-        self.live.start()
+        self._owns_live = _LIVE_LOCK.acquire(blocking=False)
+        if self._owns_live:
+            self.live.start()
         if self.monitor_sudo:
             self._start_sudo_monitor()
         return self
@@ -186,7 +178,10 @@ class Spinner:
     def __exit__(self, exc_type, exc_val, exc_tb):
         if self.monitor_sudo:
             self._stop_sudo_monitor()
-        self.live.stop()
+        if self._owns_live:
+            self.live.stop()
+            _LIVE_LOCK.release()
+            self._owns_live = False
 
 
 # Functions for printing messages with styles
@@ -227,6 +222,17 @@ def print_warning(text: str) -> None:
     console.print(WARNING_ICON + " " + text, style=WARNING_STYLE)
 
 
+def print_table(title: str, columns: List[str], rows: List[List[str]]) -> None:
+    """Print rows as a table, the first column left aligned and the rest right aligned."""
+    console = Console()
+    table = RichTable(title=title, title_style=HEADING_STYLE, header_style=HEADING_STYLE)
+    for i, column in enumerate(columns):
+        table.add_column(column, justify="left" if i == 0 else "right", style=PRIMARY_COLOR)
+    for row in rows:
+        table.add_row(*row)
+    console.print(table)
+
+
 def chose(message: str, options: List[str]) -> str:
     """Display a message and present a list of options for the user to choose any one from."""
     console = Console()
@@ -0,0 +1,176 @@
+#  ___                            _
+# |_ _|_ __ ___  _ __   ___  _ __| |_
+#  | || '_ ` _ \| '_ \ / _ \| '__| __|
+#  | || | | | | | |_) | (_) | |  | |_
+# |___|_| |_| |_| .__/ \___/|_|   \__|
+#               |_|
+# # # # # # # # # # # # # # # # # # # # # # # # # # # # #
+# Content-hash deduplicating wallpaper import
+# # # # # # # # # # # # # # # # # # # # # # # # # # # # #
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import os
+import threading
+
+from .logger import logger
+from .library import copy_file
+from .paths import WALLPAPERS_INDEX
+from .sync import file_hash
+
+INDEX_VERSION = 1
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".webp")
+
+
+@dataclass
+class ImportResult:
+    copied: int = 0
+    duplicates: int = 0
+    failed: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.failed == 0
+
+
+def _stat_key(st: os.stat_result) -> Dict[str, int]:
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+class WallpaperImporter:
+    """
+    Imports images into the wallpapers dir, skipping any whose content is
+    already there under any name.
+
+    The index maps every known file (wallpapers in dest and import sources)
+    to its size, mtime and content hash, so only new or modified files are
+    hashed again. Hashing and copying run on a thread pool.
+    """
+
+    def __init__(self, dest: Path, index_path: Path = WALLPAPERS_INDEX,
+                 workers: Optional[int] = None, hardlink: bool = False):
+        self.dest = dest
+        # Sources that are never modified in place may share their inodes
+        self.hardlink = hardlink
+        self.index_path = index_path
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._files: Dict[str, Dict[str, Any]] = self._load_index()
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.index_path, "r") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION and isinstance(data.get("files"), dict):
+                return data["files"]
+            logger.info(f"Wallpaper index {self.index_path} is stale, ignoring it.")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Unable to read wallpaper index {self.index_path}: {e}")
+        return {}
+
+    def _save_index(self) -> None:
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self.index_path.with_suffix(".tmp")
+            with open(temp_file, "w") as f:
+                json.dump({"version": INDEX_VERSION, "files": self._files}, f)
+            os.replace(temp_file, self.index_path)
+        except OSError as e:
+            logger.error(f"Failed to write wallpaper index {self.index_path}: {e}")
+
+    @staticmethod
+    def _scan(root: Path) -> List[Path]:
+        """Image files below root, hidden files and dirs (like .git) excluded."""
+        images: List[Path] = []
+        if not root.is_dir():
+            return images
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+            for name in sorted(filenames):
+                if not name.startswith(".") and name.lower().endswith(IMAGE_SUFFIXES):
+                    images.append(Path(dirpath) / name)
+        return images
+
+    def _hash(self, path: Path) -> Optional[str]:
+        """Content hash of path, from the index while size and mtime match."""
+        key = str(path)
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            logger.warning(f"Unable to stat wallpaper {path}: {e}")
+            return None
+
+        with self._lock:
+            entry = self._files.get(key)
+        if entry is not None and entry.get("size") == st.st_size \
+                and entry.get("mtime_ns") == st.st_mtime_ns:
+            return entry["hash"]
+
+        try:
+            digest = file_hash(path)
+        except OSError as e:
+            logger.warning(f"Unable to hash wallpaper {path}: {e}")
+            return None
+        with self._lock:
+            self._files[key] = {**_stat_key(st), "hash": digest}
+        return digest
+
+    def _copy(self, src: Path, dest: Path, digest: str) -> bool:
+        try:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            copy_file(src, dest, self.hardlink)
+            st = os.stat(dest)
+        except OSError as e:
+            logger.error(f"Failed to copy wallpaper {src} -> {dest}: {e}")
+            return False
+        with self._lock:
+            self._files[str(dest)] = {**_stat_key(st), "hash": digest}
+        return True
+
+    def import_tree(self, src: Path) -> ImportResult:
+        """Import the images below src, keeping their paths relative to src."""
+        result = ImportResult()
+        self.dest.mkdir(parents=True, exist_ok=True)
+
+        existing = self._scan(self.dest)
+        sources = self._scan(src)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            existing_hashes = list(pool.map(self._hash, existing))
+            source_hashes = list(pool.map(self._hash, sources))
+
+            # Forget files that are gone from dest
+            with self._lock:
+                dest_prefix = str(self.dest) + os.sep
+                present = {str(p) for p in existing}
+                for key in [k for k in self._files if k.startswith(dest_prefix)]:
+                    if key not in present:
+                        del self._files[key]
+
+            known = {digest for digest in existing_hashes if digest is not None}
+            jobs: List[Tuple[Path, Path, str]] = []
+            for path, digest in zip(sources, source_hashes):
+                if digest is None:
+                    result.failed += 1
+                elif digest in known:
+                    result.duplicates += 1
+                else:
+                    known.add(digest)
+                    jobs.append((path, self.dest / path.relative_to(src), digest))
+
+            for ok in pool.map(lambda job: self._copy(*job), jobs):
+                if ok:
+                    result.copied += 1
+                else:
+                    result.failed += 1
+
+        self._save_index()
+        logger.info(
+            f"Imported wallpapers from {src}: {result.copied} copied, "
+            f"{result.duplicates} already present, {result.failed} failed")
+        return result
@@ -3,17 +3,22 @@ from core.uninstaller import SBDotsUninstaller
 from core.updater import SBDotsUpdater
 from cli.arg_parser import ArgumentParser
 from cli.commands import Commands
+from includes.profiler import profiler
 
 def main():
-    # Main components
-    installer = SBDotsInstaller(dry_run=False)
-    uninstaller = SBDotsUninstaller(dry_run=False)
-    updater = SBDotsUpdater(dry_run=False)
-    
     # cli
     parser = ArgumentParser.create_parser()
     args = parser.parse_args()
 
+    if args.profile:
+        profiler.enable()
+
+    # Main components
+    installer = SBDotsInstaller(
+        dry_run=False, jobs=args.jobs, from_scratch=args.from_scratch)
+    uninstaller = SBDotsUninstaller(dry_run=False)
+    updater = SBDotsUpdater(dry_run=False)
+
     if args.install:
         Commands.handle_install(installer)
     elif args.remove:
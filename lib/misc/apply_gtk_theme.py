@@ -1,6 +1,10 @@
 from includes.logger import logger
+from includes.profiler import profiler, ux_delay
+from misc.catppuccin_themes import ThemeVariant, install_themes
 import subprocess
-from time import sleep
+
+# gtk_theme_manager bounds each reload itself, this only guards against a hang
+GTK_THEME_MANAGER_TIMEOUT = 120
 
 
 def apply_gtk_theme(spinner) -> bool:
@@ -8,41 +12,45 @@ def apply_gtk_theme(spinner) -> bool:
     logger.info("Applying GTK theme...")
 
     try:
-        sleep(1)
+        ux_delay(1)
 
         logger.info("Installing Catppuccin theme...")
         spinner.update_text("Downloading Catppuccin theme...")
-        subprocess.run(
-            ["catppuccin_theme_installer", "mocha", "blue"],
-            check=True,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
+        with profiler.span("GTK theme: install catppuccin"):
+            results = install_themes([ThemeVariant("mocha", "blue")])
+        if not all(results.values()):
+            logger.error("Failed to install Catppuccin theme.")
+            return False
 
         logger.info("Applying Catppuccin theme...")
         spinner.update_text("Applying Catppuccin theme...")
-        subprocess.run(
-            [
-                "gtk_theme_manager",
-                "-t",
-                "catppuccin-mocha-blue-standard+default",
-                "-i",
-                "Tela-circle-dark",
-                "-c",
-                "Bibata-Original-Classic",
-                "-s",
-                "20",
-                "-m",
-                "prefer_dark",
-            ],
-            check=True,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
+        with profiler.span("GTK theme: apply"):
+            subprocess.run(
+                [
+                    "gtk_theme_manager",
+                    "-t",
+                    "catppuccin-mocha-blue-standard+default",
+                    "-i",
+                    "Tela-circle-dark",
+                    "-c",
+                    "Bibata-Original-Classic",
+                    "-s",
+                    "20",
+                    "-m",
+                    "prefer_dark",
+                ],
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=GTK_THEME_MANAGER_TIMEOUT,
+            )
 
         spinner.success("GTK theme applied successfully.")
         return True
 
+    except subprocess.TimeoutExpired as e:
+        logger.error(f"Command timed out after {e.timeout}s: {e.cmd}")
+        return False
     except subprocess.CalledProcessError as e:
         logger.error(f"Command failed: {e.cmd} (exit code {e.returncode})")
         return False
@@ -1,9 +1,27 @@
 import subprocess
 
 from includes.logger import logger
+from misc.wallpaper_colors import WallpaperColorEngine
+from misc.wallpaper_variants import WallpaperVariants, current_wallpaper, largest_variant, read_monitors
 
 def apply_wallpaper() -> bool:
-    """Apply wallpaper using waypaper."""
+    """
+    Apply the wallpaper pre-scaled to the monitors and generate its colours
+    and blurred lock screen image, fall back to waypaper.
+    """
+    wallpaper = current_wallpaper()
+    monitors = read_monitors()
+    if wallpaper is not None and wallpaper.is_file() and monitors:
+        wallpaper = wallpaper.resolve()
+        variants = WallpaperVariants()
+        paths = variants.prepare(wallpaper, monitors)
+        # waypaper's post command doesn't run here, so do its colour step too.
+        # Without NumPy or Pillow, waypaper runs it with pywal instead
+        if variants.show(paths) and WallpaperColorEngine().apply(
+                wallpaper, largest_variant(paths, wallpaper)):
+            logger.info("Wallpaper applied successfully.")
+            return True
+
     try:
         subprocess.run(
             ["waypaper", "--restore"],
@@ -15,4 +33,4 @@ def apply_wallpaper() -> bool:
         return True
     except subprocess.CalledProcessError as e:
         logger.error(f"Failed to apply wallpaper: {e}")
-        return False
\ No newline at end of file
+        return False
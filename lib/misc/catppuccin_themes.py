@@ -0,0 +1,443 @@
+# Original: https://github.com/catppuccin/gtk/blob/main/install.py
+# Simplified by me
+
+from includes.logger import logger
+from includes.paths import THEMES_CACHE_DIR, USER_THEMES_DIR
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.error import HTTPError
+from urllib.parse import urljoin, urlsplit
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import shutil
+import ssl
+import sys
+import tempfile
+import threading
+import zipfile
+
+REPO_ROOT = "https://github.com/catppuccin/gtk/releases/download"
+RELEASE = "v1.0.3"  # x-release-please-version
+CHUNK_SIZE = 1 << 16
+DEFAULT_JOBS = 4
+
+FLAVORS = ("mocha", "frappe", "macchiato", "latte")
+ACCENTS = (
+    "rosewater", "flamingo", "pink", "mauve", "red", "maroon", "peach",
+    "yellow", "green", "teal", "sky", "sapphire", "blue", "lavender",
+)
+
+_REDIRECTS = {301, 302, 303, 307, 308}
+
+
+@dataclass(frozen=True)
+class ThemeVariant:
+    flavor: str
+    accent: str
+
+    def __post_init__(self):
+        if self.flavor not in FLAVORS:
+            raise ValueError(f"Unknown flavor {self.flavor!r}, expected one of {', '.join(FLAVORS)}")
+        if self.accent not in ACCENTS:
+            raise ValueError(f"Unknown accent {self.accent!r}, expected one of {', '.join(ACCENTS)}")
+
+    @property
+    def name(self) -> str:
+        return f"catppuccin-{self.flavor}-{self.accent}-standard+default"
+
+    def release_url(self, repo_root: str = REPO_ROOT) -> str:
+        return f"{repo_root}/{RELEASE}/{self.name}.zip"
+
+
+class PooledResponse:
+    """A response whose connection goes back to the pool once its body was read."""
+
+    def __init__(self, pool: "ConnectionPool", key: Tuple[str, str, int],
+                 conn: http.client.HTTPConnection, response: http.client.HTTPResponse, url: str):
+        self._pool = pool
+        self._key = key
+        self._conn: Optional[http.client.HTTPConnection] = conn
+        self._response = response
+        self.url = url
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        return self._response.read(amt)
+
+    def close(self) -> None:
+        if self._conn is None:
+            return
+        response = self._response
+        # Drain small leftovers (304s, error pages) so the connection stays usable
+        if not response.isclosed() and response.length is not None and response.length <= CHUNK_SIZE:
+            try:
+                response.read()
+            except (http.client.HTTPException, OSError):
+                pass
+        if response.isclosed() and not response.will_close:
+            self._pool.release(self._key, self._conn)
+        else:
+            self._conn.close()
+        self._conn = None
+
+    def __enter__(self) -> "PooledResponse":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Keep-alive HTTP(S) connections per host, shared between threads. A
+    connection is only used by one request at a time, concurrent requests
+    to the same host open extra connections which are then reused too.
+    Redirects (GitHub sends release assets to its object storage) are
+    followed on pooled connections as well.
+    """
+
+    def __init__(self, timeout: float = 30, max_redirects: int = 5):
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        self._context = ssl.create_default_context()
+        self._idle: Dict[Tuple[str, str, int], List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def _acquire(self, key: Tuple[str, str, int]) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(
+                host, port, timeout=self.timeout, context=self._context), False
+        return http.client.HTTPConnection(host, port, timeout=self.timeout), False
+
+    def release(self, key: Tuple[str, str, int], conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            self._idle.setdefault(key, []).append(conn)
+
+    def _send(self, url: str, headers: Dict[str, str]) -> PooledResponse:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Unsupported URL: {url}")
+        key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == "https" else 80))
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+        while True:
+            conn, reused = self._acquire(key)
+            try:
+                conn.request("GET", target, headers=headers)
+                return PooledResponse(self, key, conn, conn.getresponse(), url)
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                # The server may have dropped an idle connection, retry on another one
+                if not reused:
+                    raise
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> PooledResponse:
+        """GET url following redirects, close the response to give its connection back."""
+        headers = dict(headers or {})
+        for _ in range(self.max_redirects + 1):
+            response = self._send(url, headers)
+            location = response.headers.get("Location")
+            if response.status not in _REDIRECTS or not location:
+                return response
+            response.read()
+            response.close()
+            url = urljoin(url, location)
+        raise HTTPError(url, response.status, "Too many redirects", response.headers, None)
+
+    def close(self) -> None:
+        with self._lock:
+            for conns in self._idle.values():
+                for conn in conns:
+                    conn.close()
+            self._idle.clear()
+
+
+def verify_zip(path: Path) -> bool:
+    logger.info(f"Verifying {path.name}..")
+    try:
+        with zipfile.ZipFile(path) as zip_file:
+            first_bad_file = zip_file.testzip()
+    except zipfile.BadZipFile as e:
+        logger.error(f"Zip is invalid: {e}")
+        return False
+    if first_bad_file is not None:
+        logger.error(f'Zip appears to be corrupt, first bad file is "{first_bad_file}"')
+        return False
+    return True
+
+
+class DownloadCache:
+    """
+    Content addressed cache of downloaded zips: <sha256>.zip blobs plus an
+    index of url -> etag/last-modified/sha256. Downloads are streamed to a
+    partial file, so memory use doesn't depend on the archive size, and an
+    interrupted download is resumed with a range request. Safe to use from
+    several threads, which then share the pool's connections.
+    """
+
+    def __init__(self, root: Path = THEMES_CACHE_DIR, pool: Optional[ConnectionPool] = None):
+        self.root = root
+        self.index_path = root / "index.json"
+        self.partial_dir = root / "partial"
+        self.pool = pool or ConnectionPool()
+        self._lock = threading.Lock()
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.index_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index: Dict[str, Dict[str, Any]]) -> None:
+        temp_file = self.index_path.with_suffix(".tmp")
+        with open(temp_file, "w") as f:
+            json.dump(index, f, indent=4)
+        os.replace(temp_file, self.index_path)
+
+    def blob_path(self, digest: str) -> Path:
+        return self.root / f"{digest}.zip"
+
+    def _partial_paths(self, url: str) -> Tuple[Path, Path]:
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return self.partial_dir / f"{key}.part", self.partial_dir / f"{key}.json"
+
+    def fetch(self, url: str) -> Path:
+        """Path of the cached zip for url, downloading only when it changed."""
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            entry = self._load_index().get(url)
+        cached = self.blob_path(entry["sha256"]) if entry else None
+        if cached is not None and not cached.exists():
+            cached = None
+
+        part, part_meta = self._partial_paths(url)
+        offset = part.stat().st_size if part.exists() else 0
+        validator = None
+        if offset:
+            try:
+                with open(part_meta, "r") as f:
+                    validator = json.load(f).get("validator")
+            except (OSError, ValueError):
+                pass
+            if not validator:
+                offset = 0  # Can't tell whether the partial data is still current
+
+        headers = {}
+        if cached is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+
+        try:
+            response = self.pool.get(url, headers)
+        except (http.client.HTTPException, OSError) as e:
+            if cached is not None:
+                logger.warning(f"Download of {url} failed ({e}), using cached download")
+                return cached
+            raise
+
+        with response:
+            logger.info(f"Response status for {url}: {response.status}")
+            if response.status == 304 and cached is not None:
+                logger.info("Release unchanged, using cached download")
+                return cached
+            if response.status == 416:
+                restart = True
+            elif response.status not in (200, 206):
+                raise HTTPError(response.url, response.status, response.reason, response.headers, None)
+            else:
+                restart = False
+                digest = self._receive(response, part, part_meta, offset)
+
+        if restart:
+            # Stale partial file, start over
+            part.unlink(missing_ok=True)
+            return self.fetch(url)
+
+        part_meta.unlink(missing_ok=True)
+        if not verify_zip(part):
+            part.unlink(missing_ok=True)
+            raise zipfile.BadZipFile(f"Downloaded zip is corrupt: {url}")
+
+        blob = self.blob_path(digest)
+        os.replace(part, blob)
+
+        with self._lock:
+            index = self._load_index()
+            index[url] = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "sha256": digest,
+            }
+            self._save_index(index)
+            if cached is not None and cached != blob and \
+                    not any(other.get("sha256") == entry["sha256"] for other in index.values()):
+                cached.unlink(missing_ok=True)
+        logger.info(f"Download of {url} finished, zip is valid")
+        return blob
+
+    @staticmethod
+    def _receive(response: PooledResponse, part: Path, part_meta: Path, offset: int) -> str:
+        """Stream the body into the partial file, returns the sha256 of the whole file."""
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+        digest = hashlib.sha256()
+        if response.status == 206:
+            logger.info(f"Resuming download at {offset} bytes")
+            with open(part, "rb") as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+            mode = "ab"
+        else:
+            mode = "wb"
+
+        with open(part_meta, "w") as f:
+            json.dump({"validator": etag or last_modified}, f)
+
+        with open(part, mode) as f:
+            for chunk in iter(lambda: response.read(CHUNK_SIZE), b""):
+                f.write(chunk)
+                digest.update(chunk)
+
+        # A dropped connection keeps the partial file for the next resume
+        length = response.headers.get("Content-Length")
+        start = offset if response.status == 206 else 0
+        if length is not None and part.stat().st_size < start + int(length):
+            raise ConnectionError(
+                f"Download interrupted at {part.stat().st_size} of {start + int(length)} bytes")
+        return digest.hexdigest()
+
+
+def is_installed(variant: ThemeVariant, dest: Path = USER_THEMES_DIR) -> bool:
+    return (dest / variant.name).is_dir()
+
+
+def _extract(zip_path: Path, dest: Path) -> None:
+    """
+    Extract into a temp dir next to the themes, then move each theme dir in
+    place, so a failed extraction never leaves a half installed theme.
+    """
+    staging = Path(tempfile.mkdtemp(prefix=".catppuccin-", dir=dest))
+    try:
+        with zipfile.ZipFile(zip_path) as zip_file:
+            zip_file.extractall(staging)
+        for entry in staging.iterdir():
+            target = dest / entry.name
+            if target.is_dir() and not target.is_symlink():
+                shutil.rmtree(target)
+            elif target.exists() or target.is_symlink():
+                target.unlink()
+            os.replace(entry, target)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _install(variant: ThemeVariant, dest: Path, repo_root: str, cache: DownloadCache) -> bool:
+    url = variant.release_url(repo_root)
+    try:
+        logger.info(f"Downloading {variant.name} from {url}")
+        zip_path = cache.fetch(url)
+        logger.info(f"Extracting {variant.name}...")
+        _extract(zip_path, dest)
+    except Exception as e:
+        logger.error(f"Failed to install {variant.name}: {e}")
+        return False
+    logger.info(f"Installed {variant.name}")
+    return True
+
+
+def install_themes(variants: Iterable[ThemeVariant], dest: Path = USER_THEMES_DIR,
+                   repo_root: str = REPO_ROOT, cache: Optional[DownloadCache] = None,
+                   jobs: Optional[int] = None, force: bool = False) -> Dict[ThemeVariant, bool]:
+    """
+    Install several Catppuccin GTK theme variants at once. Variants already
+    in dest are skipped unless force is set, the others are downloaded over
+    one connection pool and extracted concurrently. Returns whether each
+    variant is installed.
+    """
+    dest.mkdir(parents=True, exist_ok=True)
+    results: Dict[ThemeVariant, bool] = {}
+    pending: List[ThemeVariant] = []
+    for variant in dict.fromkeys(variants):
+        if not force and is_installed(variant, dest):
+            logger.info(f"{variant.name} is already installed, skipping it.")
+            results[variant] = True
+        else:
+            pending.append(variant)
+
+    if not pending:
+        return results
+
+    owns_cache = cache is None
+    cache = cache or DownloadCache()
+    try:
+        with ThreadPoolExecutor(max_workers=jobs or min(len(pending), DEFAULT_JOBS)) as pool:
+            installed = pool.map(lambda variant: _install(variant, dest, repo_root, cache), pending)
+            results.update(zip(pending, installed))
+    finally:
+        if owns_cache:
+            cache.pool.close()
+    return results
+
+
+def _parse_variants(parser: argparse.ArgumentParser, specs: List[str]) -> List[ThemeVariant]:
+    # `catppuccin_theme_installer mocha blue` keeps working next to flavor:accent pairs
+    if len(specs) == 2 and not any(":" in spec for spec in specs):
+        specs = [f"{specs[0]}:{specs[1]}"]
+
+    variants = []
+    for spec in specs:
+        flavor, sep, accent = spec.partition(":")
+        if not sep:
+            parser.error(f"Expected FLAVOR:ACCENT, got {spec!r}")
+        try:
+            variants.append(ThemeVariant(flavor, accent))
+        except ValueError as e:
+            parser.error(str(e))
+    return variants
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Install Catppuccin GTK theme variants.",
+        epilog=f"Flavors: {', '.join(FLAVORS)}. Accents: {', '.join(ACCENTS)}.")
+    parser.add_argument(
+        "variants", nargs="+", metavar="FLAVOR:ACCENT",
+        help="Variants to install, e.g. mocha:blue latte:mauve (or a single `FLAVOR ACCENT`)")
+    parser.add_argument(
+        "--repo-root", type=str, default=REPO_ROOT,
+        help="Base URL the release zips are downloaded from.")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None,
+        help=f"Variants installed concurrently (default: up to {DEFAULT_JOBS})")
+    parser.add_argument(
+        "-f", "--force", action="store_true",
+        help="Reinstall variants that are already installed")
+    args = parser.parse_args()
+    variants = _parse_variants(parser, args.variants)
+
+    results = install_themes(variants, repo_root=args.repo_root, jobs=args.jobs, force=args.force)
+    failed = [variant.name for variant, ok in results.items() if not ok]
+    if failed:
+        sys.exit(f"Failed to install: {', '.join(failed)}")
+    logger.info("Theme installation complete!")
@@ -0,0 +1,272 @@
+from includes.logger import logger
+from includes.paths import (
+    GTK4_CSS, HYPR_COLORS_CONF, KITTY_COLORS_CONF, PALETTE_CACHE, PYWAL_CACHE_DIR, ROFI_COLORS,
+    SWAYNC_COLORS, WAYBAR_COLORS
+)
+
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import hashlib
+import json
+import os
+import re
+
+CACHE_VERSION = 1
+
+# Colour maps, one per source file
+Colors = Dict[str, Dict[str, str]]
+
+SOURCES = {
+    "gtk": GTK4_CSS,
+    "pywal": PYWAL_CACHE_DIR / "colors.css",
+}
+
+# `@define-color name #hex;` and `name: #hex;` declarations, the latter
+# covers plain properties and custom properties like pywal's `--color11`
+_COLOR_TOKEN = re.compile(
+    r"@define-color\s+(?P<define>[\w-]+)\s+(?P<define_value>#[0-9a-fA-F]{3,8})\s*;"
+    r"|(?<![\w-])(?P<name>-{0,2}[A-Za-z][\w-]*)\s*:\s*(?P<value>#[0-9a-fA-F]{3,8})\s*;"
+)
+
+ROFI_TEMPLATE = """
+// Note: This is auto-generated by a script, don't edit it.
+
+// Pywal colors
+@theme "~/.cache/wal/colors-rofi-dark.rasi"
+
+* {{
+    background-color:               {background};
+    background-color-elements:      rgba(0, 0, 0, 0.3);
+    selected:                       {selected};
+    active:                         {active};
+    urgent:                         {urgent};
+    border-color:                   @selected-urgent-background;
+    text-color:                     {text};
+}}
+"""
+
+KITTY_TEMPLATE = """# Note: This is auto-generated by a script, don't edit it.
+# Colors of the GTK theme, overriding the kitty theme's
+{lines}"""
+
+HYPR_TEMPLATE = "$fg = {fg}\n$bg = {bg}\n"
+
+GTK_COLORS_TEMPLATE = """/* Note: This is auto-generated by a script, don't edit it. */
+/* Named colors of the GTK-4.0 theme, overriding the GTK 3 theme's */
+{lines}"""
+
+# Named colors waybar and swaync style with -> GTK-4.0 names they may be
+# defined under, first one found wins
+GTK_NAMED_COLORS = (
+    ("theme_bg_color", ("@theme_bg_color", "@window_bg_color")),
+    ("theme_fg_color", ("@theme_fg_color", "@window_fg_color")),
+    ("theme_selected_bg_color", ("@theme_selected_bg_color", "@accent_bg_color")),
+    ("theme_selected_fg_color", ("@theme_selected_fg_color", "@accent_fg_color")),
+    ("accent_color", ("@accent_color",)),
+    ("accent_bg_color", ("@accent_bg_color",)),
+    ("success_color", ("@success_color",)),
+    ("warning_color", ("@warning_color",)),
+    ("error_color", ("@error_color",)),
+)
+
+
+def tokenize(css: str) -> Dict[str, str]:
+    """All colour declarations of css in one pass, the first one of a name wins."""
+    colors: Dict[str, str] = {}
+    for match in _COLOR_TOKEN.finditer(css):
+        if match.group("define"):
+            colors.setdefault(f"@{match.group('define')}", match.group("define_value"))
+        else:
+            colors.setdefault(match.group("name"), match.group("value"))
+    return colors
+
+
+def argb(color: str, alpha: str = "b3") -> str:
+    """#rrggbb as Hyprland's 0xaarrggbb."""
+    return f"0x{alpha}{color[1:7]}"
+
+
+def render_hypr_colors(fg: str, bg: str) -> str:
+    return HYPR_TEMPLATE.format(fg=argb(fg), bg=argb(bg))
+
+
+def _render_rofi(colors: Colors) -> Optional[str]:
+    gtk = colors["gtk"]
+    if not gtk:
+        return None
+    return ROFI_TEMPLATE.format(
+        background=gtk.get("background-color", "#1e1e2e"),
+        text=gtk.get("foreground-color", "#cdd6f4"),
+        selected=gtk.get("selected-background-color", "#ffffff"),
+        active=gtk.get("accent-color", "#64e675"),
+        urgent=gtk.get("error-color", "#fa6e6e"),
+    )
+
+
+def _render_kitty(colors: Colors) -> Optional[str]:
+    gtk = colors["gtk"]
+    if not gtk:
+        return None
+    # Only colours the theme defines, kitty's theme provides the rest
+    keys = (
+        ("background", "background-color"),
+        ("foreground", "foreground-color"),
+        ("selection_background", "selected-background-color"),
+        ("cursor", "accent-color"),
+        ("url_color", "accent-color"),
+        ("active_border_color", "accent-color"),
+    )
+    lines = "".join(f"{key} {gtk[name]}\n" for key, name in keys if name in gtk)
+    return KITTY_TEMPLATE.format(lines=lines)
+
+
+def _render_gtk_colors(colors: Colors) -> str:
+    gtk = colors["gtk"]
+    # Always rendered, the style sheets import it: without a GTK-4.0 theme
+    # the file is empty and the GTK 3 theme's colors stay in use
+    lines = ""
+    for name, sources in GTK_NAMED_COLORS:
+        value = next((gtk[source] for source in sources if source in gtk), None)
+        if value is not None:
+            lines += f"@define-color {name} {value};\n"
+    return GTK_COLORS_TEMPLATE.format(lines=lines)
+
+
+def _render_hypr(colors: Colors) -> Optional[str]:
+    pywal = colors["pywal"]
+    if "--color11" not in pywal or "--color0" not in pywal:
+        return None
+    return render_hypr_colors(pywal["--color11"], pywal["--color0"])
+
+
+# Consumer -> (colour file, template)
+CONSUMERS: Dict[str, Tuple[Path, Callable[[Colors], Optional[str]]]] = {
+    "rofi": (ROFI_COLORS, _render_rofi),
+    "kitty": (KITTY_COLORS_CONF, _render_kitty),
+    "hypr": (HYPR_COLORS_CONF, _render_hypr),
+    "waybar": (WAYBAR_COLORS, _render_gtk_colors),
+    "swaync": (SWAYNC_COLORS, _render_gtk_colors),
+}
+
+
+class Palette:
+    """
+    Colour maps of the GTK-4.0 theme CSS and pywal's colors.css, each file
+    tokenized once and cached by its content hash. Files whose size and
+    mtime are unchanged aren't even read.
+    """
+
+    def __init__(self, sources: Optional[Dict[str, Path]] = None, cache_path: Path = PALETTE_CACHE):
+        self.sources = sources if sources is not None else SOURCES
+        self.cache_path = cache_path
+
+    def _load_cache(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.cache_path, "r") as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION and isinstance(data.get("sources"), dict):
+                return data["sources"]
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Unable to read palette cache {self.cache_path}: {e}")
+        return {}
+
+    def _save_cache(self, sources: Dict[str, Dict[str, Any]]) -> None:
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self.cache_path.with_suffix(".tmp")
+            with open(temp_file, "w") as f:
+                json.dump({"version": CACHE_VERSION, "sources": sources}, f)
+            os.replace(temp_file, self.cache_path)
+        except OSError as e:
+            logger.error(f"Failed to write palette cache {self.cache_path}: {e}")
+
+    def colors(self) -> Colors:
+        cache = self._load_cache()
+        changed = False
+        colors: Colors = {}
+
+        for name, path in self.sources.items():
+            entry = cache.get(str(path))
+            try:
+                st = os.stat(path)
+                if entry is not None and entry.get("size") == st.st_size \
+                        and entry.get("mtime_ns") == st.st_mtime_ns:
+                    colors[name] = entry["colors"]
+                    continue
+                with open(path, "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                colors[name] = {}
+                continue
+            except OSError as e:
+                logger.warning(f"Unable to read {path}: {e}")
+                colors[name] = {}
+                continue
+
+            digest = hashlib.sha256(data).hexdigest()
+            if entry is None or entry.get("hash") != digest:
+                logger.debug(f"Tokenizing colors of {path}")
+                entry = {"hash": digest, "colors": tokenize(data.decode("utf-8", errors="replace"))}
+            cache[str(path)] = {**entry, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            colors[name] = entry["colors"]
+            changed = True
+
+        if changed:
+            self._save_cache(cache)
+        return colors
+
+
+def _write_if_changed(path: Path, content: str) -> bool:
+    try:
+        with open(path, "r") as f:
+            if f.read() == content:
+                return False
+    except (OSError, UnicodeDecodeError):
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = path.with_name(f".{path.name}.tmp")
+    with open(temp_file, "w") as f:
+        f.write(content)
+    os.replace(temp_file, path)
+    return True
+
+
+def render_palette(only: Optional[List[str]] = None, palette: Optional[Palette] = None) -> List[Path]:
+    """
+    Render the colour file of every consumer (or only the named ones) from
+    one parse of the sources. Returns the files whose content changed.
+    """
+    colors = (palette or Palette()).colors()
+    written: List[Path] = []
+    for name, (path, template) in CONSUMERS.items():
+        if only is not None and name not in only:
+            continue
+        content = template(colors)
+        if content is None:
+            logger.debug(f"No colors for {name}, leaving {path} as it is")
+            continue
+        try:
+            if _write_if_changed(path, content):
+                logger.info(f"Updated {name} colors: {path}")
+                written.append(path)
+        except OSError as e:
+            logger.error(f"Failed to write {path}: {e}")
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Render the rofi, kitty, Hyprland, waybar and swaync colour files "
+                    "from the GTK theme and pywal colors.")
+    parser.add_argument("only", nargs="*", metavar="CONSUMER",
+                        help=f"Consumers to render (default: all of {', '.join(CONSUMERS)})")
+    args = parser.parse_args()
+    unknown = [name for name in args.only if name not in CONSUMERS]
+    if unknown:
+        parser.error(f"Unknown consumer: {', '.join(unknown)}")
+
+    for path in render_palette(only=args.only or None):
+        print(f"[Info]::Colors written to {path}.")
@@ -0,0 +1,248 @@
+from includes.logger import logger
+from includes.paths import (
+    USER_WALLPAPERS_DIR, WAYPAPER_CONFIG, WALLPAPER_CATALOG, WALLPAPER_THUMBNAILS_DIR
+)
+from includes.sync import file_hash
+from includes.wallpaper_import import IMAGE_SUFFIXES
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import configparser
+import json
+import os
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional, the catalog then has no image metadata
+    Image = None
+
+CATALOG_VERSION = 1
+THUMBNAIL_SIZE = 320
+
+
+def _describe(path: str, thumbnail: str, size: int) -> Dict[str, Any]:
+    """
+    Decode an image once: write its thumbnail and return its dimensions and
+    dominant colour. Runs in a worker process.
+    """
+    with Image.open(path) as img:
+        width, height = img.size
+        # Lets the JPEG decoder scale down while decoding
+        img.draft("RGB", (size, size))
+        thumb = img.convert("RGB")
+        thumb.thumbnail((size, size))
+
+    thumb.save(thumbnail, "JPEG", quality=85)
+
+    # Most common colour of a small palette reduction
+    palette = thumb.quantize(colors=8)
+    count, index = max(palette.getcolors())
+    r, g, b = palette.getpalette()[index * 3:index * 3 + 3]
+    return {
+        "width": width,
+        "height": height,
+        "aspect": round(width / height, 4) if height else None,
+        "dominant": f"#{r:02x}{g:02x}{b:02x}",
+    }
+
+
+def wallpaper_dirs() -> List[Path]:
+    """~/Wallpapers plus the folder the waypaper picker is configured with."""
+    dirs = [USER_WALLPAPERS_DIR]
+    config = configparser.ConfigParser(interpolation=None)
+    try:
+        config.read(WAYPAPER_CONFIG)
+        folder = config.get("Settings", "folder", fallback=None)
+    except configparser.Error as e:
+        logger.warning(f"Unable to read waypaper config {WAYPAPER_CONFIG}: {e}")
+        folder = None
+    if folder:
+        path = Path(os.path.expanduser(folder))
+        if path not in dirs:
+            dirs.append(path)
+    return dirs
+
+
+def wallpaper_hash(path: Path) -> str:
+    """Content hash of a wallpaper, taken from the catalog while it is current."""
+    try:
+        st = os.stat(path)
+        with open(WALLPAPER_CATALOG, "r") as f:
+            entry = json.load(f).get("wallpapers", {}).get(str(path))
+        if entry and entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+            return entry["hash"]
+    except (OSError, ValueError, AttributeError, KeyError):
+        pass
+    return file_hash(path)
+
+
+class WallpaperCatalog:
+    """
+    Thumbnail cache and metadata index (dimensions, aspect ratio, dominant
+    colour, hash, mtime) of the wallpaper dirs, for the picker and scripts.
+
+    Updates are incremental: files whose size and mtime are unchanged are
+    not read, files whose content was already seen (renamed or copied) are
+    not decoded again. Decoding runs on a process pool. Thumbnails are named
+    after the content hash, so they are shared between duplicates.
+    """
+
+    def __init__(self, dirs: Optional[List[Path]] = None, path: Path = WALLPAPER_CATALOG,
+                 thumbnails_dir: Path = WALLPAPER_THUMBNAILS_DIR, workers: Optional[int] = None):
+        self.dirs = dirs if dirs is not None else wallpaper_dirs()
+        self.path = path
+        self.thumbnails_dir = thumbnails_dir
+        self.workers = workers
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Catalog entries keyed by absolute wallpaper path."""
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            if data.get("version") == CATALOG_VERSION and isinstance(data.get("wallpapers"), dict):
+                return data["wallpapers"]
+            logger.info(f"Wallpaper catalog {self.path} is stale, rebuilding it.")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Unable to read wallpaper catalog {self.path}: {e}")
+        return {}
+
+    def _save(self, wallpapers: Dict[str, Dict[str, Any]]) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self.path.with_suffix(".tmp")
+            with open(temp_file, "w") as f:
+                json.dump({"version": CATALOG_VERSION, "wallpapers": wallpapers}, f)
+            os.replace(temp_file, self.path)
+        except OSError as e:
+            logger.error(f"Failed to write wallpaper catalog {self.path}: {e}")
+
+    def _scan(self) -> Dict[str, os.stat_result]:
+        found: Dict[str, os.stat_result] = {}
+        for root in self.dirs:
+            if not root.is_dir():
+                continue
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+                for name in filenames:
+                    if name.startswith(".") or not name.lower().endswith(IMAGE_SUFFIXES):
+                        continue
+                    path = os.path.join(dirpath, name)
+                    try:
+                        found[path] = os.stat(path)
+                    except OSError:
+                        pass
+        return found
+
+    def thumbnail_path(self, digest: str) -> Path:
+        return self.thumbnails_dir / f"{digest}.jpg"
+
+    def update(self) -> Dict[str, Dict[str, Any]]:
+        """Bring the catalog in sync with the wallpaper dirs, returns it."""
+        old = self.load()
+        found = self._scan()
+        wallpapers: Dict[str, Dict[str, Any]] = {}
+
+        # Unchanged files keep their entry without being read
+        changed: List[str] = []
+        for path, st in found.items():
+            entry = old.get(path)
+            if entry is not None and entry.get("size") == st.st_size \
+                    and entry.get("mtime_ns") == st.st_mtime_ns \
+                    and ("width" in entry or entry.get("undecodable") or Image is None):
+                wallpapers[path] = entry
+            else:
+                changed.append(path)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            digests = list(pool.map(self._safe_hash, changed))
+
+        # Content seen before (under any name) reuses its metadata
+        by_hash = {entry["hash"]: entry for entry in list(old.values()) + list(wallpapers.values())
+                   if "hash" in entry}
+        to_decode: Dict[str, List[str]] = {}
+        for path, digest in zip(changed, digests):
+            if digest is None:
+                continue
+            st = found[path]
+            entry = {"hash": digest, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            known = by_hash.get(digest)
+            if known is not None and "width" in known and self.thumbnail_path(digest).exists():
+                entry.update({k: known[k] for k in ("width", "height", "aspect", "dominant", "thumbnail")
+                              if k in known})
+            else:
+                to_decode.setdefault(digest, []).append(path)
+            wallpapers[path] = entry
+
+        if to_decode:
+            self._decode(to_decode, wallpapers)
+
+        self._prune_thumbnails(wallpapers)
+        self._save(wallpapers)
+        logger.info(
+            f"Wallpaper catalog updated: {len(wallpapers)} wallpapers, "
+            f"{len(changed)} changed, {len(to_decode)} decoded")
+        return wallpapers
+
+    @staticmethod
+    def _safe_hash(path: str) -> Optional[str]:
+        try:
+            return file_hash(Path(path))
+        except OSError as e:
+            logger.warning(f"Unable to hash wallpaper {path}: {e}")
+            return None
+
+    def _decode(self, to_decode: Dict[str, List[str]], wallpapers: Dict[str, Dict[str, Any]]) -> None:
+        if Image is None:
+            logger.warning("Pillow is not installed, wallpaper thumbnails are not generated.")
+            return
+
+        self.thumbnails_dir.mkdir(parents=True, exist_ok=True)
+        jobs: List[Tuple[str, List[str]]] = list(to_decode.items())
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = [
+                pool.submit(_describe, paths[0], str(self.thumbnail_path(digest)), THUMBNAIL_SIZE)
+                for digest, paths in jobs
+            ]
+            for (digest, paths), future in zip(jobs, futures):
+                try:
+                    info = future.result()
+                except Exception as e:
+                    logger.warning(f"Unable to decode wallpaper {paths[0]}: {e}")
+                    info = {"undecodable": True}
+                    for path in paths:
+                        wallpapers[path].update(info)
+                    continue
+                info["thumbnail"] = str(self.thumbnail_path(digest))
+                for path in paths:
+                    wallpapers[path].update(info)
+
+    def _prune_thumbnails(self, wallpapers: Dict[str, Dict[str, Any]]) -> None:
+        """Delete thumbnails no catalog entry refers to anymore."""
+        if not self.thumbnails_dir.is_dir():
+            return
+        used = {entry.get("thumbnail") for entry in wallpapers.values()}
+        for thumbnail in self.thumbnails_dir.glob("*.jpg"):
+            if str(thumbnail) not in used:
+                try:
+                    thumbnail.unlink()
+                except OSError as e:
+                    logger.warning(f"Unable to delete thumbnail {thumbnail}: {e}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Update the SBDots wallpaper thumbnail cache and metadata index.")
+    parser.add_argument("dirs", nargs="*", type=Path,
+                        help="Wallpaper dirs (default: ~/Wallpapers and the waypaper folder)")
+    parser.add_argument("-l", "--list", action="store_true",
+                        help="Print the catalog as JSON after updating it")
+    args = parser.parse_args()
+
+    catalog = WallpaperCatalog(dirs=args.dirs or None)
+    wallpapers = catalog.update()
+    if args.list:
+        print(json.dumps(wallpapers, indent=2))
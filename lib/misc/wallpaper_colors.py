@@ -0,0 +1,266 @@
+from includes.logger import logger
+from includes.paths import (
+    HYPR_COLORS_CONF, PYWAL_CACHE_DIR, BLURRED_WALLPAPER, WALLPAPER_COLORS_DIR
+)
+from misc.palette import render_hypr_colors
+from misc.wallpaper_catalog import wallpaper_hash
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import argparse
+import json
+import os
+import shutil
+import sys
+
+try:
+    import numpy as np
+    from PIL import Image, ImageFilter
+except ImportError:  # Both optional, post_wallpaper_change.sh then falls back to pywal
+    np = Image = ImageFilter = None
+
+# Pixels the palette is computed from
+PALETTE_SAMPLE_SIZE = (128, 128)
+PALETTE_CLUSTERS = 16
+KMEANS_ITERATIONS = 12
+ACCENT_MIN_LUMINANCE = 90
+
+# Width the blur runs at, and `magick -blur 0x30` sigma at full size
+BLUR_WIDTH = 480
+BLUR_SIGMA = 30
+BLUR_MAX_OUTPUT_WIDTH = 2560
+
+Color = Tuple[int, int, int]
+
+
+def _hex(color: Color) -> str:
+    return "#{:02x}{:02x}{:02x}".format(*color)
+
+
+def _blend(a: Color, b: Color, amount: float) -> Color:
+    """Mix amount of b into a."""
+    return tuple(int(round(x + (y - x) * amount)) for x, y in zip(a, b))
+
+
+def _luminance(color) -> float:
+    r, g, b = color
+    return 0.2126 * r + 0.7152 * g + 0.0722 * b
+
+
+def _kmeans(pixels: "np.ndarray", k: int, iterations: int) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Vectorized k-means on an (N, 3) float array, returns centers and cluster sizes."""
+    # Deterministic start: pixels spread evenly over the luminance range
+    order = np.argsort(pixels @ np.array([0.2126, 0.7152, 0.0722]))
+    centers = pixels[order[np.linspace(0, len(pixels) - 1, k).astype(int)]].copy()
+
+    for _ in range(iterations):
+        distances = ((pixels[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        labels = distances.argmin(axis=1)
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, pixels)
+        filled = counts > 0
+        new_centers = centers.copy()
+        new_centers[filled] = sums[filled] / counts[filled, None]
+        if np.allclose(new_centers, centers, atol=0.5):
+            centers = new_centers
+            break
+        centers = new_centers
+    return centers, counts
+
+
+def extract_palette(src: Path) -> List[str]:
+    """
+    16 colours in pywal's layout: color0 the dark background, color1-6
+    accents, color7/15 the foreground, color8 the bright black and
+    color9-14 repeating the accents.
+    """
+    with Image.open(src) as img:
+        img.draft("RGB", PALETTE_SAMPLE_SIZE)
+        sample = img.convert("RGB").resize(PALETTE_SAMPLE_SIZE, Image.BILINEAR)
+    pixels = np.asarray(sample, dtype=np.float64).reshape(-1, 3)
+
+    centers, counts = _kmeans(pixels, PALETTE_CLUSTERS, KMEANS_ITERATIONS)
+    clusters = sorted(
+        ((tuple(int(round(c)) for c in center), int(count))
+         for center, count in zip(centers, counts) if count > 0),
+        key=lambda cluster: _luminance(cluster[0]))
+
+    darkest, lightest = clusters[0][0], clusters[-1][0]
+
+    # The 6 most common remaining colours are the accents, lifted when too
+    # dark to read on the background and sorted by luminance like pywal does
+    middle = sorted(clusters[1:-1] or clusters, key=lambda cluster: cluster[1], reverse=True)
+    accents = [color for color, _ in (middle * 6)[:6]]
+    accents = sorted(
+        (_blend(color, (255, 255, 255), 0.35) if _luminance(color) < ACCENT_MIN_LUMINANCE else color
+         for color in accents),
+        key=_luminance)
+
+    background = _blend(darkest, (0, 0, 0), 0.4)
+    foreground = _blend(lightest, (255, 255, 255), 0.55)
+    bright_black = _blend(background, foreground, 0.3)
+
+    colors = [background, *accents, foreground, bright_black, *accents, foreground]
+    return [_hex(color) for color in colors]
+
+
+def blur_wallpaper(src: Path, dest: Path) -> None:
+    """Blur a downscaled copy, scaled back up: same look as blurring at full size."""
+    with Image.open(src) as img:
+        width, height = img.size
+        scale = min(1.0, BLUR_WIDTH / width)
+        small_size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        img.draft("RGB", small_size)
+        small = img.convert("RGB").resize(small_size, Image.BILINEAR)
+
+    blurred = small.filter(ImageFilter.GaussianBlur(BLUR_SIGMA * scale))
+    out_scale = min(1.0, BLUR_MAX_OUTPUT_WIDTH / width)
+    blurred = blurred.resize((int(width * out_scale), int(height * out_scale)), Image.BICUBIC)
+
+    temp_file = dest.with_suffix(".tmp")
+    blurred.save(temp_file, "JPEG", quality=90)
+    os.replace(temp_file, dest)
+
+
+def _write(path: Path, content: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = path.with_name(f".{path.name}.tmp")
+    with open(temp_file, "w") as f:
+        f.write(content)
+    os.replace(temp_file, path)
+
+
+def render_pywal_files(wallpaper: Path, colors: List[str]) -> Dict[Path, str]:
+    """The pywal cache files SBDots' configs read, plus Hyprland's colors.conf."""
+    special = {"background": colors[0], "foreground": colors[15], "cursor": colors[15]}
+    numbered = {f"color{i}": color for i, color in enumerate(colors)}
+
+    css = ":root {\n" + "".join(
+        f"  --{name}: {color};\n" for name, color in {**special, **numbered}.items()) + "}\n"
+    waybar = "".join(
+        f"@define-color {name} {color};\n" for name, color in {**special, **numbered}.items())
+    rofi = (
+        "* {\n"
+        f"    active-background: {colors[2]};\n"
+        "    active-foreground: @foreground;\n"
+        "    normal-background: @background;\n"
+        "    normal-foreground: @foreground;\n"
+        f"    urgent-background: {colors[1]};\n"
+        "    urgent-foreground: @foreground;\n"
+        "    alternate-active-background: @background;\n"
+        "    alternate-active-foreground: @foreground;\n"
+        "    alternate-normal-background: @background;\n"
+        "    alternate-normal-foreground: @foreground;\n"
+        "    alternate-urgent-background: @background;\n"
+        "    alternate-urgent-foreground: @foreground;\n"
+        f"    selected-active-background: {colors[1]};\n"
+        "    selected-active-foreground: @foreground;\n"
+        f"    selected-normal-background: {colors[2]};\n"
+        "    selected-normal-foreground: @foreground;\n"
+        f"    selected-urgent-background: {colors[3]};\n"
+        "    selected-urgent-foreground: @foreground;\n"
+        "    background-color: @background;\n"
+        f"    background: {colors[0]};\n"
+        f"    foreground: {colors[15]};\n"
+        "    border-color: @background;\n"
+        "    spacing: 2;\n"
+        "}\n"
+    )
+    colors_json = json.dumps({
+        "wallpaper": str(wallpaper),
+        "alpha": "100",
+        "special": special,
+        "colors": numbered,
+    }, indent=4)
+    hypr = render_hypr_colors(fg=colors[11], bg=colors[0])
+
+    return {
+        PYWAL_CACHE_DIR / "colors.css": css,
+        PYWAL_CACHE_DIR / "colors-waybar.css": waybar,
+        PYWAL_CACHE_DIR / "colors-rofi-dark.rasi": rofi,
+        PYWAL_CACHE_DIR / "colors.json": colors_json,
+        PYWAL_CACHE_DIR / "colors": "\n".join(colors) + "\n",
+        PYWAL_CACHE_DIR / "wal": f"{wallpaper}",
+        HYPR_COLORS_CONF: hypr,
+    }
+
+
+class WallpaperColorEngine:
+    """
+    Palette and blurred lock screen image for a wallpaper, replacing the
+    pywal + ImageMagick pipeline. Both are computed concurrently from
+    downscaled copies and cached by the wallpaper's content hash, switching
+    back to a wallpaper used before only copies cached results.
+    """
+
+    def __init__(self, cache_dir: Path = WALLPAPER_COLORS_DIR):
+        self.cache_dir = cache_dir
+
+    def _palette(self, src: Path, cache_file: Path) -> List[str]:
+        try:
+            with open(cache_file, "r") as f:
+                colors = json.load(f)
+            if isinstance(colors, list) and len(colors) == 16:
+                return colors
+        except (OSError, ValueError):
+            pass
+
+        colors = extract_palette(src)
+        _write(cache_file, json.dumps(colors))
+        return colors
+
+    def _blur(self, src: Path, cache_file: Path) -> Path:
+        if not cache_file.exists():
+            blur_wallpaper(src, cache_file)
+        return cache_file
+
+    def apply(self, src: Path, pixels: Optional[Path] = None) -> bool:
+        """
+        Write the colour files and the blurred wallpaper for src. The pixels
+        are read from `pixels` (a screen sized variant of src) when given,
+        results are still cached by and recorded for the original.
+        """
+        if np is None or Image is None:
+            logger.warning("NumPy or Pillow is not installed, can't generate wallpaper colors.")
+            return False
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        digest = wallpaper_hash(src)
+        pixels = pixels or src
+
+        try:
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                palette = pool.submit(self._palette, pixels, self.cache_dir / f"{digest}.json")
+                blurred = pool.submit(self._blur, pixels, self.cache_dir / f"{digest}-blur.jpg")
+                colors, blurred_file = palette.result(), blurred.result()
+
+            for path, content in render_pywal_files(src, colors).items():
+                _write(path, content)
+
+            BLURRED_WALLPAPER.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = BLURRED_WALLPAPER.with_suffix(".tmp")
+            shutil.copyfile(blurred_file, temp_file)
+            os.replace(temp_file, BLURRED_WALLPAPER)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to generate wallpaper colors for {src}: {e}")
+            return False
+
+        logger.info(f"Wallpaper colors generated for {src}")
+        return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Generate the color scheme and blurred lock screen image from a wallpaper.")
+    parser.add_argument("wallpaper", type=Path, help="Wallpaper image")
+    parser.add_argument("-s", "--source", type=Path,
+                        help="Smaller copy of the wallpaper to read the pixels from")
+    args = parser.parse_args()
+
+    if not args.wallpaper.is_file():
+        sys.exit(f"Wallpaper not found: {args.wallpaper}")
+    pixels = args.source.resolve() if args.source and args.source.is_file() else None
+    if not WallpaperColorEngine().apply(args.wallpaper.resolve(), pixels):
+        sys.exit(1)
@@ -0,0 +1,229 @@
+from includes.logger import logger
+from includes.paths import HYPR_MONITOR_CONF, WAYPAPER_CONFIG, WALLPAPER_VARIANTS_DIR
+from misc.wallpaper_catalog import wallpaper_hash
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import argparse
+import configparser
+import json
+import os
+import re
+import subprocess
+import sys
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional, wallpapers are then applied as they are
+    Image = ImageOps = None
+
+# Variants kept in the cache, least recently used ones are deleted first
+MAX_VARIANTS = 64
+
+# hyprctl transforms 1, 3, 5 and 7 rotate the output by 90 or 270 degrees
+_ROTATED_TRANSFORMS = {1, 3, 5, 7}
+
+
+@dataclass(frozen=True)
+class Monitor:
+    """An output and its size in physical pixels, as the wallpaper covers it."""
+    name: str
+    width: int
+    height: int
+
+    @property
+    def geometry(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+
+def _monitors_from_hyprctl() -> List[Monitor]:
+    result = subprocess.run(["hyprctl", "monitors", "-j"], capture_output=True, text=True, timeout=5)
+    if result.returncode != 0:
+        return []
+
+    monitors = []
+    for monitor in json.loads(result.stdout):
+        width, height = int(monitor["width"]), int(monitor["height"])
+        if monitor.get("transform", 0) in _ROTATED_TRANSFORMS:
+            width, height = height, width
+        monitors.append(Monitor(monitor["name"], width, height))
+    return monitors
+
+
+def _monitors_from_config(path: Path = HYPR_MONITOR_CONF) -> List[Monitor]:
+    """Parse `monitor = name, WxH@rate, position, scale[, transform, N]` lines."""
+    monitors = []
+    with open(path, "r") as f:
+        for line in f:
+            key, _, value = line.split("#", 1)[0].partition("=")
+            # Only `monitor = ...` lines, not monitorv2 blocks or other keys
+            if key.strip() != "monitor" or not value:
+                continue
+            fields = [field.strip() for field in value.split(",")]
+            match = re.match(r"(\d+)x(\d+)", fields[1]) if len(fields) > 1 else None
+            if not match:
+                continue  # preferred/highres/disabled, size unknown
+            width, height = int(match.group(1)), int(match.group(2))
+            if "transform" in fields:
+                transform = fields[fields.index("transform") + 1:fields.index("transform") + 2]
+                if transform and transform[0].isdigit() and int(transform[0]) in _ROTATED_TRANSFORMS:
+                    width, height = height, width
+            monitors.append(Monitor(fields[0], width, height))
+    return monitors
+
+
+def read_monitors() -> List[Monitor]:
+    """Monitor layout from the running Hyprland, else from monitor.conf."""
+    try:
+        monitors = _monitors_from_hyprctl()
+        if monitors:
+            return monitors
+    except (OSError, subprocess.TimeoutExpired, ValueError, KeyError) as e:
+        logger.debug(f"Unable to read monitors from hyprctl: {e}")
+
+    try:
+        return _monitors_from_config()
+    except (OSError, ValueError, IndexError) as e:
+        logger.warning(f"Unable to read monitor layout from {HYPR_MONITOR_CONF}: {e}")
+        return []
+
+
+def _waypaper_settings() -> configparser.SectionProxy:
+    config = configparser.ConfigParser(interpolation=None)
+    try:
+        config.read(WAYPAPER_CONFIG)
+    except configparser.Error as e:
+        logger.warning(f"Unable to read waypaper config {WAYPAPER_CONFIG}: {e}")
+    if not config.has_section("Settings"):
+        config.add_section("Settings")
+    return config["Settings"]
+
+
+def current_wallpaper() -> Optional[Path]:
+    """The wallpaper waypaper last applied."""
+    wallpaper = _waypaper_settings().get("wallpaper")
+    return Path(os.path.expanduser(wallpaper)) if wallpaper else None
+
+
+class WallpaperVariants:
+    """
+    Cache of wallpapers pre-scaled and cropped to the exact size of each
+    monitor, so swww never has to decode and scale a full size original.
+    Variants are keyed on the source content hash and target geometry.
+    """
+
+    def __init__(self, cache_dir: Path = WALLPAPER_VARIANTS_DIR):
+        self.cache_dir = cache_dir
+
+    def variant_path(self, digest: str, geometry: Tuple[int, int]) -> Path:
+        width, height = geometry
+        return self.cache_dir / f"{digest}-{width}x{height}.jpg"
+
+    def _render(self, src: Path, dest: Path, geometry: Tuple[int, int]) -> None:
+        with Image.open(src) as img:
+            # Lets the JPEG decoder scale down while decoding
+            img.draft("RGB", geometry)
+            variant = ImageOps.fit(img.convert("RGB"), geometry, Image.LANCZOS)
+
+        temp_file = dest.with_suffix(".tmp")
+        variant.save(temp_file, "JPEG", quality=92)
+        os.replace(temp_file, dest)
+
+    def _variant(self, src: Path, digest: str, geometry: Tuple[int, int]) -> Path:
+        dest = self.variant_path(digest, geometry)
+        if dest.exists():
+            os.utime(dest)  # Mark as recently used
+            return dest
+        try:
+            self._render(src, dest, geometry)
+            logger.info(f"Created {geometry[0]}x{geometry[1]} variant of {src}")
+            return dest
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unable to create wallpaper variant of {src}: {e}")
+            return src
+
+    def prepare(self, src: Path, monitors: List[Monitor]) -> Dict[Monitor, Path]:
+        """
+        Path to apply on each monitor: a cached variant, or the original when
+        the variant can't be made.
+        """
+        if Image is None:
+            logger.warning("Pillow is not installed, applying wallpapers unscaled.")
+            return {monitor: src for monitor in monitors}
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        digest = wallpaper_hash(src)
+        geometries = sorted({monitor.geometry for monitor in monitors})
+        with ThreadPoolExecutor(max_workers=len(geometries) or 1) as pool:
+            paths = dict(zip(geometries, pool.map(
+                lambda geometry: self._variant(src, digest, geometry), geometries)))
+
+        self._prune()
+        return {monitor: paths[monitor.geometry] for monitor in monitors}
+
+    def _prune(self) -> None:
+        variants = sorted(self.cache_dir.glob("*.jpg"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for variant in variants[MAX_VARIANTS:]:
+            try:
+                variant.unlink()
+            except OSError as e:
+                logger.warning(f"Unable to delete wallpaper variant {variant}: {e}")
+
+    def apply(self, src: Path) -> bool:
+        """Apply src on every monitor through swww, using the cached variants."""
+        monitors = read_monitors()
+        if not monitors:
+            logger.warning("No monitors found, can't apply wallpaper variants.")
+            return False
+        return self.show(self.prepare(src, monitors))
+
+    def show(self, paths: Dict[Monitor, Path]) -> bool:
+        """Set the paths returned by prepare() on their monitors through swww."""
+        settings = _waypaper_settings()
+        transition = [
+            "--transition-type", settings.get("swww_transition_type", "fade"),
+            "--transition-step", settings.get("swww_transition_step", "10"),
+            "--transition-duration", settings.get("swww_transition_duration", "1"),
+            "--transition-fps", settings.get("swww_transition_fps", "60"),
+        ]
+
+        ok = True
+        for monitor, path in paths.items():
+            # An empty name (catch-all monitor rule) applies to every output
+            output = ["--outputs", monitor.name] if monitor.name else []
+            result = subprocess.run(["swww", "img", *output, *transition, str(path)],
+                                    capture_output=True, text=True)
+            if result.returncode != 0:
+                logger.error(f"swww failed to set {path} on {monitor.name or 'all outputs'}: "
+                             f"{result.stderr.strip()}")
+                ok = False
+        return ok
+
+
+def largest_variant(paths: Dict[Monitor, Path], default: Path) -> Path:
+    """The path prepared for the largest monitor, default when there is none."""
+    return max(paths.items(), key=lambda item: item[0].width * item[0].height,
+               default=(None, default))[1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Apply wallpapers pre-scaled to the monitor resolutions.")
+    parser.add_argument("wallpaper", nargs="?", type=Path,
+                        help="Wallpaper to use (default: the one waypaper last applied)")
+    parser.add_argument("-p", "--prepare", action="store_true",
+                        help="Only create the variants and print the largest one's path")
+    args = parser.parse_args()
+
+    wallpaper = args.wallpaper or current_wallpaper()
+    if wallpaper is None or not wallpaper.is_file():
+        sys.exit(f"Wallpaper not found: {wallpaper}")
+    wallpaper = wallpaper.resolve()
+
+    variants = WallpaperVariants()
+    if args.prepare:
+        print(largest_variant(variants.prepare(wallpaper, read_monitors()), wallpaper))
+    elif not variants.apply(wallpaper):
+        sys.exit(1)
@@ -1,10 +1,9 @@
 from includes.logger import logger, log_heading
-from includes.paths import SBDOTS_UDEV_RULES_DIR
-from includes.library import path_lexists, SudoKeepAlive, is_laptop, is_vm, run_command
+from includes.paths import SBDOTS_UDEV_RULES_DIR, CUSTOM_UDEV_RULES_DIR
+from includes.library import path_lexists, SudoKeepAlive, is_laptop, is_vm, privileged
+from includes.profiler import ux_delay
 from includes.tui import print_header, Spinner
 
-from pathlib import Path
-from time import sleep
 
 
 class AutoPowerSaverInstaller:
@@ -16,7 +15,7 @@ class AutoPowerSaverInstaller:
     @staticmethod
     def is_installed() -> bool:
         """Check if auto power saver is already installed"""
-        rule_file = Path("/etc/udev/rules.d/99-power-state.rules")
+        rule_file = CUSTOM_UDEV_RULES_DIR / "99-power-state.rules"
         return rule_file.exists()
 
     @staticmethod
@@ -43,7 +42,7 @@ class AutoPowerSaverInstaller:
                 return False
 
             with Spinner("Installing auto power saver...", sudo_keepalive=sudo) as spinner:
-                sleep(1)  # delay for better UX
+                ux_delay(1)  # delay for better UX
 
                 spinner.update_text("Copying udev rule file...")
 
@@ -55,31 +54,16 @@ class AutoPowerSaverInstaller:
                         f"Src rule-file:{src_rule_file} does not exist.")
                     return False
 
-                src = src_rule_file
-                dest = Path("/etc/udev/rules.d")
-
-                # Create dest if does not exists
-                mkdir_cmd = [
-                    'sudo', 'mkdir', '-p', dest
-                ]
-                if not path_lexists(dest):
-                    logger.debug(
-                        f"Destination dir: {dest} doesn't exists, creating it.")
-                    result = run_command(mkdir_cmd)
-                    if result.returncode != 0:
-                        logger.error(
-                            f"Unable to create dir: {dest}, error: {result.stdout} - {result.stderr}")
-                        return False
-                    logger.info(f"Destination dir: {dest} created.")
-
-                # Copy
-                cp_cmd = [
-                    'sudo', 'cp', '-f', src, dest
-                ]
-                result = run_command(cp_cmd)
-                if result.returncode != 0:
+                dest = CUSTOM_UDEV_RULES_DIR / src_rule_file.name
+
+                # Create the rules dir and copy the rule in a single batch
+                results = privileged.run([
+                    {"op": "mkdir", "path": str(CUSTOM_UDEV_RULES_DIR)},
+                    {"op": "copy", "src": str(src_rule_file), "dest": str(dest)},
+                ])
+                if not all(result["ok"] for result in results):
                     logger.error(
-                        f"Failed to copy rule file:{src} to dest:{dest}")
+                        f"Failed to copy rule file:{src_rule_file} to dest:{dest}")
                     return False
 
                 spinner.success("Auto power saver installed successfully.")
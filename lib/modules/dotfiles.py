@@ -1,11 +1,12 @@
 from includes.logger import logger, log_heading
-from includes.paths import USER_CONFIGS_DIR, USER_DOTFILES_DIR, SBDOTS_DOTFILES_DIR
-from includes.library import remove, create_symlink, path_lexists, copy
+from includes.paths import USER_CONFIGS_DIR, USER_DOTFILES_DIR, SBDOTS_DOTFILES_DIR, DOTFILES_MANIFEST
+from includes.library import remove, create_symlink, path_lexists
+from includes.sync import sync_tree
+from includes.profiler import profiled, ux_delay
 from includes.tui import print_header, Spinner
 
 from pathlib import Path
 from typing import List, Tuple
-from time import sleep
 
 
 class DotfilesInstaller:
@@ -40,7 +41,7 @@ class DotfilesInstaller:
         print_header("Installing dotfiles.")
 
         with Spinner("Installing dotfiles...") as spinner:
-            sleep(1) # delay for better UX
+            ux_delay(1) # delay for better UX
             
             # Step 1: Check if source files exists
             if not self._validate_sources(spinner):
@@ -58,17 +59,23 @@ class DotfilesInstaller:
             if not self._create_links(spinner):
                 return False
             
-            sleep(1)
+            ux_delay(1)
             spinner.success("Dotfiles installed successfully!")
 
         print()
         return True
 
+    def _is_linked(self, component: str) -> bool:
+        """Check if the config is already a symlink to the installed dotfiles component."""
+        target: Path = USER_CONFIGS_DIR / component
+        return target.is_symlink() and target.readlink() == USER_DOTFILES_DIR / component
+
+    @profiled("Dotfiles: validate sources")
     def _validate_sources(self, spinner) -> bool:
         logger.info("Validating source dotfiles components.")
         spinner.update_text("Validating source dotfiles components...")
         if self.dry_run:
-            sleep(2)
+            ux_delay(2)
             return True
         for i in self.source_dotfiles_components_paths:
             if not path_lexists(i):
@@ -77,28 +84,30 @@ class DotfilesInstaller:
                 return False
         return True
 
+    @profiled("Dotfiles: copy")
     def _copy_dotfiles(self, spinner) -> bool:
         logger.info(f"Copying dotfiles to {USER_DOTFILES_DIR}")
         spinner.update_text("Copying dotfiles...")
 
         if self.dry_run:
-            sleep(2)
+            ux_delay(2)
             return True
 
-        logger.info("Creating dotfiles dir...")
-        if USER_DOTFILES_DIR.exists():
-            logger.info("Dotfiles dir already exists, removing it...")
-            remove(USER_DOTFILES_DIR)
-
-        logger.info("Copying...")
+        # Only new or changed files are copied, removed ones are deleted
+        logger.info("Syncing...")
         try:
-            copy(SBDOTS_DOTFILES_DIR, USER_DOTFILES_DIR)
+            result = sync_tree(SBDOTS_DOTFILES_DIR, USER_DOTFILES_DIR, DOTFILES_MANIFEST)
         except Exception as e:
             logger.error(f"Failed to copy dotfiles: {e}")
             spinner.error("Failed to copy dotfiles.")
             return False
+
+        if not result.ok:
+            spinner.error("Failed to copy some dotfiles.")
+            return False
         return True
 
+    @profiled("Dotfiles: verify copy")
     def _verify_copy(self, spinner) -> bool:
         logger.info("Checking if copied successfully or not.")
 
@@ -117,33 +126,40 @@ class DotfilesInstaller:
 
         return True
 
+    @profiled("Dotfiles: remove existing configs")
     def _remove_existing_configs(self, spinner) -> bool:
         logger.info("Removing existing configs.")
         spinner.update_text("Removing existing configs...")
 
         if self.dry_run:
-            sleep(2)
+            ux_delay(2)
             return True
 
         for i in self.dotfiles_components:
             file: Path = USER_CONFIGS_DIR / i
+            if self._is_linked(i):
+                continue  # Already pointing to our dotfiles, keep it
             if not remove(file):
                 spinner.error(f"Failed to remove existing config: {file}.")
                 return False
         return True
 
+    @profiled("Dotfiles: link")
     def _create_links(self, spinner) -> bool:
         logger.info("Creating system links.")
         spinner.update_text("Linking new dotfiles...")
 
         if self.dry_run:
-            sleep(2)
+            ux_delay(2)
             return True
 
         failed_links: List[Tuple[Path, Path]] = []
         for component in self.dotfiles_components:
             source: Path = USER_DOTFILES_DIR / component
             target: Path = USER_CONFIGS_DIR / component
+            if self._is_linked(component):
+                logger.debug(f"Link already correct, skipping: {target}")
+                continue
             if not create_symlink(source, target):
                 logger.error(f"Failed to link {source} to {target}.")
                 failed_links.append((source, target))
@@ -1,20 +1,427 @@
 from includes.logger import logger, log_heading
-from includes.paths import HYPRLAND_PKGS, CORE_PKGS, FONTS, APPLICATIONS, THEMING_PKGS, OPTIONAL_PKGS
-from includes.library import is_installed, install_package, remove_package, SudoKeepAlive
+from includes.paths import HYPRLAND_PKGS, CORE_PKGS, FONTS, APPLICATIONS, THEMING_PKGS, OPTIONAL_PKGS, AUR_BUILD_DIR
+from includes.library import (
+    installed_packages, install_package, install_packages, remove_package,
+    get_repo_packages, get_repo_providers, get_unsatisfied, bisect_failures,
+    run_command, SudoKeepAlive
+)
+from includes.credentials import sudo_credentials, VALID
+from includes.profiler import profiler, ux_delay
 from includes.tui import print_header, Spinner, checklist, print_success, print_info, print_error, confirm
 
-from time import sleep
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional, Set
 from pathlib import Path
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, Future, FIRST_COMPLETED, wait
 import subprocess
+import threading
 import json
+import os
+import re
 
 # Note: yay is used instead of vanilla pacman for installing and removing packages
 
+# Default number of concurrent AUR builds
+DEFAULT_AUR_JOBS: int = min(4, os.cpu_count() or 1)
+
+
+@dataclass
+class InstallPlan:
+    """
+    Resolved set of packages to install across all groups.
+
+    Repo packages are installed in one transaction, then AUR packages are
+    built. Group titles are only kept as labels for progress reporting.
+    """
+    repo: List[str] = field(default_factory=list)
+    aur: List[str] = field(default_factory=list)
+    labels: Dict[str, str] = field(default_factory=dict)
+    already_installed: List[str] = field(default_factory=list)
+
+    @property
+    def packages(self) -> List[str]:
+        return self.repo + self.aur
+
+    def is_empty(self) -> bool:
+        return not self.repo and not self.aur
+
+    def label_of(self, package: str) -> str:
+        return self.labels.get(package, "Packages")
+
+    def groups_of(self, packages: List[str]) -> Dict[str, List[str]]:
+        """Group the given packages by their label, keeping plan order."""
+        grouped: Dict[str, List[str]] = {}
+        for pkg in packages:
+            grouped.setdefault(self.label_of(pkg), []).append(pkg)
+        return grouped
+
+
+class AURBuildExecutor:
+    """
+    Builds AUR packages concurrently and installs them in one transaction.
+
+    PKGBUILDs are fetched with `yay -G` into AUR_BUILD_DIR, one directory per
+    pkgbase, and their .SRCINFO is read to resolve dependencies: missing repo
+    dependencies are installed up front in a single transaction, AUR
+    dependencies are added to the build set. Independent packages are then
+    built with makepkg, at most `jobs` at a time, split packages of one
+    pkgbase share a single build. A package that other builds depend on is
+    installed right after it is built, everything else is installed at the
+    end with one `pacman -U`.
+    """
+
+    def __init__(
+        self,
+        packages: List[str],
+        jobs: int = DEFAULT_AUR_JOBS,
+        build_dir: Path = AUR_BUILD_DIR,
+        on_progress: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self.packages = list(dict.fromkeys(packages))
+        self.requested: Set[str] = set(self.packages)
+        self.jobs = max(1, jobs)
+        self.build_dir = build_dir
+        self.on_progress = on_progress
+
+        # package -> AUR packages (from the build set) it depends on
+        self.dependencies: Dict[str, Set[str]] = {}
+        self.failed: List[str] = []
+        # pkgname -> pkgbase, split packages share their pkgbase's PKGBUILD
+        self.bases: Dict[str, str] = {}
+        self._fetched: Dict[str, bool] = {}
+        self._artifacts: Dict[str, List[Path]] = {}
+        # pkgbase -> everything its build produced, empty if it failed
+        self._base_artifacts: Dict[str, List[Path]] = {}
+        self._base_locks: Dict[str, threading.Lock] = {}
+        self._install_lock = threading.Lock()
+
+    def _progress(self, message: str) -> None:
+        logger.info(message)
+        if self.on_progress:
+            self.on_progress(message)
+
+    def _base_of(self, package: str) -> str:
+        return self.bases.get(package, package)
+
+    def _package_dir(self, package: str) -> Path:
+        return self.build_dir / self._base_of(package)
+
+    def _resolve_bases(self, packages: List[str]) -> None:
+        """
+        Map pkgnames to their pkgbase with one `yay -Si` query, `yay -G`
+        names the directory after the pkgbase. Unknown names map to themselves.
+        """
+        unknown = [pkg for pkg in packages if pkg not in self.bases]
+        if not unknown:
+            return
+        result = run_command(["yay", "-Si", "--aur", *unknown])
+        name = None
+        for line in result.stdout.splitlines():
+            key, _, value = line.partition(":")
+            key, value = key.strip(), value.strip()
+            if key == "Name":
+                name = value
+            elif key == "Package Base" and name in unknown:
+                self.bases[name] = value
+        for pkg in unknown:
+            self.bases.setdefault(pkg, pkg)
+
+    def _fetch(self, base: str) -> bool:
+        """Fetch (or update) the PKGBUILD of an AUR pkgbase."""
+        base_dir = self.build_dir / base
+        if (base_dir / ".git").is_dir():
+            result = run_command(["git", "-C", base_dir, "pull", "--ff-only", "--quiet"])
+        else:
+            self.build_dir.mkdir(parents=True, exist_ok=True)
+            result = run_command(["yay", "-G", "--aur", base], cwd=self.build_dir)
+
+        if result.returncode != 0 or not (base_dir / ".SRCINFO").is_file():
+            logger.error(f"Failed to fetch PKGBUILD for {base}: {result.stderr}")
+            return False
+        return True
+
+    def _fetch_all(self, packages: List[str], pool: ThreadPoolExecutor) -> Dict[str, bool]:
+        """Fetch the PKGBUILDs of packages, once per pkgbase. Returns pkgname -> ok."""
+        self._resolve_bases(packages)
+        # A sibling pulled in later reuses the pkgbase fetched before
+        bases = [base for base in dict.fromkeys(self._base_of(pkg) for pkg in packages)
+                 if base not in self._fetched]
+        self._fetched.update(zip(bases, pool.map(profiler.wrap(self._fetch), bases)))
+        return {pkg: self._fetched[self._base_of(pkg)] for pkg in packages}
+
+    def _read_srcinfo(self, package: str) -> Set[str]:
+        """
+        Return the (build) dependency names declared in .SRCINFO: the pkgbase
+        section's and the package's own section, for the host architecture.
+        """
+        deps: Set[str] = set()
+        keys = re.compile(r"^(depends|makedepends|checkdepends)(?:_(\w+))?$")
+        arch = os.uname().machine
+        section = None
+        with open(self._package_dir(package) / ".SRCINFO", "r") as f:
+            for line in f:
+                key, _, value = line.strip().partition(" = ")
+                if key == "pkgname":
+                    section = value
+                    continue
+                match = keys.match(key)
+                if not match or section not in (None, package):
+                    continue
+                if match.group(2) not in (None, arch):
+                    continue
+                # Strip version constraints: foo>=1.0 -> foo
+                deps.add(re.split(r"[<>=]", value, maxsplit=1)[0])
+        return deps
+
+    def _resolve(self) -> bool:
+        """Fetch PKGBUILDs and resolve dependencies of the whole build set."""
+        repo_deps: List[str] = []
+        pending: List[str] = list(self.packages)
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            while pending:
+                self._progress(f"Fetching PKGBUILDs: {', '.join(pending)}")
+                fetched = self._fetch_all(pending, pool)
+
+                missing: Set[str] = set()
+                for pkg, ok in fetched.items():
+                    if not ok:
+                        self.failed.append(pkg)
+                        continue
+                    deps = self._read_srcinfo(pkg)
+                    self.dependencies[pkg] = deps
+                    missing |= deps
+
+                missing -= set(self.dependencies) | set(self.failed) | set(repo_deps)
+                # Provider names (sh, libfoo.so) are satisfied by installed or
+                # repo packages, only what neither provides is built from AUR
+                missing = get_unsatisfied(sorted(missing))
+                repo = get_repo_providers(sorted(missing))
+                repo_deps.extend(sorted(repo))
+
+                pending = sorted(missing - repo)
+                self.packages.extend(p for p in pending if p not in self.packages)
+
+        # Only keep dependencies that are built here, or failed to fetch so
+        # their dependents are skipped instead of the whole build set
+        for pkg, deps in self.dependencies.items():
+            self.dependencies[pkg] = deps & (set(self.dependencies) | set(self.failed))
+
+        if repo_deps:
+            self._progress(f"Installing build dependencies: {', '.join(repo_deps)}")
+            failed = install_packages(repo_deps, as_deps=True)
+            if failed:
+                logger.error(f"Failed to install build dependencies: {failed}")
+                return False
+        return True
+
+    def _download_sources(self, base: str) -> bool:
+        """Fetch the PKGBUILD and download/verify its sources without building."""
+        if not self._fetch(base):
+            return False
+        result = run_command(
+            ["makepkg", "--verifysource", "--noconfirm", "--nocolor"],
+            cwd=self.build_dir / base)
+        if result.returncode != 0:
+            logger.warning(f"Failed to prefetch sources for {base}: {result.stderr}")
+            return False
+        return True
+
+    def prefetch(self) -> List[str]:
+        """
+        Download PKGBUILDs and sources of all packages ahead of the build,
+        makepkg reuses them later. Returns the packages that failed.
+        """
+        self._resolve_bases(self.packages)
+        bases = list(dict.fromkeys(self._base_of(pkg) for pkg in self.packages))
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            results = dict(zip(bases, pool.map(profiler.wrap(self._download_sources), bases)))
+        return [pkg for pkg in self.packages if not results[self._base_of(pkg)]]
+
+    def _build_base(self, base: str) -> List[Path]:
+        """Build a pkgbase with makepkg, returns every package it produced."""
+        base_dir = self.build_dir / base
+        result = run_command(
+            ["makepkg", "--force", "--clean", "--noconfirm", "--nocolor"], cwd=base_dir)
+        if result.returncode != 0:
+            logger.error(f"Failed to build {base}: {result.stderr}")
+            return []
+
+        listing = run_command(["makepkg", "--packagelist"], cwd=base_dir)
+        return [Path(line) for line in listing.stdout.split() if Path(line).is_file()]
+
+    def _build(self, package: str) -> bool:
+        """Build a package with makepkg and record the produced artifacts."""
+        base = self._base_of(package)
+        # Split packages of one pkgbase are built once, by whichever comes first
+        with self._base_locks.setdefault(base, threading.Lock()):
+            if base not in self._base_artifacts:
+                self._base_artifacts[base] = self._build_base(base)
+            built = self._base_artifacts[base]
+
+        # <pkgname>-<pkgver>-<pkgrel>-<arch>.pkg.tar.*, without the other
+        # split packages and the -debug package
+        artifacts = [a for a in built if a.name.split(".pkg.tar")[0].rsplit("-", 3)[0] == package]
+        if not artifacts:
+            logger.error(f"No packages were produced by {package}")
+            return False
+
+        self._artifacts[package] = artifacts
+        return True
+
+    def _install_artifacts(self, artifacts: List[Path], as_deps: bool = False) -> bool:
+        cmd = ["sudo", "pacman", "-U", "--needed", "--noconfirm", *artifacts]
+        if as_deps:
+            cmd.append("--asdeps")
+        with self._install_lock:
+            result = run_command(cmd)
+        if result.returncode != 0:
+            logger.error(f"pacman -U failed: {result.stderr}")
+            return False
+        return True
+
+    def _build_and_stage(self, package: str, needed_by_others: bool) -> bool:
+        self._progress(f"Building {package}...")
+        with profiler.span(f"Build {package}"):
+            if not self._build(package):
+                return False
+        # Dependents can only be built once their AUR dependency is installed,
+        # only packages that were pulled in as dependencies are marked as such
+        if needed_by_others:
+            return self._install_artifacts(
+                self._artifacts[package], as_deps=package not in self.requested)
+        return True
+
+    def run(self) -> List[str]:
+        """Build and install every package. Returns the list of failed packages."""
+        if not self.packages:
+            return []
+
+        if not self._resolve():
+            return list(self.packages)
+
+        remaining: Set[str] = set(self.dependencies)
+        done: Set[str] = set()
+        needed = {dep for deps in self.dependencies.values() for dep in deps}
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            running: Dict[Future, str] = {}
+            while remaining or running:
+                # Drop packages whose dependencies failed
+                for pkg in sorted(remaining):
+                    if self.dependencies[pkg] & set(self.failed):
+                        logger.error(f"Skipping {pkg}, a dependency failed to build")
+                        self.failed.append(pkg)
+                        remaining.discard(pkg)
+
+                for pkg in sorted(remaining):
+                    if self.dependencies[pkg] <= done:
+                        remaining.discard(pkg)
+                        future = pool.submit(profiler.wrap(self._build_and_stage), pkg, pkg in needed)
+                        running[future] = pkg
+
+                if not running:
+                    if remaining:
+                        logger.error(f"Dependency cycle between: {', '.join(sorted(remaining))}")
+                        self.failed.extend(sorted(remaining))
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    pkg = running.pop(future)
+                    try:
+                        ok = future.result()
+                    except Exception as e:
+                        logger.error(f"Unexpected error building {pkg}: {e}")
+                        ok = False
+                    if ok:
+                        done.add(pkg)
+                    else:
+                        self.failed.append(pkg)
+
+        # Install everything that was built in one final transaction
+        final = [pkg for pkg in self.packages if pkg in done and pkg not in needed]
+        if final:
+            self._progress(f"Installing {len(final)} AUR packages...")
+
+            def attempt(pkgs: List[str]) -> bool:
+                artifacts = [a for p in pkgs for a in self._artifacts[p]]
+                return self._install_artifacts(artifacts)
+
+            self.failed.extend(bisect_failures(final, attempt))
+
+        installed_packages.add(*[p for p in done if p not in self.failed])
+        return list(dict.fromkeys(self.failed))
+
+
+class PackagePrefetcher:
+    """
+    Downloads everything an install plan needs in the background.
+
+    Repo packages are fetched into the pacman cache with `pacman -Sw` and AUR
+    sources next to their PKGBUILDs, so the install step only has to read
+    local files. Both run on daemon threads and must be waited for before
+    anything else takes the pacman database lock.
+    """
+
+    def __init__(self, plan: InstallPlan, jobs: int = DEFAULT_AUR_JOBS) -> None:
+        self.plan = plan
+        self.jobs = jobs
+        self._repo_thread = threading.Thread(
+            target=profiler.wrap(self._fetch_repo), daemon=True)
+        self._aur_thread = threading.Thread(
+            target=profiler.wrap(self._fetch_aur), daemon=True)
+
+    def start(self) -> "PackagePrefetcher":
+        self._repo_thread.start()
+        self._aur_thread.start()
+        return self
+
+    def _fetch_repo(self) -> None:
+        if not self.plan.repo:
+            return
+        with profiler.span("Prefetch repo packages"):
+            self._prefetch_repo()
+
+    def _prefetch_repo(self) -> None:
+        # Never prompt from a background thread, only use cached credentials
+        if sudo_credentials.state != VALID:
+            logger.info("No cached sudo credentials, skipping repo package prefetch.")
+            return
+
+        logger.info(f"Prefetching {len(self.plan.repo)} repo packages...")
+        result = run_command(
+            ["sudo", "-n", "pacman", "-Sw", "--needed", "--noconfirm", *self.plan.repo])
+        if result.returncode != 0:
+            logger.warning(f"Repo package prefetch failed: {result.stderr}")
+        else:
+            logger.info("Repo packages prefetched.")
+
+    def _fetch_aur(self) -> None:
+        if not self.plan.aur:
+            return
+
+        logger.info(f"Prefetching sources of {len(self.plan.aur)} AUR packages...")
+        with profiler.span("Prefetch AUR sources"):
+            failed = AURBuildExecutor(self.plan.aur, jobs=self.jobs).prefetch()
+        if failed:
+            logger.warning(f"AUR source prefetch failed for: {', '.join(failed)}")
+        else:
+            logger.info("AUR sources prefetched.")
+
+    def wait_repo(self) -> None:
+        if self._repo_thread.is_alive():
+            self._repo_thread.join()
+
+    def wait_aur(self) -> None:
+        if self._aur_thread.is_alive():
+            self._aur_thread.join()
+
 
 class PackagesInstaller:
-    def __init__(self, dry_run: bool = False) -> None:
+    def __init__(self, dry_run: bool = False, jobs: Optional[int] = None) -> None:
         self.dry_run = dry_run
+        self.jobs = jobs or DEFAULT_AUR_JOBS
 
         # Load package lists
         self.core: List[str] = self._get_packages_list(CORE_PKGS)
@@ -24,12 +431,7 @@ class PackagesInstaller:
         self.theming: List[str] = self._get_packages_list(THEMING_PKGS)
         self.optional: List[str] = self._get_packages_list(OPTIONAL_PKGS)
 
-    def install(self) -> bool:
-        log_heading("Packages installer started")
-        print_header("Installing packages.")
-        print()
-
-        groups: Dict[str, List[str]] = {
+        self.groups: Dict[str, List[str]] = {
             "Core packages": self.core,
             "Hyprland packages": self.hyprland,
             "Theming packages": self.theming,
@@ -37,18 +439,67 @@ class PackagesInstaller:
             "Applications": self.applications,
         }
 
+        self._plan: Optional[InstallPlan] = None
+        self._prefetcher: Optional[PackagePrefetcher] = None
+
+    def start_prefetch(self) -> None:
+        """Resolve the install plan and start downloading it in the background."""
+        if self.dry_run or self._prefetcher is not None:
+            return
+        try:
+            self._plan = self.plan()
+            self._prefetcher = PackagePrefetcher(self._plan, jobs=self.jobs).start()
+        except Exception as e:
+            logger.warning(f"Unable to start package prefetch: {e}")
+
+    def plan(self) -> InstallPlan:
+        """Merge and dedupe all groups, drop installed packages and classify the rest."""
+        plan = InstallPlan()
+
+        pending: List[str] = []
+        for title, packages_list in self.groups.items():
+            for pkg in packages_list:
+                if pkg in plan.labels:
+                    continue  # Listed twice, keep the first group as label
+                plan.labels[pkg] = title
+                if pkg in installed_packages:
+                    plan.already_installed.append(pkg)
+                else:
+                    pending.append(pkg)
+
+        repo_pkgs = get_repo_packages(pending)
+        plan.repo = [pkg for pkg in pending if pkg in repo_pkgs]
+        plan.aur = [pkg for pkg in pending if pkg not in repo_pkgs]
+
+        logger.info(
+            f"Install plan: {len(plan.repo)} repo, {len(plan.aur)} AUR, "
+            f"{len(plan.already_installed)} already installed.")
+        return plan
+
+    def install(self) -> bool:
+        log_heading("Packages installer started")
+        print_header("Installing packages.")
+        print()
+
         print_info(
             "Installing packages(dependencies), This might take a while. please be patient."
         )
         logger.info("Installing packages(dependencies)...")
 
         if self.dry_run:
-            sleep(2)
+            ux_delay(2)
             return True
 
+        # pacman -Sw holds the db lock, wait for it before touching packages
+        if self._prefetcher is not None:
+            with Spinner("Waiting for package downloads to finish...") as spinner, \
+                    profiler.span("Wait for repo prefetch"):
+                self._prefetcher.wait_repo()
+                spinner.success("Package downloads finished.")
+
         # Remove conflicts if they exist
         conflicts: list[str] = [pkg for pkg in [
-            'wofi', 'dunst'] if is_installed(pkg)]
+            'wofi', 'dunst'] if pkg in installed_packages]
 
         if conflicts:
             logger.info(f"Found conflicts: {conflicts}, removing them...")
@@ -73,51 +524,90 @@ class PackagesInstaller:
                 print_success(
                     "All conflicting packages removed successfully!")
 
-        for title, packages_list in groups.items():
-            with Spinner(f"Installing {title}") as spinner:
-                sleep(1)
+        with Spinner("Resolving packages...") as spinner:
+            with profiler.span("Resolve install plan"):
+                plan = self._plan if self._plan is not None else self.plan()
+            if plan.is_empty():
+                logger.info("All packages are already installed, Skipping.")
+                spinner.success("All packages are already installed, skipping...")
+                print()
+                return True
+            spinner.success(
+                f"Resolved {len(plan.repo)} repo and {len(plan.aur)} AUR packages.")
 
-                # Filter out already installed packages
-                packages_list = [
-                    pkg for pkg in packages_list if not is_installed(pkg)
-                ]
+        failed_pkgs: List[str] = []
 
-                if not packages_list:
-                    logger.info(
-                        f"All {title} are already installed, Skipping.")
-                    spinner.success(
-                        f"{title} are already installed, skipping...")
-                    continue
+        if plan.repo:
+            with Spinner("Installing repo packages") as spinner:
+                labels = ", ".join(plan.groups_of(plan.repo))
+                spinner.update_text(
+                    f"Installing {len(plan.repo)} repo packages ({labels})...")
+                with profiler.span("Install repo packages"):
+                    failed = install_packages(plan.repo)
+                failed_pkgs.extend(failed)
+                if failed:
+                    spinner.error(
+                        f"Couldn't install repo packages: {', '.join(failed)}")
+                else:
+                    spinner.success("Successfully installed repo packages.")
+
+        if plan.aur:
+            with Spinner("Building AUR packages") as spinner:
+                if self._prefetcher is not None:
+                    spinner.update_text("Waiting for AUR sources...")
+                    with profiler.span("Wait for AUR prefetch"):
+                        self._prefetcher.wait_aur()
+
+                executor = AURBuildExecutor(
+                    plan.aur,
+                    jobs=self.jobs,
+                    on_progress=spinner.update_text,
+                )
+                with profiler.span("Build AUR packages"):
+                    failed = executor.run()
+                failed_pkgs.extend(failed)
+                if failed:
+                    spinner.error(
+                        f"Couldn't install AUR packages: {', '.join(failed)}")
+                else:
+                    spinner.success("Successfully installed AUR packages.")
 
-                failed_pkgs: List = []
-                for pkg in packages_list:
-                    spinner.update_text(f"Installing package: {pkg}")
-                    if not install_package(pkg):
-                        spinner.error(
-                            f"Couldn't install package: {pkg}")
-                        failed_pkgs.append(pkg)
+        if failed_pkgs:
+            for title, failed in plan.groups_of(failed_pkgs).items():
+                print_error(f"{title}: failed to install {', '.join(failed)}")
+            logger.error(f"Error installing packages: {failed_pkgs}")
+            return False
 
-                if failed_pkgs:
-                    logger.error(
-                        f"Error installing packages: {failed_pkgs}")
-                    return False
-                spinner.success(f"Successfully installed {title}.")
+        for title in plan.groups_of(plan.packages):
+            logger.info(f"Successfully installed {title}.")
 
         print()
         return True
 
-    def install_optional_applications(self) -> bool:
+    def select_optional_applications(self) -> List[str]:
+        """Ask the user which optional applications to install."""
+        if self.dry_run:
+            return []
+        return checklist(title="Choose apps to install.", items=self.optional)
+
+    def install_optional_applications(
+        self, chosen: Optional[List[str]] = None, retry_failed: Optional[bool] = None
+    ) -> bool:
+        """
+        Install the chosen optional applications. `chosen` and `retry_failed`
+        are asked interactively when not given, the installer collects them
+        up front so nothing prompts while other components print progress.
+        """
         log_heading("Optional packages installer started")
         print_header("Installing optional applications.")
         print()
 
         if self.dry_run:
-            sleep(2)
+            ux_delay(2)
             return True
 
-        chosen: List[str] = checklist(
-            title="Choose apps to install.", items=self.optional
-        )
+        if chosen is None:
+            chosen = self.select_optional_applications()
 
         if not chosen:
             logger.info("No optional packages selected, skipping...")
@@ -128,7 +618,7 @@ class PackagesInstaller:
         logger.info(f"Chosen packages: {', '.join(chosen)}")
 
         # Filter out already installed packages
-        chosen = [pkg for pkg in chosen if not is_installed(pkg)]
+        chosen = [pkg for pkg in chosen if pkg not in installed_packages]
 
         if not chosen:
             print_success(
@@ -178,7 +668,9 @@ class PackagesInstaller:
             logger.error(f"Error installing packages: {failed_pkgs}")
 
             # Ask if user wants to retry failed installations
-            if confirm("Would you like to retry failed installations?"):
+            if retry_failed is None:
+                retry_failed = self.ask_retry_failed()
+            if retry_failed:
                 return self._retry_failed_installations(failed_pkgs)
 
             return False
@@ -189,6 +681,11 @@ class PackagesInstaller:
         print()
         return True
 
+    @staticmethod
+    def ask_retry_failed() -> bool:
+        """Ask whether failed optional applications should be retried."""
+        return confirm("Would you like to retry optional applications that fail to install?")
+
     def _retry_failed_installations(self, failed_pkgs: List[str]) -> bool:
         """Retry installation of failed packages"""
         print_header("Retrying failed installations")
@@ -1,74 +1,139 @@
 from includes.logger import logger, log_heading
-from includes.paths import USER_WALLPAPERS_DIR, SBDOTS_WALLPAPERS_DIR
+from includes.paths import USER_WALLPAPERS_DIR, SBDOTS_WALLPAPERS_DIR, WALLPAPERS_MIRROR_DIR
+from includes.profiler import profiler, profiled, ux_delay
+from includes.library import run_command
+from includes.wallpaper_import import WallpaperImporter, IMAGE_SUFFIXES
+from misc.wallpaper_catalog import WallpaperCatalog
 from includes.tui import print_header, Spinner, confirm
 
-from time import sleep
-import subprocess
+from typing import Optional
 import shutil
 from pathlib import Path
 
 
+WALLPAPERS_REPO_URL = "https://github.com/sbalghari/Wallpapers.git"
+
+
 class WallpapersInstaller:
-    def __init__(self, dry_run: bool = False):
+    def __init__(
+        self,
+        dry_run: bool = False,
+        install_collection: Optional[bool] = None,
+        repo_url: str = WALLPAPERS_REPO_URL,
+        mirror_dir: Path = WALLPAPERS_MIRROR_DIR,
+        update_catalog: bool = True,
+    ):
         self.dry_run = dry_run
-        self.repo_url = "https://github.com/sbalghari/Wallpapers.git"
-        self.clone_dir = Path("/tmp/wallpapers_collection")
+        self.install_collection = install_collection
+        self.repo_url = repo_url
+        self.mirror_dir = mirror_dir
+        # The catalog needs Pillow, the installer indexes once packages are done
+        self.update_catalog = update_catalog
 
-    def _clone_repo(self, repo_url: str, clone_dir: Path) -> bool:
-        """Clone a git repository into the given directory."""
+    def _git(self, *args: str, cwd: Optional[Path] = None) -> bool:
+        """Run a git command, returns True on success."""
         try:
-            subprocess.run(
-                ["git", "clone", repo_url, str(clone_dir)],
-                check=True,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
-            logger.info("Cloned repository successfully.")
-            return True
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Failed to clone repository: {e}")
+            result = run_command(["git", *args], cwd=cwd)
+        except (FileNotFoundError, RuntimeError) as e:
+            logger.error(f"Failed to run git: {e}")
             return False
 
+        if result.returncode != 0:
+            logger.error(f"git {' '.join(args)} failed: {result.stderr.strip()}")
+            return False
+        return True
+
+    def _is_mirror_valid(self) -> bool:
+        return (self.mirror_dir / ".git").is_dir() and self._git(
+            "rev-parse", "--verify", "--quiet", "HEAD^{commit}", cwd=self.mirror_dir)
+
+    def _clone_mirror(self) -> bool:
+        """
+        Shallow, blobless clone without checkout, then a sparse checkout of
+        the top level images so only their blobs get downloaded.
+        """
+        if self.mirror_dir.exists():
+            shutil.rmtree(self.mirror_dir)
+        self.mirror_dir.parent.mkdir(parents=True, exist_ok=True)
+
+        patterns = [f"/*{suffix}" for suffix in IMAGE_SUFFIXES]
+        patterns += [pattern.upper() for pattern in patterns]
+        return self._git("clone", "--depth", "1", "--filter=blob:none", "--no-checkout",
+                         self.repo_url, str(self.mirror_dir)) \
+            and self._git("sparse-checkout", "set", "--no-cone", *patterns,
+                          cwd=self.mirror_dir) \
+            and self._git("checkout", "--force", cwd=self.mirror_dir)
+
+    def _update_mirror(self) -> bool:
+        """Fetch the latest commit only, checkout lazily fetches the new blobs."""
+        return self._git("fetch", "--depth", "1", "--filter=blob:none", "origin", "HEAD",
+                         cwd=self.mirror_dir) \
+            and self._git("reset", "--hard", "FETCH_HEAD", cwd=self.mirror_dir)
+
+    @profiled("Wallpapers: sync collection mirror")
+    def _sync_mirror(self) -> bool:
+        """Create or refresh the persistent wallpaper collection mirror."""
+        if self._is_mirror_valid():
+            if self._update_mirror():
+                logger.info(f"Updated wallpaper collection mirror: {self.mirror_dir}")
+                return True
+            logger.warning("Failed to update wallpaper collection mirror, recloning...")
+
+        if self._clone_mirror():
+            logger.info(f"Cloned wallpaper collection mirror: {self.mirror_dir}")
+            return True
+        return False
+
+    @profiled("Wallpapers: install collection")
     def _install_wallpaper_collection(self, spinner: Spinner) -> bool:
-        """Clone and install wallpaper collection."""
-        if self.clone_dir.exists():
-            shutil.rmtree(self.clone_dir)
+        """Sync the collection mirror and install its wallpapers."""
+        ux_delay(1)  # delay for better UX
+        spinner.update_text("Fetching wallpaper collection...")
+        if not self._sync_mirror():
+            return False
+
+        spinner.update_text("Copying wallpapers...")
+        with profiler.span("Wallpapers: import collection"):
+            # git replaces files in the mirror instead of rewriting them,
+            # so wallpapers can share their inodes with it
+            result = WallpaperImporter(USER_WALLPAPERS_DIR, hardlink=True).import_tree(
+                self.mirror_dir)
+        return result.ok
 
-        sleep(1)  # delay for better UX
-        spinner.update_text("Cloning wallpaper repository...")
-        if not self._clone_repo(self.repo_url, self.clone_dir):
+    @staticmethod
+    def ask_install_collection(dry_run: bool = False) -> bool:
+        """Ask whether the wallpaper collection should be installed."""
+        if dry_run:
             return False
+        return confirm("Do you want to install my wallpapers collection?")
 
-        try:
-            spinner.update_text("Copying wallpapers...")
-            USER_WALLPAPERS_DIR.mkdir(parents=True, exist_ok=True)
-            for file in self.clone_dir.iterdir():
-                if file.is_file() and file.suffix.lower() in [
-                    ".png",
-                    ".jpg",
-                    ".jpeg",
-                    ".webp",
-                ]:
-                    shutil.copy2(file, USER_WALLPAPERS_DIR)
-            logger.info("Wallpaper collection copied successfully.")
+    def index(self) -> bool:
+        """Update the wallpaper catalog, thumbnails are generated with Pillow."""
+        with Spinner("Indexing wallpapers...") as spinner:
+            if self.dry_run:
+                spinner.success("Wallpapers indexed.")
+                return True
+            try:
+                with profiler.span("Wallpapers: update catalog"):
+                    WallpaperCatalog().update()
+            except Exception as e:
+                logger.error(f"Wallpaper indexing failed: {e}")
+                spinner.error("Wallpaper indexing failed.")
+                return False
+            spinner.success("Wallpapers indexed.")
             return True
-        except Exception as e:
-            logger.error(f"Failed to copy wallpapers: {e}")
-            return False
 
     def install(self) -> bool:
         """Main installer function for wallpapers."""
         log_heading("Wallpapers installer started")
         print_header("Installing Wallpapers.")
 
-        install_collection = (
-            False
-            if self.dry_run
-            else confirm("Do you want to install my wallpapers collection?")
-        )
+        install_collection = self.install_collection
+        if install_collection is None:
+            install_collection = self.ask_install_collection(self.dry_run)
 
         with Spinner("Installing wallpapers...") as spinner:
-            sleep(1)  # delay for better UX
+            ux_delay(1)  # delay for better UX
             if self.dry_run:
                 spinner.success("Wallpapers installed successfully")
                 return True
@@ -78,13 +143,12 @@ class WallpapersInstaller:
                 logger.info("Ensured wallpapers dir exists.")
 
                 spinner.update_text("Copying default wallpapers...")
-                try:
-                    sleep(1)
-                    shutil.copytree(
-                        SBDOTS_WALLPAPERS_DIR, USER_WALLPAPERS_DIR, dirs_exist_ok=True
-                    )
-                except Exception as e:
-                    logger.error(f"Failed to copy default wallpapers: {e}")
+                ux_delay(1)
+                with profiler.span("Wallpapers: copy defaults"):
+                    result = WallpaperImporter(USER_WALLPAPERS_DIR).import_tree(
+                        SBDOTS_WALLPAPERS_DIR)
+                if not result.ok:
+                    logger.error("Failed to copy default wallpapers.")
                     return False
 
                 if install_collection:
@@ -98,6 +162,11 @@ class WallpapersInstaller:
                     logger.info(
                         "User chose not to install wallpaper collection.")
 
+                if self.update_catalog:
+                    spinner.update_text("Indexing wallpapers...")
+                    with profiler.span("Wallpapers: update catalog"):
+                        WallpaperCatalog().update()
+
                 spinner.success("Wallpapers installed successfully.")
                 print()
                 return True
@@ -14,6 +14,9 @@ LIB_DIR = Path("/usr/lib/sbdots")
 BIN_DIR = Path("/usr/local/bin")
 SHARE_DIR = Path("/usr/share/sbdots")
 
+# Root helper, started on first use once the downloaded clone is known to exist
+_privileged = None
+
 # Log file
 LOG_FILE = Path.home() / ".cache/sbdots_setup.log"
 
@@ -32,6 +35,19 @@ YELLOW = "\033[1;33m"
 RED = "\033[0;31m"
 RESET = "\033[0m"
 
+def privileged():
+    """Return the root helper, importing it from the downloaded lib on first use."""
+    global _privileged
+    if _privileged is None:
+        # The helper ships with the downloaded lib, it only needs the stdlib
+        sys.path.insert(0, str(SBDOTS_DOWNLOADED_DIR / "lib"))
+        from includes.privileged import PrivilegedHelper
+
+        _privileged = PrivilegedHelper(
+            [LIB_DIR, BIN_DIR, SHARE_DIR], readable_dirs=[SBDOTS_DOWNLOADED_DIR])
+    return _privileged
+
+
 # Colorful message functions
 def info(msg: str) -> None:
     print(f"{YELLOW}> {msg}{RESET}")
@@ -100,69 +116,67 @@ def generate_metadata() -> bool:
     except PermissionError:
         log.warning(
             f"No permission to write {metadata_file}, retrying with sudo...")
-        try:
-            json_str = json.dumps(metadata, indent=4)
-            subprocess.run(
-                ["sudo", "tee", str(metadata_file)],
-                input=json_str.encode(),
-                check=True,
-                stdout=subprocess.DEVNULL
-            )
+        if privileged().write(metadata_file, json.dumps(metadata, indent=4)):
             log.info(f"Metadata written to {metadata_file} using sudo")
             return True
-        except subprocess.CalledProcessError as e:
-            log.error(f"Failed to write metadata with sudo: {e}")
-            return False
+        log.error(f"Failed to write metadata {metadata_file} with sudo")
+        return False
     except Exception as e:
         log.error(f"Failed to write metadata: {e}")
         return False
 
 
-def copy(src: Path, dest: Path) -> bool:
+def copy(src: Path, dest: Path, prune: bool = False) -> bool:
     """
-    Copy files or directories from src to dest.
-    Automatically overwrites if dest exists.
-    Falls back to sudo when needed.
+    Copy the entries of the src directory into dest.
+    Every entry src provides is overwritten, dest itself is kept and so are
+    its other entries, unless `prune` is set: then entries src no longer
+    provides are removed. Falls back to sudo when needed.
     Returns True if successful, False otherwise.
     """
+    names = sorted(os.listdir(src))
+    stale = sorted(set(os.listdir(dest)) - set(names)) if prune and dest.is_dir() else []
+
     try:
-        if dest.exists():
-            if dest.is_dir():
-                shutil.rmtree(dest)
+        dest.mkdir(parents=True, exist_ok=True)
+        for name in stale:
+            _remove(dest / name)
+            log.info(f"Removed {dest / name}, no longer shipped")
+        for name in names:
+            if os.path.lexists(dest / name):
+                _remove(dest / name)
+            if (src / name).is_dir() and not (src / name).is_symlink():
+                shutil.copytree(src / name, dest / name, symlinks=True)
             else:
-                dest.unlink()
-            log.info(f"Overwritten existing {dest} without sudo")
-
-        if src.is_dir():
-            shutil.copytree(src, dest)
-        else:
-            shutil.copy2(src, dest)
+                shutil.copy2(src / name, dest / name, follow_symlinks=False)
         log.info(f"Copied {src} to {dest} without sudo")
         return True
 
     except PermissionError:
         log.warning(
             f"Permission denied copying {src} to {dest}, retrying with sudo...")
-        try:
-            subprocess.run(
-                ["sudo", "rm", "-rf", str(dest)],
-                check=False
-            )
-            subprocess.run(
-                ["sudo", "cp", "-r", str(src), str(dest)],
-                check=True
-            )
+        # One batch, the allow-listed dest dirs themselves are never removed
+        ops = [{"op": "remove", "path": str(dest / name)} for name in stale]
+        ops += [{"op": "copy", "src": str(src / name), "dest": str(dest / name), "replace": True}
+                for name in names]
+
+        if all(result["ok"] for result in privileged().run(ops)):
             log.info(f"Copied {src} to {dest} using sudo")
             return True
-        except subprocess.CalledProcessError as e:
-            log.error(f"Failed to copy {src} to {dest} with sudo: {e}")
-            return False
-
+        log.error(f"Failed to copy {src} to {dest} with sudo")
+        return False
     except Exception as e:
         log.error(f"Unexpected error copying {src} to {dest}: {e}")
         return False
 
 
+def _remove(path: Path) -> None:
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path)
+    else:
+        path.unlink()
+
+
 def setup() -> bool:
     """ Main function to setup SBDots on the system. """
     if not SBDOTS_DOWNLOADED_DIR.exists():
@@ -174,9 +188,11 @@ def setup() -> bool:
     src = [SBDOTS_DOWNLOADED_DIR / "lib", SBDOTS_DOWNLOADED_DIR /
            "bin", SBDOTS_DOWNLOADED_DIR / "share"]
     dest = [LIB_DIR, BIN_DIR, SHARE_DIR]
+    # /usr/local/bin is shared with other software, only our own dirs are pruned
+    prune = [True, False, True]
 
-    for s, d in zip(src, dest):
-        if not copy(s, d):
+    for s, d, p in zip(src, dest, prune):
+        if not copy(s, d, prune=p):
             fail(f"Failed to copy {s} to {d}. Aborting setup.")
             return False
     success("All files copied successfully.")
@@ -18,6 +18,8 @@ kill_swaync() {
 start_swaync() {
     SWAYNC_PID=$(get_swaync_pid)
     if [ -z "$SWAYNC_PID" ]; then
+        # The style imports the GTK theme colors, make sure they exist
+        [ -f "$HOME/.config/swaync/colors.css" ] || theme_palette swaync &> /dev/null
         swaync &
         sleep 0.2
         echo "SwayNC started."
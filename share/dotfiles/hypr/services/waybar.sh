@@ -41,6 +41,8 @@ kill_waybar() {
 start_waybar() {
     WAYBAR_PID=$(get_waybar_pid)
     if [ -z "$WAYBAR_PID" ]; then
+        # The styles import the GTK theme colors, make sure they exist
+        [ -f "$HOME/.config/waybar/colors.css" ] || theme_palette waybar &> /dev/null
         waybar -c "$CONFIG_FILE" -s "$STYLE_CSS" &
         echo "WAYBAR_STYLE=$WAYBAR_STYLE" > "$CURRENT_STYLE"
         sleep 0.2
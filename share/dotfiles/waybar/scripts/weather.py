@@ -1,12 +1,46 @@
 #!/usr/bin/env python3
 
-import requests
+import argparse
+import atexit
+import fcntl
 import json
+import math
+import os
+import re
+import signal
+import subprocess
 import sys
+import threading
+import time
 
 # WeatherAPI.com settings
 from WeatherAPI import API_KEY, LATITUDE, LONGITUDE 
 
+API_URL = "http://api.weatherapi.com/v1"
+CACHE_PATH = os.path.expanduser("~/.cache/sbdots/weather.json")
+CACHE_VERSION = 1
+
+# Seconds a cached response is served without any network I/O
+DEFAULT_TTL = 1800
+# Hard limit for a whole refresh, connect + response
+DEFAULT_TIMEOUT = 15
+# Retry delays after failed refreshes: 60s, 120s, 240s... up to an hour
+BACKOFF_BASE = 60
+BACKOFF_MAX = 3600
+
+# The daemon rechecks the wall clock at least this often, so a suspend
+# doesn't delay a fetch that became due while sleeping
+MAX_SLEEP = 60
+
+# NetworkManager reporting full connectivity, in `nmcli monitor` and
+# `gdbus monitor` output
+NM_CONNECTED = re.compile(r"Connectivity is now 'full'|'Connectivity': <uint32 4>")
+NM_MONITORS = [
+    ["nmcli", "monitor"],
+    ["gdbus", "monitor", "--system", "--dest", "org.freedesktop.NetworkManager",
+     "--object-path", "/org/freedesktop/NetworkManager"],
+]
+
 # Map WeatherAPI.com condition codes to Nerd Fonts icons
 ICONS = {
     1000: "󰖨",  # Sunny
@@ -59,16 +93,105 @@ ICONS = {
     1282: "󰙾",  # Moderate or heavy snow with thunder
 }
 
+class RefreshTimeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise RefreshTimeout("refresh took too long")
+
+
 # Fetch weather data from WeatherAPI.com
-def get_weather():
-    url = f"http://api.weatherapi.com/v1/current.json?key={API_KEY}&q={LATITUDE},{LONGITUDE}"
+def get_weather(api_url=API_URL, timeout=DEFAULT_TIMEOUT, session=None):
+    # requests is only imported when the network is actually used
+    import requests
+
+    http = session or requests
+    response = http.get(
+        f"{api_url}/current.json",
+        params={"key": API_KEY, "q": f"{LATITUDE},{LONGITUDE}"},
+        timeout=timeout,
+    )
+    response.raise_for_status()  # Raise an error for bad status codes
+    return response.json()
+
+# Cache: {"version", "fetched_at", "data", "failures", "retry_at"}
+def load_cache(path):
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an error for bad status codes
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"Error: Unable to fetch weather data - {e}", file=sys.stderr)
-        return None
+        with open(path, "r") as f:
+            cache = json.load(f)
+        if cache.get("version") == CACHE_VERSION:
+            return cache
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {"version": CACHE_VERSION, "fetched_at": 0, "data": None, "failures": 0, "retry_at": 0}
+
+def save_cache(path, cache):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_file = f"{path}.tmp"
+    with open(temp_file, "w") as f:
+        json.dump(cache, f)
+    os.replace(temp_file, path)
+
+def is_fresh(cache, ttl, now=None):
+    now = time.time() if now is None else now
+    return cache.get("data") is not None and now - cache.get("fetched_at", 0) < ttl
+
+def backoff_delay(failures):
+    return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** max(0, failures - 1))
+
+def refresh(path, api_url=API_URL, timeout=DEFAULT_TIMEOUT, session=None):
+    """
+    Fetch new weather data into the cache, returns the cache. Only one
+    refresh runs at a time, a concurrent call returns None right away.
+    A failed refresh keeps the old data and delays the next attempt
+    exponentially.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.lock", "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return None
+
+        # The alarm bounds the whole refresh, requests' timeout only
+        # bounds each socket operation
+        previous = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.alarm(timeout)
+        try:
+            data = get_weather(api_url, timeout, session)
+            error = None
+        except Exception as e:
+            data, error = None, e
+        finally:
+            signal.alarm(0)
+            signal.signal(signal.SIGALRM, previous)
+
+        cache = load_cache(path)
+        now = time.time()
+        if data is not None:
+            cache.update(fetched_at=now, data=data, failures=0, retry_at=0)
+        else:
+            print(f"Error: Unable to fetch weather data - {error}", file=sys.stderr)
+            cache["failures"] = cache.get("failures", 0) + 1
+            cache["retry_at"] = now + backoff_delay(cache["failures"])
+        try:
+            save_cache(path, cache)
+        except OSError as e:
+            # The fetched data is still returned, only the next run refetches
+            print(f"Error: Unable to write weather cache - {e}", file=sys.stderr)
+        return cache
+
+def refresh_in_background(args):
+    """Refresh in a detached process, so waybar gets the stale value right away"""
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--refresh",
+         "--api-url", args.api_url, "--cache", args.cache, "--timeout", str(args.timeout)],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
 
 # Format weather output for Waybar
 def format_weather(data):
@@ -91,8 +214,7 @@ def format_weather(data):
 
     return f"{icon} {condition_text}, {temperature}°C"
 
-def main():
-    weather_data = get_weather()
+def render(weather_data):
     output = format_weather(weather_data)
     
     # Prepare tooltip with more detailed information
@@ -112,7 +234,127 @@ def main():
         tooltip += f"Wind Direction: {current_weather.get('wind_degree', 'N/A')}°\n"
         tooltip += f"Humidity: {current_weather.get('humidity', 'N/A')}%"
     
-    print(json.dumps({"text": output, "tooltip": tooltip}))
+    return {"text": output, "tooltip": tooltip}
+
+def watch_connectivity(wake):
+    """Set wake whenever NetworkManager reports that connectivity is back"""
+    for cmd in NM_MONITORS:
+        try:
+            proc = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                env={**os.environ, "LC_ALL": "C"},
+            )
+        except FileNotFoundError:
+            continue
+        atexit.register(proc.terminate)
+        for line in proc.stdout:
+            if NM_CONNECTED.search(line):
+                wake.set()
+        proc.wait()
+        return
+    print("Warning: nmcli and gdbus not found, not watching connectivity", file=sys.stderr)
+
+def next_fetch_time(cache, ttl, interval):
+    """When the daemon fetches next: the retry time after a failure, else the
+    first interval-aligned tick once the cached data expires"""
+    if cache.get("failures"):
+        return cache.get("retry_at", 0)
+    if cache.get("data") is None:
+        return 0
+    due = cache.get("fetched_at", 0) + ttl
+    return math.ceil(due / interval) * interval
+
+def emit(output, last):
+    """Print output as a JSON line unless it's what waybar already shows"""
+    line = json.dumps(output)
+    if line != last:
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+    return line
+
+def run_daemon(args):
+    """
+    Long running mode: one process and one pooled HTTP session, a JSON line
+    printed only when the text or tooltip changes. Fetches happen on
+    interval-aligned ticks and right away when connectivity comes back.
+    """
+    import requests
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    signal.signal(signal.SIGPIPE, signal.SIG_DFL)
+
+    session = requests.Session()
+    interval = args.interval or args.ttl
+    wake = threading.Event()
+    threading.Thread(target=watch_connectivity, args=(wake,), daemon=True).start()
+
+    # Show the cached weather right away, even when stale, instead of
+    # leaving the module empty until the first refresh finishes
+    last = None
+    cache = load_cache(args.cache)
+    if cache.get("data") is not None:
+        last = emit(render(cache.get("data")), last)
+    reconnected = False
+    while True:
+        cache = load_cache(args.cache)
+        now = time.time()
+        if not is_fresh(cache, args.ttl) or cache.get("failures"):
+            # Connectivity coming back skips the backoff delay
+            if reconnected or now >= cache.get("retry_at", 0):
+                cache = refresh(args.cache, args.api_url, args.timeout, session) or load_cache(args.cache)
+        last = emit(render(cache.get("data")), last)
+
+        # A few seconds at least, e.g. when another process held the refresh lock
+        next_at = max(next_fetch_time(cache, args.ttl, interval), time.time() + 5)
+        reconnected = False
+        while time.time() < next_at:
+            if wake.wait(timeout=min(MAX_SLEEP, next_at - time.time())):
+                wake.clear()
+                reconnected = True
+                break
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Weather module for waybar")
+    parser.add_argument("--ttl", type=int, default=DEFAULT_TTL,
+                        help="Seconds the cached weather is used without refreshing it")
+    parser.add_argument("--timeout", type=int, default=DEFAULT_TIMEOUT,
+                        help="Hard timeout of a refresh in seconds")
+    parser.add_argument("--cache", default=CACHE_PATH, help="Cache file")
+    parser.add_argument("--api-url", default=API_URL, help="WeatherAPI.com base URL")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Only refresh the cache, without printing anything")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Keep running and print a JSON line whenever the weather changes")
+    parser.add_argument("--interval", type=int, default=None,
+                        help="Seconds between the daemon's aligned fetch ticks (default: the TTL)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+
+    if args.refresh:
+        refresh(args.cache, args.api_url, args.timeout)
+        return
+    if args.daemon:
+        try:
+            run_daemon(args)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    cache = load_cache(args.cache)
+    if not is_fresh(cache, args.ttl) and time.time() >= cache.get("retry_at", 0):
+        if cache.get("data") is None:
+            # Nothing to show yet, wait for the first fetch
+            cache = refresh(args.cache, args.api_url, args.timeout) or cache
+        else:
+            # Stale while revalidate
+            refresh_in_background(args)
+
+    print(json.dumps(render(cache.get("data"))))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
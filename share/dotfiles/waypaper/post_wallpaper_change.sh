@@ -84,14 +84,52 @@ reload_services() {
     hyprctl reload || { echo "[Error]::Failed to reload hyprland"; exit 1; }
 }
 
+# Set the wallpaper with swww. waypaper's backend is "none", so the screen
+# sized variants are applied instead of swww decoding the full size original
+set_wallpaper() {
+    local wallpaper_path=$1
+
+    swww query &> /dev/null || { swww-daemon &> /dev/null & disown; sleep 0.5; }
+    if command -v wallpaper_variants &> /dev/null && wallpaper_variants "$wallpaper_path"; then
+        return
+    fi
+    swww img "$wallpaper_path" --transition-type fade --transition-step 10 \
+        --transition-duration 1 --transition-fps 60 || { echo "[Error]::Failed to set wallpaper"; exit 1; }
+}
+
+# Screen sized variant of the wallpaper, much cheaper to process than the original
+screen_sized_wallpaper() {
+    local wallpaper_path=$1
+    command -v wallpaper_variants &> /dev/null && wallpaper_variants --prepare "$wallpaper_path" 2> /dev/null \
+        || echo "$wallpaper_path"
+}
+
 # Main
 if [[ -n $WALLPAPER_PATH ]]; then
-    generate_pywal_colors "$WALLPAPER_PATH"
-    sleep 0.4
-    update_hyprland_colors
-    sleep 0.2
-    reload_services
-    store_blurred_wallpaper "$WALLPAPER_PATH"
+    set_wallpaper "$WALLPAPER_PATH"
+    # The variants were just made, this only looks up the largest one
+    SOURCE_PATH=$(screen_sized_wallpaper "$WALLPAPER_PATH")
+    # Colors are cached by and recorded for the original, the variant only
+    # provides the pixels
+    if command -v wallpaper_colors &> /dev/null && wallpaper_colors "$WALLPAPER_PATH" --source "$SOURCE_PATH"; then
+        # Colors, colors.conf and the blurred wallpaper in one cached pass
+        echo "[Debug]::Generated colors and blurred wallpaper"
+        reload_services
+    else
+        # pywal records the image it is given, so it gets the original
+        generate_pywal_colors "$WALLPAPER_PATH"
+        sleep 0.4
+        if command -v theme_palette &> /dev/null; then
+            theme_palette hypr || { echo "[Error]::Failed to update Hyprland colors"; exit 1; }
+        else
+            update_hyprland_colors
+        fi
+        sleep 0.2
+        reload_services
+        store_blurred_wallpaper "$WALLPAPER_PATH"
+    fi
+    # Pick up added/removed wallpapers for the next time the picker opens
+    command -v wallpaper_catalog &> /dev/null && (wallpaper_catalog &> /dev/null &)
     echo "[Success]::Wallpaper changed successfully."
 else
     echo "[Error]::No wallpaper path provided."
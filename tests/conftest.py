@@ -0,0 +1,36 @@
+from pathlib import Path
+from typing import Callable
+import os
+import stat
+import sys
+import tempfile
+
+import pytest
+
+# Paths are resolved from $HOME when SBDots modules are imported, keep them
+# (and the installer log) out of the real home directory
+os.environ["HOME"] = tempfile.mkdtemp(prefix="sbdots-tests-")
+(Path(os.environ["HOME"]) / ".cache").mkdir()
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "lib"))
+
+
+@pytest.fixture
+def fake_bin(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Callable[[str, str], Path]:
+    """
+    Returns a function writing an executable script to a bin dir that is put
+    first on PATH, so it shadows the real command of that name.
+    """
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+    def write(name: str, script: str) -> Path:
+        path = bin_dir / name
+        path.write_text(script)
+        path.chmod(path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+        return path
+
+    return write
+
@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+from includes.paths import PYWAL_CACHE_DIR
+from misc import apply_wallpaper as apply_module, wallpaper_colors, wallpaper_variants
+from misc.apply_wallpaper import apply_wallpaper
+from misc.wallpaper_variants import Monitor
+
+
+def test_colors_and_blur_are_generated_without_waypaper(tmp_path, fake_bin, monkeypatch):
+    wallpaper = tmp_path / "default.jpg"
+    Image.linear_gradient("L").convert("RGB").resize((1600, 900)).save(wallpaper)
+    # Kept out of ~/.config, other tests link the dotfiles there
+    waypaper_config = tmp_path / "waypaper/config.ini"
+    waypaper_config.parent.mkdir()
+    waypaper_config.write_text(f"[Settings]\nwallpaper = {wallpaper}\nbackend = none\n")
+    colors_conf = tmp_path / "hypr/configs/colors.conf"
+    blurred = tmp_path / "wallpaper/blurred_wallpaper.jpg"
+    monkeypatch.setattr(wallpaper_variants, "WAYPAPER_CONFIG", waypaper_config)
+    monkeypatch.setattr(wallpaper_colors, "HYPR_COLORS_CONF", colors_conf)
+    monkeypatch.setattr(wallpaper_colors, "BLURRED_WALLPAPER", blurred)
+    calls = tmp_path / "calls"
+    fake_bin("swww", f'#!/bin/sh\necho "swww $*" >> {calls}\n')
+    fake_bin("waypaper", f'#!/bin/sh\necho "waypaper $*" >> {calls}\nexit 1\n')
+    monkeypatch.setattr(apply_module, "read_monitors", lambda: [Monitor("DP-1", 320, 180)])
+
+    assert apply_wallpaper()
+
+    # What the post command would have made, for hyprlock, rofi and Hyprland
+    assert blurred.is_file()
+    assert colors_conf.read_text().strip()
+    assert (PYWAL_CACHE_DIR / "wal").read_text() == str(wallpaper)
+    lines = calls.read_text().splitlines()
+    assert len(lines) == 1 and lines[0].startswith("swww img --outputs DP-1")
@@ -0,0 +1,222 @@
+from pathlib import Path
+from typing import Dict, List, Tuple
+import os
+
+import pytest
+
+pytest.importorskip("rich")
+pytest.importorskip("pyfiglet")
+
+from includes.library import installed_packages
+from modules.packages import AURBuildExecutor
+
+ARCH = os.uname().machine
+
+# AUR pkgbase -> .SRCINFO lines, split packages have several pkgname sections
+AUR = {
+    "app": ["depends = libapp", "depends = sh", "depends = libfoo.so>=2"],
+    "libapp": ["depends = bash"],
+    "tool": ["depends = app"],
+    "broken": ["depends = ghost-dep"],
+    "suite": [
+        "makedepends = bash",
+        "depends_not-an-arch = ghost-dep",
+        f"depends_{ARCH} = libapp",
+        "pkgname = suite-core",
+        "pkgname = suite-gui",
+        "\tdepends = suite-core",
+    ],
+    **{f"leaf{i}": ["depends = bash"] for i in range(6)},
+}
+INSTALLED = ["bash"]
+# Repo packages, and the provider names they satisfy
+REPO = {"foo": ["libfoo.so"]}
+# Seconds every makepkg build takes
+BUILD_TIME = 0.3
+
+
+def _pkgnames(base: str) -> List[str]:
+    names = [line.split(" = ")[1] for line in AUR[base] if line.startswith("pkgname = ")]
+    return names or [base]
+
+
+def _srcinfo(base: str) -> str:
+    lines = [f"pkgbase = {base}"]
+    if not any(line.startswith("pkgname = ") for line in AUR[base]):
+        lines += [f"\t{line}" for line in AUR[base]] + [f"pkgname = {base}"]
+    else:
+        lines += [line if line.startswith(("pkgname", "\t")) else f"\t{line}" for line in AUR[base]]
+    return "\n".join(lines) + "\n"
+
+
+@pytest.fixture
+def stubs(fake_bin, tmp_path):
+    """
+    Fake yay, makepkg, pacman and sudo logging to tmp_path/calls. makepkg
+    builds take BUILD_TIME and log their start and end to tmp_path/builds.
+    """
+    calls = tmp_path / "calls"
+    builds = tmp_path / "builds"
+    srcinfo = tmp_path / "srcinfo"
+    srcinfo.mkdir()
+    for base in AUR:
+        (srcinfo / base).write_text(_srcinfo(base))
+    info = "".join(f"Name            : {name}\nPackage Base    : {base}\n\n"
+                   for base in AUR for name in _pkgnames(base))
+    (tmp_path / "aur-info").write_text(info)
+
+    satisfied = " ".join(INSTALLED + ["sh"])
+    repo_names = " ".join(REPO)
+    resolvable = " ".join([*REPO, *(p for provides in REPO.values() for p in provides)])
+
+    fake_bin("yay", f"""#!/bin/sh
+echo "yay $*" >> {calls}
+case "$1" in
+    -G)
+        base="$3"
+        [ -f "{srcinfo}/$base" ] || exit 1
+        mkdir -p "$base" && cp "{srcinfo}/$base" "$base/.SRCINFO" ;;
+    -Si) cat {tmp_path / "aur-info"} ;;
+esac
+""")
+    fake_bin("makepkg", f"""#!/bin/sh
+base="$(basename "$PWD")"
+names="$(sed -n 's/^pkgname = //p' .SRCINFO)"
+case "$1" in
+    --packagelist) for name in $names; do echo "$PWD/$name-1-1-x86_64.pkg.tar.zst"; done ;;
+    *)
+        echo "makepkg $base $*" >> {calls}
+        echo "start $base $(date +%s.%N)" >> {builds}
+        sleep {BUILD_TIME}
+        for name in $names; do touch "$name-1-1-x86_64.pkg.tar.zst"; done
+        echo "end $base $(date +%s.%N)" >> {builds} ;;
+esac
+""")
+    fake_bin("pacman", f"""#!/bin/sh
+echo "pacman $*" >> {calls}
+op="$1"; shift
+case "$op" in
+    -Qq) for p in {" ".join(INSTALLED)}; do echo "$p"; done ;;
+    -T)
+        status=0
+        for dep in "$@"; do
+            case " {satisfied} " in *" ${{dep%%[<>=]*}} "*) ;; *) echo "$dep"; status=127 ;; esac
+        done
+        exit $status ;;
+    -Si)
+        status=1
+        for p in "$@"; do
+            case " {repo_names} " in *" $p "*) echo "Name            : $p"; echo; status=0 ;; esac
+        done
+        exit $status ;;
+    -Sp)
+        for p in "$@"; do
+            case "$p" in -*|%n) continue ;; esac
+            case " {resolvable} " in *" $p "*) ;; *) exit 1 ;; esac
+        done ;;
+esac
+""")
+    fake_bin("sudo", f"""#!/bin/sh
+echo "sudo $*" >> {calls}
+""")
+
+    installed_packages.refresh()
+    yield calls
+    installed_packages.refresh()
+
+
+def _calls(path: Path, prefix: str):
+    return [line for line in path.read_text().splitlines() if line.startswith(prefix)]
+
+
+def _build_spans(builds: Path) -> Dict[str, Tuple[float, float]]:
+    """pkgbase -> (start, end) of its makepkg build"""
+    starts: Dict[str, float] = {}
+    spans: Dict[str, Tuple[float, float]] = {}
+    for line in builds.read_text().splitlines():
+        event, base, at = line.split()
+        if event == "start":
+            starts[base] = float(at)
+        else:
+            spans[base] = (starts[base], float(at))
+    return spans
+
+
+def _max_concurrent(spans: Dict[str, Tuple[float, float]]) -> int:
+    events = sorted([(start, 1) for start, _ in spans.values()] + [(end, -1) for _, end in spans.values()])
+    running = peak = 0
+    for _, delta in events:
+        running += delta
+        peak = max(peak, running)
+    return peak
+
+
+def test_builds_dependencies_first_and_resolves_providers(stubs, tmp_path):
+    executor = AURBuildExecutor(["tool"], jobs=2, build_dir=tmp_path / "aur")
+
+    assert executor.run() == []
+
+    # sh is provided by an installed package, libfoo.so by the repo package foo
+    installs = [line for line in _calls(stubs, "yay -S ") if not line.startswith("yay -Si")]
+    assert len(installs) == 1
+    assert "libfoo.so" in installs[0].split()
+    assert "--asdeps" in installs[0]
+    fetched = {line.split()[-1] for line in _calls(stubs, "yay -G")}
+    assert fetched == {"tool", "app", "libapp"}
+
+    builds = [line.split()[1] for line in _calls(stubs, "makepkg")]
+    assert builds.index("libapp") < builds.index("app") < builds.index("tool")
+
+    # Pulled-in dependencies are installed as such, the requested package is not
+    staged = _calls(stubs, "sudo pacman -U")
+    assert [("libapp" in line, "--asdeps" in line) for line in staged[:2]] == [(True, True), (False, True)]
+    assert "tool-1-1" in staged[-1] and "--asdeps" not in staged[-1]
+
+
+def test_requested_packages_are_not_installed_as_dependencies(stubs, tmp_path):
+    executor = AURBuildExecutor(["app", "libapp"], jobs=2, build_dir=tmp_path / "aur")
+
+    assert executor.run() == []
+
+    staged = _calls(stubs, "sudo pacman -U")
+    assert staged and all("--asdeps" not in line for line in staged)
+
+
+def test_unresolvable_dependency_only_fails_its_dependents(stubs, tmp_path):
+    executor = AURBuildExecutor(["broken", "libapp"], jobs=2, build_dir=tmp_path / "aur")
+
+    failed = executor.run()
+
+    assert sorted(failed) == ["broken", "ghost-dep"]
+    assert [line.split()[1] for line in _calls(stubs, "makepkg")] == ["libapp"]
+    assert "libapp-1-1" in _calls(stubs, "sudo pacman -U")[-1]
+
+
+def test_split_packages_are_fetched_and_built_by_pkgbase(stubs, tmp_path):
+    executor = AURBuildExecutor(["suite-gui"], jobs=2, build_dir=tmp_path / "aur")
+
+    assert executor.run() == []
+
+    # suite-gui pulls in its sibling suite-core, and libapp only for this
+    # architecture, the ghost-dep of another architecture is ignored
+    assert executor.bases["suite-gui"] == executor.bases["suite-core"] == "suite"
+    assert sorted(line.split()[-1] for line in _calls(stubs, "yay -G")) == ["libapp", "suite"]
+    assert [line.split()[1] for line in _calls(stubs, "makepkg")] == ["libapp", "suite"]
+
+    # Each package installs only its own artifact of the shared build
+    staged = _calls(stubs, "sudo pacman -U")
+    core, gui = staged[-2], staged[-1]
+    assert "suite-core-1-1" in core and "suite-gui" not in core and "--asdeps" in core
+    assert "suite-gui-1-1" in gui and "suite-core" not in gui and "--asdeps" not in gui
+
+
+@pytest.mark.parametrize("jobs", [1, 2, 3])
+def test_independent_builds_overlap_up_to_jobs(stubs, tmp_path, jobs):
+    leaves = [f"leaf{i}" for i in range(6)]
+    executor = AURBuildExecutor(leaves, jobs=jobs, build_dir=tmp_path / "aur")
+
+    assert executor.run() == []
+
+    spans = _build_spans(tmp_path / "builds")
+    assert sorted(spans) == leaves
+    assert _max_concurrent(spans) == jobs
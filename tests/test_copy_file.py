@@ -0,0 +1,101 @@
+from pathlib import Path
+import os
+import shutil
+import time
+
+import pytest
+
+from includes import library
+from includes.library import copy_file
+
+APPS = 12
+CONFIGS_PER_APP = 25
+IMAGES = 6
+IMAGE_SIZE = 4 << 20
+BENCH_RUNS = 3
+
+
+@pytest.mark.skipif(not Path("/proc/self/status").exists(), reason="needs procfs")
+def test_copies_files_with_unknown_size(tmp_path):
+    dest = tmp_path / "status"
+
+    copy_file(Path("/proc/self/status"), dest)
+
+    assert dest.read_text().startswith("Name:")
+
+
+def test_empty_file_keeps_fast_paths(tmp_path):
+    src = tmp_path / "empty"
+    src.touch()
+
+    assert copy_file(src, tmp_path / "copy") == "stream"
+    key = (os.stat(src).st_dev, os.stat(tmp_path).st_dev)
+    assert "copy_file_range" not in library._unsupported_copy_methods.get(key, set())
+
+
+def test_never_writes_through_a_hardlinked_dest(tmp_path):
+    src = tmp_path / "src"
+    dest = tmp_path / "dest"
+    src.write_bytes(b"wallpaper" * 1000)
+
+    assert copy_file(src, dest, hardlink=True) in ("reflink", "hardlink")
+    copy_file(src, dest)
+
+    assert src.read_bytes() == b"wallpaper" * 1000
+    assert dest.read_bytes() == src.read_bytes()
+
+
+def _dotfiles_tree(root: Path) -> Path:
+    """Many small configs in nested dirs, a few symlinks and large wallpapers."""
+    for app in range(APPS):
+        for i in range(CONFIGS_PER_APP):
+            conf = root / f"app{app}" / ("scripts" if i % 3 else "") / f"{i}.conf"
+            conf.parent.mkdir(parents=True, exist_ok=True)
+            conf.write_text(f"option_{i} = value\n" * 40)
+        (root / f"app{app}" / "current.conf").symlink_to("0.conf")
+    (root / "wallpapers").mkdir()
+    for i in range(IMAGES):
+        (root / "wallpapers" / f"{i}.png").write_bytes(os.urandom(IMAGE_SIZE))
+    return root
+
+
+def _tree(root: Path):
+    tree = {}
+    for path in root.rglob("*"):
+        rel = str(path.relative_to(root))
+        if path.is_symlink():
+            tree[rel] = ("link", os.readlink(path))
+        elif path.is_file():
+            tree[rel] = path.read_bytes()
+    return tree
+
+
+def _best_time(copy, src: Path, dest: Path) -> float:
+    best = float("inf")
+    for run in range(BENCH_RUNS):
+        start = time.perf_counter()
+        copy(src, dest / str(run))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def test_benchmark_against_shutil_copytree(tmp_path):
+    src = _dotfiles_tree(tmp_path / "src")
+
+    shutil_time = _best_time(
+        lambda s, d: shutil.copytree(s, d, symlinks=True), src, tmp_path / "shutil")
+    copy_time = _best_time(library.copy, src, tmp_path / "copy")
+    hardlink_time = _best_time(
+        lambda s, d: library.copy(s, d, hardlink=True), src, tmp_path / "hardlink")
+
+    expected = _tree(src)
+    for name in ("shutil", "copy", "hardlink"):
+        assert _tree(tmp_path / name / "0") == expected
+    image = src / "wallpapers" / "0.png"
+    assert (tmp_path / "hardlink/0/wallpapers/0.png").stat().st_ino == image.stat().st_ino
+    assert (tmp_path / "copy/0/wallpapers/0.png").stat().st_ino != image.stat().st_ino
+
+    # Per-file overhead must not eat what the fast paths save, and sharing
+    # the wallpapers' extents must beat copying their bytes
+    assert copy_time < shutil_time * 1.5
+    assert hardlink_time < shutil_time
@@ -0,0 +1,148 @@
+import threading
+import time
+
+import pytest
+
+from includes.credentials import SudoCredentials, RELEASED, VALID
+
+HOLDERS = 8
+INTERVAL = 0.1
+MINUTE = 60
+
+
+@pytest.fixture
+def sudo(fake_bin, tmp_path):
+    """sudo that always succeeds, logging its arguments."""
+    calls = tmp_path / "sudo.calls"
+    path = fake_bin("sudo", f"""#!/bin/sh
+echo "$*" >> {calls}
+""")
+    return str(path), calls
+
+
+def test_holders_share_one_refresher(sudo):
+    path, calls = sudo
+    credentials = SudoCredentials(interval=INTERVAL, sudo=path)
+
+    # Spinners and keep-alives of a whole install, all at once
+    subscriptions = [credentials.subscribe() for _ in range(HOLDERS)]
+    leases = [credentials.acquire() for _ in range(HOLDERS)]
+    time.sleep(INTERVAL * 5.5)
+    for lease in leases:
+        credentials.release(lease)
+    for subscription in subscriptions:
+        credentials.unsubscribe(subscription)
+
+    spawns = calls.read_text().splitlines()
+    assert spawns.count("-v") == 1
+    assert spawns.count("-k") == 1
+    # One refresh per interval, however many holders there are
+    assert 3 <= spawns.count("-n -v") <= 7
+    assert "-n true" not in spawns
+
+
+def test_release_does_not_look_like_expiry(sudo):
+    path, calls = sudo
+    credentials = SudoCredentials(interval=INTERVAL, sudo=path)
+    subscription = credentials.subscribe()
+    lease = credentials.acquire()
+    states = []
+
+    def watch():
+        while True:
+            state = credentials.wait(subscription)
+            if state is None:
+                return
+            states.append(state)
+
+    watcher = threading.Thread(target=watch)
+    watcher.start()
+    credentials.release(lease)
+    time.sleep(INTERVAL * 3.5)
+    credentials.unsubscribe(subscription)
+    watcher.join(timeout=1)
+
+    assert states[-1] == RELEASED
+    assert set(states) <= {VALID, RELEASED}
+    # Nothing is probed while only subscribers are left after a release
+    spawns = calls.read_text().splitlines()
+    assert "-n true" not in spawns[spawns.index("-k"):]
+
+
+class FakeClock:
+    """Monotonic clock moved by hand, one refresher tick at a time."""
+
+    def __init__(self, credentials_factory):
+        self.now = 0.0
+        self.credentials = credentials_factory(self)
+
+    def __call__(self) -> float:
+        return self.now
+
+    def _settle(self) -> None:
+        """Wait for the refresher to go back to sleep until its next run."""
+        credentials = self.credentials
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            with credentials._cond:
+                if credentials._thread is None or (
+                        credentials._next_run is not None and credentials._next_run > self.now):
+                    return
+            time.sleep(0.001)
+        raise AssertionError(f"refresher stuck at {self.now}s")
+
+    def advance(self, seconds: float) -> None:
+        credentials = self.credentials
+        end = self.now + seconds
+        while self.now < end:
+            self._settle()
+            with credentials._cond:
+                next_run = credentials._next_run
+                self.now = min(end, next_run) if next_run is not None else end
+                credentials._cond.notify_all()
+        self._settle()
+
+
+def test_thirty_minutes_of_spinners_and_keepalives(sudo):
+    path, calls = sudo
+    clock = FakeClock(lambda clock: SudoCredentials(interval=MINUTE, sudo=path, clock=clock))
+    credentials = clock.credentials
+    seen = {}
+
+    def spinner(name, subscription):
+        seen[name] = []
+        while True:
+            state = credentials.wait(subscription, timeout=5)
+            if state is None:
+                return
+            seen[name].append(state)
+            if state == RELEASED:
+                credentials.unsubscribe(subscription)
+
+    spinners = [threading.Thread(target=spinner, args=(i, credentials.subscribe()))
+                for i in range(HOLDERS)]
+    for thread in spinners:
+        thread.start()
+    # Keep-alives of the package, dotfiles and themes steps, the last one capped
+    packages = credentials.acquire()
+    dotfiles = credentials.acquire()
+    themes = credentials.acquire(max_duration=10 * MINUTE)
+
+    clock.advance(10 * MINUTE)
+    credentials.release(dotfiles)
+    clock.advance(10 * MINUTE)
+    assert not credentials.is_held(themes)
+    credentials.release(themes)
+    credentials.release(packages)
+    clock.advance(10 * MINUTE)
+    for thread in spinners:
+        thread.join(timeout=5)
+
+    spawns = calls.read_text().splitlines()
+    # One prompt, one refresh per minute while a lease was held, one -k
+    assert spawns.count("-v") == 1
+    assert spawns.count("-n -v") == 20
+    assert spawns.count("-k") == 1
+    assert "-n true" not in spawns
+    assert len(spawns) == 22
+    assert all(states == [VALID, RELEASED] for states in seen.values())
@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("rich")
+pytest.importorskip("pyfiglet")
+
+from core import installer
+from core.installer import SBDotsInstaller
+from includes.journal import InstallJournal
+from includes.paths import USER_CONFIGS_DIR, USER_DOTFILES_DIR, USER_WALLPAPERS_DIR
+from modules import DotfilesInstaller
+
+
+@pytest.fixture
+def sbdots(monkeypatch):
+    instance = SBDotsInstaller()
+    instance.packages_installer = SimpleNamespace(groups={"Core packages": ["hyprland", "kitty"]})
+    monkeypatch.setattr(installer, "installed_packages", {"hyprland", "kitty"})
+    return instance
+
+
+def test_packages_fingerprint_tracks_removed_packages(sbdots, tmp_path):
+    journal = InstallJournal(tmp_path / "journal.json")
+    journal.record("Packages", sbdots._packages_fingerprint())
+
+    assert journal.is_done("Packages", sbdots._packages_fingerprint())
+    installer.installed_packages.discard("kitty")
+    assert not journal.is_done("Packages", sbdots._packages_fingerprint())
+
+
+def test_dotfiles_fingerprint_tracks_links(sbdots, tmp_path):
+    components = DotfilesInstaller().dotfiles_components
+    USER_CONFIGS_DIR.mkdir(parents=True, exist_ok=True)
+    for component in components:
+        (USER_DOTFILES_DIR / component).mkdir(parents=True, exist_ok=True)
+        (USER_CONFIGS_DIR / component).symlink_to(USER_DOTFILES_DIR / component)
+
+    journal = InstallJournal(tmp_path / "journal.json")
+    journal.record("Dotfiles", sbdots._dotfiles_fingerprint())
+    assert journal.is_done("Dotfiles", sbdots._dotfiles_fingerprint())
+
+    # A broken link (its target is gone) must be repaired
+    (USER_DOTFILES_DIR / "kitty").rmdir()
+    assert not journal.is_done("Dotfiles", sbdots._dotfiles_fingerprint())
+    (USER_DOTFILES_DIR / "kitty").mkdir()
+
+    # So must a config that no longer points at the dotfiles
+    (USER_CONFIGS_DIR / "rofi").unlink()
+    assert not journal.is_done("Dotfiles", sbdots._dotfiles_fingerprint())
+
+
+def test_wallpapers_fingerprint_tracks_deleted_wallpapers(sbdots, tmp_path):
+    USER_WALLPAPERS_DIR.mkdir(parents=True, exist_ok=True)
+    for name in ("a.png", "b.jpg"):
+        (USER_WALLPAPERS_DIR / name).write_bytes(name.encode())
+
+    journal = InstallJournal(tmp_path / "journal.json")
+    journal.record("Wallpapers", sbdots._wallpapers_fingerprint())
+    assert journal.is_done("Wallpapers", sbdots._wallpapers_fingerprint())
+
+    (USER_WALLPAPERS_DIR / "b.jpg").unlink()
+    assert not journal.is_done("Wallpapers", sbdots._wallpapers_fingerprint())
@@ -0,0 +1,79 @@
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from includes.library import bisect_failures, install_package_group, install_packages, installed_packages
+
+INSTALLED = ["bash", "git"]
+
+
+@pytest.fixture
+def yay(fake_bin, tmp_path):
+    """
+    Fake pacman with INSTALLED as the installed packages, and a fake yay
+    whose transactions fail when they contain a package named broken-*.
+    """
+    calls = tmp_path / "calls"
+    fake_bin("pacman", f"""#!/bin/sh
+for p in {" ".join(INSTALLED)}; do echo "$p"; done
+""")
+    fake_bin("yay", f"""#!/bin/sh
+echo "$*" >> {calls}
+case " $* " in *" broken-"*) exit 1 ;; esac
+""")
+    installed_packages.refresh()
+    yield calls
+    installed_packages.refresh()
+
+
+def _transactions(calls: Path) -> List[List[str]]:
+    """Package names of every `yay -S` call, in order."""
+    return [[arg for arg in line.split()[1:] if not arg.startswith("-")]
+            for line in calls.read_text().splitlines()]
+
+
+def test_bisect_isolates_the_bad_items():
+    attempts: List[List[str]] = []
+
+    def attempt(items: List[str]) -> bool:
+        attempts.append(items)
+        return not any(item.startswith("bad") for item in items)
+
+    items = [f"pkg-{i}" for i in range(16)]
+    items[5], items[12] = "bad-a", "bad-b"
+
+    assert bisect_failures(items, attempt) == ["bad-a", "bad-b"]
+    assert attempts[0] == items
+    # Only the halves holding a bad item are split further
+    assert len(attempts) < len(items)
+
+
+def test_bisect_succeeds_with_one_attempt():
+    attempts: List[List[str]] = []
+
+    assert bisect_failures(["a", "b", "c"], lambda items: attempts.append(items) or True) == []
+    assert attempts == [["a", "b", "c"]]
+
+
+def test_group_is_installed_in_one_transaction(yay):
+    assert install_package_group(["kitty", "bash", "rofi", "kitty"], "Applications")
+
+    # Installed and duplicated packages are dropped before the transaction
+    assert _transactions(yay) == [["kitty", "rofi"]]
+    assert "kitty" in installed_packages and "rofi" in installed_packages
+
+
+def test_failed_transaction_is_bisected_to_the_broken_package(yay):
+    packages = ["kitty", "rofi", "broken-theme", "waybar", "swaync"]
+
+    assert install_packages(packages, as_deps=True) == ["broken-theme"]
+
+    transactions = _transactions(yay)
+    assert transactions[0] == packages
+    # The packages next to the broken one still got installed
+    installed = {pkg for transaction in transactions if "broken-theme" not in transaction
+                 for pkg in transaction}
+    assert installed == {"kitty", "rofi", "waybar", "swaync"}
+    assert all("--asdeps" in line for line in yay.read_text().splitlines())
+    assert "broken-theme" not in installed_packages
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+pytest.importorskip("rich")
+pytest.importorskip("pyfiglet")
+
+from includes.library import installed_packages
+from modules import packages
+from modules.packages import PackagesInstaller
+
+GROUPS = {
+    "CORE_PKGS": ["bash", "hyprland", "yay", "kitty"],
+    "HYPRLAND_PKGS": ["hyprland", "hyprshot", "waybar"],
+    "THEMING_PKGS": ["nwg-look", "bibata-cursor-theme"],
+    "FONTS": ["ttf-jetbrains-mono-nerd"],
+    "APPLICATIONS": ["kitty", "wlogout"],
+    "OPTIONAL_PKGS": ["firefox"],
+}
+INSTALLED = ["bash", "yay"]
+REPO = ["hyprland", "kitty", "waybar", "nwg-look", "ttf-jetbrains-mono-nerd", "firefox"]
+
+
+@pytest.fixture
+def installer(fake_bin, tmp_path, monkeypatch):
+    """PackagesInstaller reading GROUPS, with a fake pacman knowing INSTALLED and REPO"""
+    calls = tmp_path / "calls"
+    for name, group in GROUPS.items():
+        path = tmp_path / f"{name}.json"
+        path.write_text(json.dumps(group))
+        monkeypatch.setattr(packages, name, path)
+
+    fake_bin("pacman", f"""#!/bin/sh
+echo "pacman $*" >> {calls}
+case "$1" in
+    -Qq) for p in {" ".join(INSTALLED)}; do echo "$p"; done ;;
+    -Si)
+        shift
+        for p in "$@"; do
+            case " {" ".join(REPO)} " in *" $p "*) echo "Name            : $p"; echo ;; esac
+        done
+        exit 1 ;;
+esac
+""")
+    installed_packages.refresh()
+    packages_installer = PackagesInstaller()
+    packages_installer.calls = calls
+    yield packages_installer
+    installed_packages.refresh()
+
+
+def test_plan_splits_repo_and_aur_packages(installer):
+    plan = installer.plan()
+
+    assert plan.repo == ["hyprland", "kitty", "waybar", "nwg-look", "ttf-jetbrains-mono-nerd"]
+    assert plan.aur == ["hyprshot", "bibata-cursor-theme", "wlogout"]
+    assert plan.already_installed == ["bash", "yay"]
+    # The optional applications are chosen later, they aren't planned
+    assert "firefox" not in plan.packages
+
+
+def test_plan_keeps_the_first_group_as_label(installer):
+    plan = installer.plan()
+
+    assert plan.label_of("hyprland") == "Core packages"
+    assert plan.label_of("kitty") == "Core packages"
+    assert plan.groups_of(plan.aur) == {
+        "Hyprland packages": ["hyprshot"],
+        "Theming packages": ["bibata-cursor-theme"],
+        "Applications": ["wlogout"],
+    }
+
+
+def test_plan_classifies_with_one_pacman_query(installer):
+    installer.plan()
+
+    queries = [line for line in installer.calls.read_text().splitlines() if line.startswith("pacman -Si")]
+    assert len(queries) == 1
+    assert "bash" not in queries[0].split()
@@ -0,0 +1,95 @@
+from pathlib import Path
+import time
+
+from includes.library import InstalledPackageIndex, run_command
+
+PACKAGE_COUNT = 5000
+# About the size of the package lists in share/packages
+LOOKUP_COUNT = 100
+
+
+def _fake_pacman(fake_bin, tmp_path: Path) -> Path:
+    """
+    pacman with PACKAGE_COUNT installed packages: -Qq lists them all,
+    -Qq <pkg> exits 1 for a package that isn't installed. Every invocation
+    is logged.
+    """
+    calls = tmp_path / "pacman.calls"
+    installed = tmp_path / "pacman.installed"
+    installed.write_text("".join(f"pkg-{i}\n" for i in range(PACKAGE_COUNT)))
+    fake_bin("pacman", f"""#!/bin/sh
+echo "$@" >> {calls}
+if [ $# -gt 1 ]; then
+    grep -qx "$2" {installed}
+    exit $?
+fi
+cat {installed}
+""")
+    return calls
+
+
+def test_index_beats_one_fork_per_package(fake_bin, tmp_path):
+    calls = _fake_pacman(fake_bin, tmp_path)
+    packages = [f"pkg-{i * (PACKAGE_COUNT // LOOKUP_COUNT)}" for i in range(LOOKUP_COUNT // 2)]
+    packages += [f"absent-{i}" for i in range(LOOKUP_COUNT // 2)]
+
+    # The previous is_installed: `pacman -Qq <pkg>` per lookup
+    start = time.perf_counter()
+    forked = [run_command(["pacman", "-Qq", package]).returncode == 0 for package in packages]
+    fork_time = time.perf_counter() - start
+    assert len(calls.read_text().splitlines()) == LOOKUP_COUNT
+    calls.unlink()
+
+    # The index, including the one `pacman -Qq` that fills it
+    start = time.perf_counter()
+    index = InstalledPackageIndex(db_path=tmp_path / "missing")
+    indexed = [package in index for package in packages]
+    index_time = time.perf_counter() - start
+
+    assert indexed == forked
+    assert forked.count(True) == LOOKUP_COUNT // 2
+    assert calls.read_text().splitlines() == ["-Qq"]
+    assert index_time < fork_time
+
+
+def test_lookups_fork_pacman_once(fake_bin, tmp_path):
+    calls = _fake_pacman(fake_bin, tmp_path)
+    index = InstalledPackageIndex(db_path=tmp_path / "missing")
+
+    hits = sum(f"pkg-{i}" in index for i in range(PACKAGE_COUNT))
+    misses = sum(f"absent-{i}" in index for i in range(PACKAGE_COUNT))
+
+    assert hits == PACKAGE_COUNT
+    assert misses == 0
+    assert calls.read_text().splitlines() == ["-Qq"]
+
+
+def test_reads_local_db_without_forking(fake_bin, tmp_path):
+    calls = _fake_pacman(fake_bin, tmp_path)
+    db = tmp_path / "local"
+    db.mkdir()
+    (db / "ALPM_DB_VERSION").write_text("9\n")
+    for i in range(PACKAGE_COUNT):
+        (db / f"lib32-pkg-{i}-1.2.3-1").mkdir()
+
+    index = InstalledPackageIndex(db_path=db)
+
+    assert "lib32-pkg-0" in index
+    assert f"lib32-pkg-{PACKAGE_COUNT - 1}" in index
+    assert "lib32-pkg" not in index
+    assert not calls.exists()
+
+
+def test_add_and_discard_update_the_snapshot(fake_bin, tmp_path):
+    calls = _fake_pacman(fake_bin, tmp_path)
+    index = InstalledPackageIndex(db_path=tmp_path / "missing")
+
+    index.add("hyprland")
+    index.discard("pkg-0")
+    assert "hyprland" in index
+    assert "pkg-0" not in index
+    assert len(calls.read_text().splitlines()) == 1
+
+    index.refresh()
+    assert "pkg-0" in index
+    assert len(calls.read_text().splitlines()) == 2
@@ -0,0 +1,45 @@
+from misc import palette
+from misc.palette import Palette, render_palette
+
+GTK4_CSS = """
+@define-color window_bg_color #1e1e2e;
+@define-color window_fg_color #cdd6f4;
+@define-color accent_color #89b4fa;
+@define-color accent_bg_color @accent_color;
+@define-color error_color #f38ba8;
+"""
+
+
+def _render(tmp_path, monkeypatch, css):
+    gtk = tmp_path / "gtk.css"
+    if css is not None:
+        gtk.write_text(css)
+    for name in ("waybar", "swaync"):
+        template = palette.CONSUMERS[name][1]
+        monkeypatch.setitem(palette.CONSUMERS, name, (tmp_path / name / "colors.css", template))
+    source = Palette(sources={"gtk": gtk, "pywal": tmp_path / "colors.css"},
+                     cache_path=tmp_path / "palette.json")
+    return render_palette(only=["waybar", "swaync"], palette=source)
+
+
+def test_waybar_and_swaync_get_the_gtk4_named_colors(tmp_path, monkeypatch):
+    written = _render(tmp_path, monkeypatch, GTK4_CSS)
+
+    assert written == [tmp_path / "waybar/colors.css", tmp_path / "swaync/colors.css"]
+    css = (tmp_path / "waybar/colors.css").read_text()
+    assert "@define-color theme_bg_color #1e1e2e;" in css
+    assert "@define-color theme_fg_color #cdd6f4;" in css
+    assert "@define-color accent_color #89b4fa;" in css
+    assert "@define-color error_color #f38ba8;" in css
+    # References aren't resolved, the GTK 3 theme keeps its own
+    assert "accent_bg_color" not in css
+    assert (tmp_path / "swaync/colors.css").read_text() == css
+    assert _render(tmp_path, monkeypatch, GTK4_CSS) == []
+
+
+def test_files_exist_without_a_gtk4_theme(tmp_path, monkeypatch):
+    _render(tmp_path, monkeypatch, None)
+
+    # Imported by the style sheets, so written even with nothing to override
+    css = (tmp_path / "waybar/colors.css").read_text()
+    assert "@define-color" not in css
@@ -0,0 +1,124 @@
+from pathlib import Path
+import io
+import os
+import shutil
+import subprocess
+import tarfile
+import time
+
+import pytest
+
+pytest.importorskip("rich")
+pytest.importorskip("pyfiglet")
+
+from includes.credentials import SudoCredentials
+from modules import packages
+from modules.packages import InstallPlan, PackagePrefetcher
+
+
+@pytest.fixture
+def credentials(monkeypatch):
+    """A fresh credential service for the prefetcher, not yet validated."""
+    service = SudoCredentials()
+    monkeypatch.setattr(packages, "sudo_credentials", service)
+    return service
+
+
+def _stub_sudo(fake_bin, calls: Path, delay: float = 0) -> None:
+    fake_bin("sudo", f"""#!/bin/sh
+echo "sudo $*" >> {calls}
+case "$*" in *-Sw*) sleep {delay} ;; esac
+""")
+
+
+def test_repo_prefetch_runs_in_background(fake_bin, tmp_path, credentials):
+    calls = tmp_path / "calls"
+    _stub_sudo(fake_bin, calls, delay=1)
+    assert credentials.authenticate()
+
+    start = time.monotonic()
+    prefetcher = PackagePrefetcher(InstallPlan(repo=["kitty", "rofi"])).start()
+    started = time.monotonic() - start
+    prefetcher.wait_repo()
+    waited = time.monotonic() - start
+
+    assert started < 0.5 <= waited
+    assert "sudo -n pacman -Sw --needed --noconfirm kitty rofi" in calls.read_text().splitlines()
+
+
+def test_repo_prefetch_never_prompts(fake_bin, tmp_path, credentials):
+    calls = tmp_path / "calls"
+    _stub_sudo(fake_bin, calls)
+
+    prefetcher = PackagePrefetcher(InstallPlan(repo=["kitty"])).start()
+    prefetcher.wait_repo()
+
+    assert not calls.exists()
+
+
+def test_aur_prefetch_downloads_sources(fake_bin, tmp_path):
+    # PKGBUILDs land in AUR_BUILD_DIR, which is under the test HOME
+    calls = tmp_path / "calls"
+    fake_bin("yay", """#!/bin/sh
+[ "$1" = "-G" ] || exit 0
+mkdir -p "$3" && echo "pkgbase = $3" > "$3/.SRCINFO"
+""")
+    fake_bin("makepkg", f"""#!/bin/sh
+echo "$(basename "$PWD") $*" >> {calls}
+""")
+
+    prefetcher = PackagePrefetcher(InstallPlan(aur=["wlogout", "hyprshot"])).start()
+    prefetcher.wait_aur()
+
+    assert sorted(calls.read_text().splitlines()) == [
+        "hyprshot --verifysource --noconfirm --nocolor",
+        "wlogout --verifysource --noconfirm --nocolor",
+    ]
+
+
+def _write_package(repo: Path, name: str, version: str) -> Path:
+    """Minimal package archive, only holding its .PKGINFO."""
+    pkginfo = (
+        f"pkgname = {name}\npkgbase = {name}\npkgver = {version}\n"
+        f"pkgdesc = SBDots test fixture\nurl = https://example.org\n"
+        f"builddate = 0\npackager = SBDots tests\nsize = 0\narch = any\n"
+    ).encode()
+    path = repo / f"{name}-{version}-any.pkg.tar.gz"
+    with tarfile.open(path, "w:gz") as tar:
+        info = tarfile.TarInfo(".PKGINFO")
+        info.size = len(pkginfo)
+        tar.addfile(info, io.BytesIO(pkginfo))
+    return path
+
+
+@pytest.mark.skipif(
+    shutil.which("pacman") is None or shutil.which("repo-add") is None or os.geteuid() != 0,
+    reason="needs pacman, repo-add and root for pacman -Sw")
+def test_repo_prefetch_from_file_repo(fake_bin, tmp_path, credentials):
+    repo = tmp_path / "repo"
+    db = tmp_path / "db"
+    cache = tmp_path / "cache"
+    for path in (repo, db, cache):
+        path.mkdir()
+
+    package = _write_package(repo, "sbdots-fixture", "1.0-1")
+    subprocess.run(["repo-add", "-q", repo / "sbdots-test.db.tar.gz", package], check=True)
+
+    conf = tmp_path / "pacman.conf"
+    conf.write_text(
+        f"[options]\nDBPath = {db}\nCacheDir = {cache}\nArchitecture = auto\n"
+        f"SigLevel = Never\n\n[sbdots-test]\nServer = file://{repo}\n")
+    subprocess.run(["pacman", "--config", conf, "-Sy"], check=True, capture_output=True)
+
+    # Run pacman against the test config, everything else is a no-op
+    fake_bin("sudo", f"""#!/bin/sh
+while [ "${{1#-}}" != "$1" ]; do shift; done
+[ $# -eq 0 ] && exit 0
+[ "$1" = pacman ] && shift && exec pacman --config {conf} "$@"
+exec "$@"
+""")
+    assert credentials.authenticate()
+
+    PackagePrefetcher(InstallPlan(repo=["sbdots-fixture"])).start().wait_repo()
+
+    assert (cache / package.name).is_file()
@@ -0,0 +1,93 @@
+from pathlib import Path
+import os
+import sys
+import time
+
+import pytest
+
+from includes.privileged import PrivilegedHelper, execute
+
+OPS = 2000
+INCLUDES_DIR = Path(__file__).resolve().parent.parent / "lib/includes"
+
+
+@pytest.fixture
+def helper_sudo(fake_bin, tmp_path):
+    """sudo running the helper unprivileged, logging every invocation."""
+    calls = tmp_path / "sudo.calls"
+    fake_bin("sudo", f"""#!{sys.executable}
+import os, sys
+sys.path.insert(0, "{INCLUDES_DIR}")
+import privileged
+with open("{calls}", "a") as f:
+    f.write(" ".join(sys.argv[1:]) + "\\n")
+os.geteuid = lambda: 0
+sys.argv = sys.argv[2:]
+privileged.main()
+""")
+    return calls
+
+
+def test_copy_only_reads_from_readable_dirs(tmp_path):
+    share = tmp_path / "share"
+    home = tmp_path / "home"
+    share.mkdir()
+    home.mkdir()
+    (share / "rules").write_text("rule")
+    (share / "escape").symlink_to("/etc/hostname")
+    allowed, readable = [str(home)], [str(share)]
+
+    assert execute({"op": "copy", "src": str(share / "rules"), "dest": str(home / "rules")},
+                   allowed, readable)["ok"]
+    for src in ("/etc/hostname", str(share / "escape"), str(home / "rules")):
+        result = execute({"op": "copy", "src": src, "dest": str(home / "copy")}, allowed, readable)
+        assert result == {"ok": False, "error": f"Source not allowed: {src}"}
+    assert not (home / "copy").exists()
+
+
+def test_batches_share_one_helper(helper_sudo, tmp_path):
+    share = tmp_path / "share"
+    home = tmp_path / "home"
+    share.mkdir()
+    (share / "rules").write_text("rule")
+    helper = PrivilegedHelper([home], readable_dirs=[share])
+
+    try:
+        start = time.perf_counter()
+        for i in range(OPS // 2):
+            assert helper.mkdir(home / f"single-{i}")
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = helper.run([
+            {"op": "mkdir", "path": str(home / f"batch-{i}")} for i in range(OPS // 2)
+        ])
+        batched = time.perf_counter() - start
+
+        assert helper.copy(share / "rules", home / "rules")
+    finally:
+        helper.close()
+
+    assert all(result["ok"] for result in results)
+    assert (home / f"batch-{OPS // 2 - 1}").is_dir()
+    assert (home / "rules").read_text() == "rule"
+    assert len(helper_sudo.read_text().splitlines()) == 1
+    # One round trip for the whole batch instead of one per operation
+    assert batched < single
+
+
+def test_broken_helper_is_stopped(fake_bin, tmp_path):
+    pid_file = tmp_path / "pid"
+    fake_bin("sudo", f"""#!/bin/sh
+echo $$ > {pid_file}
+read request
+echo "not json"
+exec sleep 60
+""")
+    helper = PrivilegedHelper([tmp_path])
+
+    result = helper.run([{"op": "mkdir", "path": str(tmp_path / "dir")}])
+
+    assert not result[0]["ok"]
+    with pytest.raises(ProcessLookupError):
+        os.kill(int(pid_file.read_text()), 0)
@@ -0,0 +1,39 @@
+from contextlib import nullcontext
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("rich")
+pytest.importorskip("pyfiglet")
+
+from core.installer import SBDotsInstaller
+from modules import packages
+from modules.packages import PackagesInstaller
+
+
+def test_pillow_users_wait_for_packages():
+    sbdots = SBDotsInstaller(dry_run=True)
+    sbdots.packages_installer = SimpleNamespace(groups={})
+    tasks = sbdots.build_task_graph().tasks
+
+    assert tasks["Wallpapers"].requires == []
+    assert sorted(tasks["Wallpaper catalog"].requires) == ["Packages", "Wallpapers"]
+    assert tasks["Optional applications"].requires == ["Packages"]
+
+
+@pytest.mark.parametrize("retry", [False, True])
+def test_optional_applications_never_prompt_with_collected_answers(monkeypatch, retry):
+    def prompt(*args, **kwargs):
+        raise AssertionError("prompted while other components are running")
+
+    attempts = []
+    monkeypatch.setattr(packages, "confirm", prompt)
+    monkeypatch.setattr(packages, "checklist", prompt)
+    monkeypatch.setattr(packages, "installed_packages", set())
+    monkeypatch.setattr(packages, "install_package", lambda pkg: attempts.append(pkg) and False)
+    monkeypatch.setattr(packages, "SudoKeepAlive", lambda **kwargs: nullcontext())
+    installer = PackagesInstaller.__new__(PackagesInstaller)
+    installer.dry_run = False
+
+    assert not installer.install_optional_applications(["firefox"], retry_failed=retry)
+    assert attempts == (["firefox", "firefox"] if retry else ["firefox"])
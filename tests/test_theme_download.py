@@ -0,0 +1,138 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List
+import http.client
+import io
+import os
+import threading
+import zipfile
+
+import pytest
+
+from misc.catppuccin_themes import ConnectionPool, DownloadCache, ThemeVariant, install_themes
+
+VARIANT = ThemeVariant("mocha", "blue")
+
+
+def _release_zip(marker: str) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zip_file:
+        zip_file.writestr(f"{VARIANT.name}/index.theme", f"[Desktop Entry]\nName={marker}\n")
+        # Stored incompressible data, so the body is large enough to cut short
+        zip_file.writestr(f"{VARIANT.name}/gtk-3.0/assets.bin", os.urandom(256 * 1024))
+    return buffer.getvalue()
+
+
+class ReleaseServer(ThreadingHTTPServer):
+    """Serves one release zip with an ETag, conditional and range requests."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), ReleaseHandler)
+        self.requests: List[Dict[str, str]] = []
+        self.truncate_next = False
+        self.publish("v1")
+
+    def publish(self, version: str) -> None:
+        self.body = _release_zip(version)
+        self.etag = f'"{version}"'
+
+    @property
+    def root(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/releases"
+
+
+class ReleaseHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        server: ReleaseServer = self.server
+        server.requests.append(dict(self.headers))
+        body, status = server.body, 200
+
+        if self.headers.get("If-None-Match") == server.etag:
+            self.send_response(304)
+            self.send_header("ETag", server.etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        range_header = self.headers.get("Range")
+        if range_header and self.headers.get("If-Range") == server.etag:
+            start = int(range_header.split("=")[1].rstrip("-"))
+            body, status = body[start:], 206
+
+        self.send_response(status)
+        self.send_header("ETag", server.etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if server.truncate_next:
+            server.truncate_next = False
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    release_server = ReleaseServer()
+    thread = threading.Thread(target=release_server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield release_server
+    release_server.shutdown()
+    release_server.server_close()
+
+
+def _installed_marker(themes: Path) -> str:
+    return (themes / VARIANT.name / "index.theme").read_text().split("Name=")[1].strip()
+
+
+def test_unchanged_release_is_not_downloaded_again(server, tmp_path):
+    cache = DownloadCache(tmp_path / "cache", ConnectionPool(timeout=5))
+    url = VARIANT.release_url(server.root)
+
+    first = cache.fetch(url)
+    second = cache.fetch(url)
+
+    assert first == second
+    assert first.read_bytes() == server.body
+    assert server.requests[-1]["If-None-Match"] == server.etag
+    cache.pool.close()
+
+
+def test_interrupted_download_resumes_with_range(server, tmp_path):
+    cache = DownloadCache(tmp_path / "cache", ConnectionPool(timeout=5))
+    url = VARIANT.release_url(server.root)
+
+    server.truncate_next = True
+    with pytest.raises((ConnectionError, http.client.HTTPException)):
+        cache.fetch(url)
+
+    blob = cache.fetch(url)
+
+    assert blob.read_bytes() == server.body
+    resume = server.requests[-1]
+    assert resume["Range"] == f"bytes={len(server.body) // 2}-"
+    assert resume["If-Range"] == server.etag
+    cache.pool.close()
+
+
+def test_changed_release_restarts_a_partial_download(server, tmp_path):
+    cache = DownloadCache(tmp_path / "cache", ConnectionPool(timeout=5))
+    themes = tmp_path / "themes"
+
+    server.truncate_next = True
+    assert install_themes([VARIANT], dest=themes, repo_root=server.root, cache=cache) == {VARIANT: False}
+
+    # The partial data belongs to v1, If-Range makes the server send all of v2
+    server.publish("v2")
+    assert install_themes([VARIANT], dest=themes, repo_root=server.root, cache=cache) == {VARIANT: True}
+
+    assert _installed_marker(themes) == "v2"
+    assert "Range" in server.requests[-1]
+    assert not list((tmp_path / "cache/partial").iterdir())
+    cache.pool.close()
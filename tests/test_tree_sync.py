@@ -0,0 +1,126 @@
+from pathlib import Path
+import os
+
+from includes.sync import TreeSync
+
+
+def _write(path: Path, content: str) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    return path
+
+
+def _sync(tmp_path: Path):
+    return TreeSync(tmp_path / "src", tmp_path / "dest", tmp_path / "manifest.json").run()
+
+
+def _tree(root: Path):
+    """Relative path -> file content or ("link", target), directories omitted"""
+    tree = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        for name in filenames + [d for d in dirnames if os.path.islink(os.path.join(dirpath, d))]:
+            path = Path(dirpath) / name
+            rel = str(path.relative_to(root))
+            tree[rel] = ("link", os.readlink(path)) if path.is_symlink() else path.read_text()
+    return tree
+
+
+def test_second_run_leaves_everything_unchanged(tmp_path):
+    src = tmp_path / "src"
+    _write(src / "kitty/kitty.conf", "font_size 11\n")
+    _write(src / "hypr/hyprland.conf", "source = colors.conf\n")
+    (src / "hypr/current.conf").symlink_to("hyprland.conf")
+
+    first = _sync(tmp_path)
+    second = _sync(tmp_path)
+
+    assert (first.copied, first.linked) == (2, 1)
+    assert (second.copied, second.linked, second.unchanged) == (0, 0, 3)
+    assert _tree(tmp_path / "dest") == _tree(src)
+
+
+def test_modified_and_touched_files(tmp_path):
+    src = tmp_path / "src"
+    conf = _write(src / "kitty/kitty.conf", "font_size 11\n")
+    theme = _write(src / "kitty/theme.conf", "background #1e1e2e\n")
+    _sync(tmp_path)
+
+    conf.write_text("font_size 12\n")
+    os.utime(theme, ns=(theme.stat().st_atime_ns, theme.stat().st_mtime_ns + 10**9))
+    result = _sync(tmp_path)
+
+    # The touched file only gets its metadata refreshed
+    assert (result.copied, result.updated) == (1, 1)
+    assert (tmp_path / "dest/kitty/kitty.conf").read_text() == "font_size 12\n"
+    assert (tmp_path / "dest/kitty/theme.conf").stat().st_mtime_ns == theme.stat().st_mtime_ns
+
+
+def test_type_changes_between_file_dir_and_symlink(tmp_path):
+    src = tmp_path / "src"
+    _write(src / "becomes-dir", "file\n")
+    _write(src / "becomes-file/inner.conf", "dir\n")
+    _write(src / "becomes-link", "file\n")
+    (src / "was-link").symlink_to("becomes-dir")
+    (src / "dir-link").symlink_to("becomes-file")
+    assert _sync(tmp_path).ok
+
+    (src / "becomes-dir").unlink()
+    _write(src / "becomes-dir/inner.conf", "now a dir\n")
+    (src / "becomes-file/inner.conf").unlink()
+    (src / "becomes-file").rmdir()
+    _write(src / "becomes-file", "now a file\n")
+    (src / "becomes-link").unlink()
+    (src / "becomes-link").symlink_to("becomes-file")
+    (src / "was-link").unlink()
+    _write(src / "was-link", "now a file\n")
+    (src / "dir-link").unlink()
+    _write(src / "dir-link/inner.conf", "now a real dir\n")
+
+    result = _sync(tmp_path)
+
+    assert result.ok
+    dest = tmp_path / "dest"
+    assert _tree(dest) == _tree(src)
+    assert (dest / "becomes-dir").is_dir() and not (dest / "dir-link").is_symlink()
+    assert (dest / "becomes-link").is_symlink()
+
+
+def test_deleted_sources_are_removed_but_user_files_stay(tmp_path):
+    src = tmp_path / "src"
+    _write(src / "waybar/config.jsonc", "{}\n")
+    _write(src / "waybar/scripts/weather.py", "print()\n")
+    _write(src / "old/only.conf", "x\n")
+    _sync(tmp_path)
+    dest = tmp_path / "dest"
+    _write(dest / "waybar/scripts/mine.sh", "user file\n")
+
+    (src / "waybar/scripts/weather.py").unlink()
+    (src / "old/only.conf").unlink()
+    (src / "old").rmdir()
+    result = _sync(tmp_path)
+
+    assert result.ok and result.deleted == 2
+    assert not (dest / "waybar/scripts/weather.py").exists()
+    assert not (dest / "old").exists()
+    # Never synced, so never deleted, along with the dir holding it
+    assert (dest / "waybar/scripts/mine.sh").read_text() == "user file\n"
+
+
+def test_dir_replaced_by_symlink_never_deletes_through_it(tmp_path):
+    src = tmp_path / "src"
+    _write(src / "rofi/config.rasi", "synced\n")
+    (src / "rofi/themes").mkdir()
+    _sync(tmp_path)
+    outside = _write(tmp_path / "outside/config.rasi", "not ours\n")
+    (outside.parent / "themes").mkdir()
+
+    (src / "rofi/config.rasi").unlink()
+    (src / "rofi/themes").rmdir()
+    (src / "rofi").rmdir()
+    (src / "rofi").symlink_to(outside.parent)
+    result = _sync(tmp_path)
+
+    assert result.ok
+    assert (tmp_path / "dest/rofi").is_symlink()
+    assert outside.read_text() == "not ours\n"
+    assert (outside.parent / "themes").is_dir()
@@ -0,0 +1,93 @@
+import os
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from misc import wallpaper_catalog
+from misc.wallpaper_catalog import WallpaperCatalog
+
+
+def _image(path, size, color):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.new("RGB", size, color).save(path)
+    return path
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    """Catalog of tmp_path/walls, recording the paths it decodes."""
+    decoded = []
+    decode = WallpaperCatalog._decode
+
+    def recording_decode(self, to_decode, wallpapers):
+        decoded.extend(path for paths in to_decode.values() for path in paths)
+        return decode(self, to_decode, wallpapers)
+
+    monkeypatch.setattr(WallpaperCatalog, "_decode", recording_decode)
+    instance = WallpaperCatalog(dirs=[tmp_path / "walls"], path=tmp_path / "catalog.json",
+                                thumbnails_dir=tmp_path / "thumbs", workers=2)
+    return instance, decoded
+
+
+def test_unchanged_wallpapers_are_not_read_again(tmp_path, catalog, monkeypatch):
+    catalog, decoded = catalog
+    red = _image(tmp_path / "walls/red.png", (640, 360), "red")
+    first = catalog.update()[str(red)]
+    assert (first["width"], first["height"], first["dominant"]) == (640, 360, "#ff0000")
+    assert os.path.isfile(first["thumbnail"])
+
+    hashed = []
+    monkeypatch.setattr(wallpaper_catalog, "file_hash", lambda path: hashed.append(path))
+    decoded.clear()
+    assert catalog.update()[str(red)] == first
+    assert hashed == [] and decoded == []
+
+
+def test_modified_wallpaper_gets_a_new_thumbnail(tmp_path, catalog):
+    catalog, decoded = catalog
+    wall = _image(tmp_path / "walls/wall.png", (640, 360), "red")
+    old = catalog.update()[str(wall)]
+
+    # New content and size, the old thumbnail is no longer referenced
+    _image(wall, (1280, 720), "blue")
+    decoded.clear()
+    new = catalog.update()[str(wall)]
+
+    assert decoded == [str(wall)]
+    assert new["hash"] != old["hash"] and new["thumbnail"] != old["thumbnail"]
+    assert (new["width"], new["height"], new["dominant"]) == (1280, 720, "#0000ff")
+    assert os.path.isfile(new["thumbnail"]) and not os.path.exists(old["thumbnail"])
+
+
+def test_touched_or_renamed_wallpaper_is_not_decoded_again(tmp_path, catalog):
+    catalog, decoded = catalog
+    wall = _image(tmp_path / "walls/wall.png", (640, 360), "green")
+    old = catalog.update()[str(wall)]
+
+    # Same content: a new mtime and a copy under another name only rehash
+    st = wall.stat()
+    os.utime(wall, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    copy = tmp_path / "walls/nested/copy.png"
+    copy.parent.mkdir()
+    copy.write_bytes(wall.read_bytes())
+    decoded.clear()
+    wallpapers = catalog.update()
+
+    assert decoded == []
+    assert wallpapers[str(wall)]["mtime_ns"] == st.st_mtime_ns + 10**9
+    assert wallpapers[str(copy)]["thumbnail"] == wallpapers[str(wall)]["thumbnail"] == old["thumbnail"]
+    assert os.path.isfile(old["thumbnail"])
+
+
+def test_deleted_wallpaper_drops_its_entry_and_thumbnail(tmp_path, catalog):
+    catalog, decoded = catalog
+    keep = _image(tmp_path / "walls/keep.png", (64, 64), "white")
+    gone = _image(tmp_path / "walls/gone.png", (64, 64), "black")
+    thumbnail = catalog.update()[str(gone)]["thumbnail"]
+
+    gone.unlink()
+    wallpapers = catalog.update()
+
+    assert list(wallpapers) == [str(keep)]
+    assert not os.path.exists(thumbnail)
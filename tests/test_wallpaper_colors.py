@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+from includes.paths import PYWAL_CACHE_DIR
+from misc.wallpaper_catalog import wallpaper_hash
+from misc.wallpaper_colors import WallpaperColorEngine
+
+
+def test_colors_are_recorded_for_the_original(tmp_path):
+    original = tmp_path / "original.png"
+    variant = tmp_path / "variant.jpg"
+    Image.linear_gradient("L").convert("RGB").resize((800, 600)).save(original)
+    Image.open(original).resize((200, 150)).save(variant)
+    engine = WallpaperColorEngine(cache_dir=tmp_path / "cache")
+
+    assert engine.apply(original, pixels=variant)
+
+    digest = wallpaper_hash(original)
+    assert (tmp_path / "cache" / f"{digest}.json").is_file()
+    assert (tmp_path / "cache" / f"{digest}-blur.jpg").is_file()
+    colors = json.loads((PYWAL_CACHE_DIR / "colors.json").read_text())
+    assert colors["wallpaper"] == str(original)
+    assert (PYWAL_CACHE_DIR / "wal").read_text() == str(original)
+
+    # The variant may be pruned, the cached results stay usable
+    variant.unlink()
+    assert engine.apply(original)
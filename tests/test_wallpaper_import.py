@@ -0,0 +1,101 @@
+from pathlib import Path
+import json
+import os
+
+from includes import wallpaper_import
+from includes.wallpaper_import import WallpaperImporter, INDEX_VERSION
+
+
+def _write(path: Path, content: bytes) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return path
+
+
+def _importer(tmp_path: Path) -> WallpaperImporter:
+    return WallpaperImporter(tmp_path / "dest", index_path=tmp_path / "index.json", workers=4)
+
+
+def _index(tmp_path: Path):
+    return json.loads((tmp_path / "index.json").read_text())
+
+
+def _count_hashes(monkeypatch):
+    hashed = []
+    file_hash = wallpaper_import.file_hash
+    monkeypatch.setattr(wallpaper_import, "file_hash",
+                        lambda path: hashed.append(Path(path).name) or file_hash(path))
+    return hashed
+
+
+def test_duplicates_are_skipped_under_any_name(tmp_path):
+    src, dest = tmp_path / "src", tmp_path / "dest"
+    _write(dest / "mine.png", b"mountains")
+    _write(src / "mountains.png", b"mountains")
+    _write(src / "forest.jpg", b"forest")
+    _write(src / "nested/forest-copy.jpg", b"forest")
+    _write(src / ".hidden.png", b"hidden")
+    _write(src / ".git/objects/blob.png", b"git object")
+    _write(src / "README.md", b"readme")
+
+    result = _importer(tmp_path).import_tree(src)
+
+    assert (result.copied, result.duplicates, result.failed) == (1, 2, 0)
+    copied = sorted(str(p.relative_to(dest)) for p in dest.rglob("*") if p.is_file())
+    assert copied == ["forest.jpg", "mine.png"]
+
+
+def test_unchanged_files_are_not_hashed_again(tmp_path, monkeypatch):
+    src = tmp_path / "src"
+    _write(src / "a.png", b"a")
+    _write(src / "b.png", b"b")
+    _importer(tmp_path).import_tree(src)
+
+    hashed = _count_hashes(monkeypatch)
+    result = _importer(tmp_path).import_tree(src)
+    assert (result.copied, result.duplicates) == (0, 2)
+    assert hashed == []
+
+    # Only the modified source is read again
+    os.utime(_write(src / "b.png", b"bb"), ns=(0, 10**9))
+    result = _importer(tmp_path).import_tree(src)
+    assert hashed == ["b.png"]
+    assert result.copied == 1
+    assert (tmp_path / "dest/b.png").read_bytes() == b"bb"
+
+
+def test_index_forgets_deleted_wallpapers(tmp_path):
+    src, dest = tmp_path / "src", tmp_path / "dest"
+    _write(src / "a.png", b"a")
+    _write(src / "b.png", b"b")
+    _importer(tmp_path).import_tree(src)
+    assert _index(tmp_path)["version"] == INDEX_VERSION
+    assert str(dest / "b.png") in _index(tmp_path)["files"]
+
+    # A wallpaper deleted by the user is dropped from the index, and its
+    # content no longer counts as present
+    (dest / "b.png").unlink()
+    result = _importer(tmp_path).import_tree(tmp_path / "empty")
+    files = _index(tmp_path)["files"]
+    assert str(dest / "b.png") not in files and str(dest / "a.png") in files
+    assert result.copied == 0
+
+    assert _importer(tmp_path).import_tree(src).copied == 1
+    assert (dest / "b.png").read_bytes() == b"b"
+
+
+def test_stale_index_is_rebuilt(tmp_path, monkeypatch):
+    src = tmp_path / "src"
+    st = _write(src / "a.png", b"a").stat()
+    # Matching size and mtime, only the version tells it apart
+    (tmp_path / "index.json").write_text(json.dumps({
+        "version": INDEX_VERSION - 1,
+        "files": {str(src / "a.png"): {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": "bogus"}},
+    }))
+
+    hashed = _count_hashes(monkeypatch)
+    _importer(tmp_path).import_tree(src)
+
+    assert hashed == ["a.png"]
+    assert _index(tmp_path)["version"] == INDEX_VERSION
+    assert _index(tmp_path)["files"][str(src / "a.png")]["hash"] != "bogus"
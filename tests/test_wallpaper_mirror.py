@@ -0,0 +1,81 @@
+from pathlib import Path
+import shutil
+import subprocess
+
+import pytest
+
+pytest.importorskip("rich")
+pytest.importorskip("pyfiglet")
+
+from modules.wallpapers import WallpapersInstaller
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="needs git")
+
+
+def git(*args: str, cwd: Path) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.name=SBDots", "-c", "user.email=sbdots@example.org", *args],
+        cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+
+@pytest.fixture
+def collection(tmp_path):
+    """A bare wallpaper repo served over file:// with partial clone enabled."""
+    work = tmp_path / "work"
+    work.mkdir()
+    git("init", "-q", "-b", "main", cwd=work)
+    (work / "mountains.png").write_bytes(b"png" * 1000)
+    (work / "lake.JPG").write_bytes(b"jpg" * 1000)
+    (work / "README.md").write_text("readme " * 1000)
+    (work / "previews").mkdir()
+    (work / "previews/mountains.png").write_bytes(b"preview" * 1000)
+    git("add", ".", cwd=work)
+    git("commit", "-q", "-m", "Initial wallpapers", cwd=work)
+
+    bare = tmp_path / "collection.git"
+    git("clone", "-q", "--bare", str(work), str(bare), cwd=tmp_path)
+    git("config", "uploadpack.allowFilter", "true", cwd=bare)
+    git("config", "uploadpack.allowAnySHA1InWant", "true", cwd=bare)
+    git("remote", "add", "bare", str(bare), cwd=work)
+    return work, bare
+
+
+def _blobs(repo: Path) -> set:
+    objects = git("cat-file", "--batch-all-objects", "--batch-check", cwd=repo)
+    return {line.split()[0] for line in objects.splitlines() if line.split()[1] == "blob"}
+
+
+def test_mirror_fetches_only_top_level_images(collection, tmp_path):
+    work, bare = collection
+    mirror = tmp_path / "mirror"
+    installer = WallpapersInstaller(repo_url=f"file://{bare}", mirror_dir=mirror)
+
+    assert installer._sync_mirror()
+
+    files = sorted(p.relative_to(mirror).as_posix() for p in mirror.rglob("*")
+                   if p.is_file() and ".git" not in p.parts)
+    assert files == ["lake.JPG", "mountains.png"]
+    wanted = {git("rev-parse", f"HEAD:{name}", cwd=work).strip() for name in files}
+    assert _blobs(mirror) == wanted
+
+
+def test_mirror_update_fetches_new_commit_only(collection, tmp_path):
+    work, bare = collection
+    mirror = tmp_path / "mirror"
+    installer = WallpapersInstaller(repo_url=f"file://{bare}", mirror_dir=mirror)
+    assert installer._sync_mirror()
+    inode = (mirror / ".git").stat().st_ino
+
+    (work / "forest.webp").write_bytes(b"webp" * 1000)
+    (work / "lake.JPG").unlink()
+    git("add", "-A", cwd=work)
+    git("commit", "-q", "-m", "Swap a wallpaper", cwd=work)
+    git("push", "-q", "bare", "main", cwd=work)
+
+    assert installer._sync_mirror()
+
+    # Updated in place, not recloned
+    assert (mirror / ".git").stat().st_ino == inode
+    assert (mirror / "forest.webp").read_bytes() == b"webp" * 1000
+    assert not (mirror / "lake.JPG").exists()
+    assert git("rev-parse", "HEAD", cwd=mirror) == git("rev-parse", "HEAD", cwd=work)
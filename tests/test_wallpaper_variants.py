@@ -0,0 +1,23 @@
+from misc.wallpaper_variants import Monitor, _monitors_from_config
+
+MONITOR_CONF = """\
+# See https://wiki.hyprland.org/Configuring/Monitors/
+monitor = DP-1, 2560x1440@144, 0x0, 1
+monitor = HDMI-A-1, 1920x1080@60, 2560x0, 1, transform, 1
+monitor = , preferred, auto, 1
+monitorv2 {
+    output = eDP-1
+    mode = 2880x1800@90
+}
+monitor_extra_flag
+"""
+
+
+def test_monitor_conf_skips_other_keys_and_blocks(tmp_path):
+    conf = tmp_path / "monitor.conf"
+    conf.write_text(MONITOR_CONF)
+
+    assert _monitors_from_config(conf) == [
+        Monitor("DP-1", 2560, 1440),
+        Monitor("HDMI-A-1", 1080, 1920),
+    ]
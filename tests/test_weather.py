@@ -0,0 +1,220 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List
+import json
+import queue
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+requests = pytest.importorskip("requests")
+
+WEATHER_SCRIPT = Path(__file__).resolve().parent.parent / "share/dotfiles/waybar/scripts/weather.py"
+
+
+def _weather(text: str, temp_c: float) -> Dict:
+    return {
+        "location": {"name": "Test", "region": "Region", "country": "Country"},
+        "current": {"temp_c": temp_c, "condition": {"code": 1000, "text": text},
+                    "wind_kph": 1, "wind_degree": 2, "humidity": 3},
+    }
+
+
+class WeatherServer(ThreadingHTTPServer):
+    """Stands in for WeatherAPI.com's current.json endpoint."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), WeatherHandler)
+        self.requests: List[str] = []
+        self.status = 200
+        self.delay = 0.0
+        self.data = _weather("Sunny", 21.4)
+
+    @property
+    def api_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+class WeatherHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        server: WeatherServer = self.server
+        server.requests.append(self.path)
+        time.sleep(server.delay)
+        body = json.dumps(server.data if server.status == 200 else {"error": {}}).encode()
+        self.send_response(server.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    weather_server = WeatherServer()
+    thread = threading.Thread(target=weather_server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield weather_server
+    weather_server.shutdown()
+    weather_server.server_close()
+
+
+@pytest.fixture
+def run_weather(tmp_path: Path, server: WeatherServer):
+    """
+    Returns a function running weather.py against the stand-in server, with
+    a WeatherAPI.py settings module next to a cache in tmp_path.
+    """
+    settings = tmp_path / "settings"
+    settings.mkdir()
+    (settings / "WeatherAPI.py").write_text('API_KEY = "key"\nLATITUDE = 1.0\nLONGITUDE = 2.0\n')
+    requests_dir = str(Path(requests.__file__).resolve().parent.parent)
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(settings), requests_dir])}
+    cache = tmp_path / "weather.json"
+
+    def command(*args: str) -> List[str]:
+        return [sys.executable, str(WEATHER_SCRIPT), "--cache", str(cache),
+                "--api-url", server.api_url, "--timeout", "5", *args]
+
+    def run(*args: str) -> Dict:
+        result = subprocess.run(command(*args), env=env, capture_output=True, text=True, timeout=30)
+        assert result.returncode == 0, result.stderr
+        return json.loads(result.stdout) if result.stdout else {}
+
+    run.cache = cache
+    run.command = command
+    run.env = env
+    return run
+
+
+def _write_cache(path: Path, data: Dict, age: float, **fields) -> None:
+    cache = {"version": 1, "fetched_at": time.time() - age, "data": data,
+             "failures": 0, "retry_at": 0, **fields}
+    path.write_text(json.dumps(cache))
+
+
+def _wait_for(predicate, timeout: float = 10) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_first_run_fetches_and_caches(server, run_weather):
+    output = run_weather()
+
+    assert output["text"].endswith("Sunny, 21°C")
+    assert len(server.requests) == 1
+    assert json.loads(run_weather.cache.read_text())["data"] == server.data
+
+
+def test_fresh_cache_is_served_without_network_io(server, run_weather):
+    _write_cache(run_weather.cache, _weather("Cloudy", 10), age=60)
+
+    for _ in range(5):
+        output = run_weather()
+
+    assert output["text"].endswith("Cloudy, 10°C")
+    assert server.requests == []
+
+
+def test_stale_cache_is_served_while_revalidating(server, run_weather):
+    _write_cache(run_weather.cache, _weather("Cloudy", 10), age=3600)
+    server.delay = 1.0
+
+    start = time.monotonic()
+    output = run_weather()
+    elapsed = time.monotonic() - start
+
+    # The stale value comes back before the slow server has answered
+    assert output["text"].endswith("Cloudy, 10°C")
+    assert elapsed < server.delay
+    assert _wait_for(lambda: json.loads(run_weather.cache.read_text())["data"] == server.data)
+    assert run_weather()["text"].endswith("Sunny, 21°C")
+    assert len(server.requests) == 1
+
+
+def test_failed_refresh_backs_off(server, run_weather):
+    _write_cache(run_weather.cache, _weather("Cloudy", 10), age=3600)
+    server.status = 500
+
+    run_weather("--refresh")
+    cache = json.loads(run_weather.cache.read_text())
+
+    # The old data stays, the next attempt is delayed
+    assert cache["data"] == _weather("Cloudy", 10)
+    assert cache["failures"] == 1
+    assert cache["retry_at"] - time.time() > 30
+
+    # Within the backoff delay a stale cache doesn't trigger refreshes
+    assert run_weather()["text"].endswith("Cloudy, 10°C")
+    time.sleep(0.5)
+    assert len(server.requests) == 1
+
+    run_weather("--refresh")
+    cache = json.loads(run_weather.cache.read_text())
+    assert cache["failures"] == 2
+    assert cache["retry_at"] - time.time() > 90
+
+    server.status = 200
+    run_weather("--refresh")
+    cache = json.loads(run_weather.cache.read_text())
+    assert (cache["failures"], cache["retry_at"], cache["data"]) == (0, 0, server.data)
+
+
+@pytest.fixture
+def start_daemon(run_weather):
+    """Returns a function starting weather.py --daemon, and a queue of its output lines"""
+    procs: List[subprocess.Popen] = []
+
+    def start():
+        proc = subprocess.Popen(run_weather.command("--daemon"), env=run_weather.env,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        procs.append(proc)
+        lines: "queue.Queue[Dict]" = queue.Queue()
+
+        def read() -> None:
+            for line in proc.stdout:
+                lines.put(json.loads(line))
+
+        threading.Thread(target=read, daemon=True).start()
+        return proc, lines
+
+    yield start
+    for proc in procs:
+        proc.terminate()
+        proc.wait(timeout=5)
+
+
+def test_daemon_shows_stale_cache_before_refreshing(server, run_weather, start_daemon):
+    _write_cache(run_weather.cache, _weather("Cloudy", 10), age=3600)
+    server.delay = 1.0
+    start = time.monotonic()
+    _, lines = start_daemon()
+
+    first = lines.get(timeout=10)
+    elapsed = time.monotonic() - start
+
+    assert first["text"].endswith("Cloudy, 10°C")
+    assert elapsed < server.delay
+    assert lines.get(timeout=10)["text"].endswith("Sunny, 21°C")
+
+
+def test_daemon_survives_an_unwritable_cache(server, run_weather, start_daemon):
+    # save_cache writes through a temp file next to the cache, a directory
+    # in its place makes every write fail
+    Path(f"{run_weather.cache}.tmp").mkdir()
+    proc, lines = start_daemon()
+
+    assert lines.get(timeout=10)["text"].endswith("Sunny, 21°C")
+    assert len(server.requests) == 1
+    time.sleep(0.5)
+    assert proc.poll() is None